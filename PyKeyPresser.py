@@ -2,60 +2,193 @@
 DM COM接口Python包装类
 基于CKeyPresser.h自动生成，函数顺序与CKeyPresser.h保持一致
 支持多种创建方式，包括免注册调用
+支持替换后端(见dm_backend)，可在无dm.dll的环境下运行
 """
-import win32com.client
 import time
 import os
 import sys
+import json
+from array import array
+from contextlib import contextmanager
+
+
+def _default_strategy_cache():
+    """获取默认的创建策略缓存文件路径"""
+    base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    return os.path.join(base, '.pykeypresser_strategy.json')
+
 
 class PyKeyPresser:
-    def __init__(self, dll_path=None, use_registration_fallback=True):
+    def __init__(self, dll_path=None, use_registration_fallback=True, lazy=False,
+                 creation_methods=None, strategy_cache=None, verbose=True, backend=None,
+                 early_bind=True):
         """
         初始化DM COM对象
         Args:
             dll_path: dm.dll文件路径，如果为None则自动查找
             use_registration_fallback: 如果注册失败，是否尝试免注册方法
+            lazy: 为True时延迟到第一次调用接口时才创建COM对象
+            creation_methods: 自定义创建方法列表，每个方法接收dll_path并返回dm对象，
+                为None时使用内置的创建方法
+            strategy_cache: 创建策略缓存文件路径，记录上次成功的创建方法并优先尝试；
+                为None时使用默认路径，为False时不使用缓存
+            verbose: 是否打印创建过程信息
+            backend: 直接使用的后端对象(见dm_backend)，提供时不再创建COM对象
+            early_bind: 是否缓存COM方法的DISPID，避免每次调用都按名称查找
         """
-        self.dm = None
+        self._dm = None
         self.creation_method = None
+        self.dll_path = dll_path
+        self.use_registration_fallback = use_registration_fallback
+        self.verbose = verbose
+        self.early_bind = early_bind
+        self._creation_methods = creation_methods
+        if strategy_cache is None:
+            strategy_cache = _default_strategy_cache()
+        self._strategy_cache = strategy_cache
+        self._dispatch_failures = {}
+        self._snapshot = None
+        self._matcher = None
+        self.pics = None
+        self._picmem = None
+        self._input_scheduler = None
+        self.ocr_cache = None
+        self.costs = None
+        self.profiler = None
+        self.recorder = None
+        self._dict_index = 0
+        self._dict_sources = {}
+        self._glyphs = {}
+        self._waiter = None
         
-        # 尝试多种创建方法
-        creation_methods = [
+        if backend is not None:
+            self._dm = backend
+            self.creation_method = type(backend).__name__
+        elif not lazy:
+            self._create()
+    
+    @property
+    def dm(self):
+        """DM对象，延迟模式下在第一次访问时创建"""
+        if self._dm is None:
+            self._create()
+        return self._dm
+    
+    @dm.setter
+    def dm(self, value):
+        self._dm = value
+    
+    def Release(self):
+        """释放DM对象
+        停止输入调度器，关闭调用记录，并释放对DM对象的引用；COM对象应在创建它的线程中释放。
+        之后再访问dm时重新创建
+        """
+        if self._input_scheduler is not None:
+            self._input_scheduler.stop()
+            self._input_scheduler = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        self.profiler = None
+        self._dm = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.Release()
+    
+    def _log(self, msg):
+        """打印创建过程信息"""
+        if self.verbose:
+            print(msg)
+    
+    def _create(self):
+        """按顺序尝试各创建方法，上次成功的方法优先"""
+        creation_methods = self._creation_methods or [
             self._create_with_registration,
             self._create_with_path,
             self._create_with_alternative_progids,
             self._create_with_dll_direct
         ]
+        cached = self._load_strategy()
+        if cached:
+            creation_methods = sorted(creation_methods,
+                                      key=lambda m: m.__name__ != cached)
+        # 每次创建过程重新记录失败的ProgID
+        self._dispatch_failures = {}
         
         for method in creation_methods:
             try:
-                self.dm = method(dll_path)
-                if self.dm:
+                dm = method(self.dll_path)
+                if dm:
+                    self._dm = self._wrap_backend(dm)
                     self.creation_method = method.__name__
-                    print(f"成功使用 {method.__name__} 创建DM对象")
+                    self._log(f"成功使用 {method.__name__} 创建DM对象")
+                    self._save_strategy(method.__name__)
                     break
             except Exception as e:
-                print(f"{method.__name__} 失败: {e}")
+                self._log(f"{method.__name__} 失败: {e}")
                 continue
         
-        if not self.dm:
-            if use_registration_fallback:
+        if self._dm is None:
+            if self.use_registration_fallback:
                 # 尝试免注册方法
                 try:
                     from dm_unregistered import create_dm_from_dll
-                    self.dm = create_dm_from_dll()
-                    if self.dm:
+                    dm = create_dm_from_dll()
+                    if dm:
+                        self._dm = self._wrap_backend(dm)
                         self.creation_method = "unregistered_com"
-                        print("使用免注册COM方法创建成功")
+                        self._log("使用免注册COM方法创建成功")
                 except Exception as e:
-                    print(f"免注册方法失败: {e}")
+                    self._log(f"免注册方法失败: {e}")
             
-            if not self.dm:
+            if self._dm is None:
                 raise Exception("所有DM对象创建方法都失败了")
     
+    def _wrap_backend(self, dm):
+        """把COM对象包装为后端"""
+        from dm_backend import DmBackend, ComBackend
+        if isinstance(dm, DmBackend):
+            return dm
+        return ComBackend(dm, early_bind=self.early_bind)
+    
+    def _load_strategy(self):
+        """读取缓存的创建方法名"""
+        if not self._strategy_cache:
+            return None
+        try:
+            with open(self._strategy_cache, 'r', encoding='utf-8') as f:
+                return json.load(f).get('creation_method')
+        except (OSError, ValueError, AttributeError):
+            return None
+    
+    def _save_strategy(self, name):
+        """缓存成功的创建方法名"""
+        if not self._strategy_cache or self._load_strategy() == name:
+            return
+        try:
+            with open(self._strategy_cache, 'w', encoding='utf-8') as f:
+                json.dump({'creation_method': name}, f)
+        except OSError as e:
+            self._log(f"写入创建策略缓存失败: {e}")
+    
+    def _dispatch(self, prog_id):
+        """创建COM对象，同一次创建过程中PATH未变化时不重复尝试已失败的ProgID"""
+        key = (prog_id, os.environ.get('PATH', ''))
+        if key in self._dispatch_failures:
+            raise self._dispatch_failures[key]
+        import win32com.client
+        try:
+            return win32com.client.Dispatch(prog_id)
+        except Exception as e:
+            self._dispatch_failures[key] = e
+            raise
+    
     def _create_with_registration(self, dll_path):
         """标准注册方式创建"""
-        return win32com.client.Dispatch("dm.dmsoft")
+        return self._dispatch("dm.dmsoft")
     
     def _create_with_path(self, dll_path):
         """设置DLL路径后创建"""
@@ -63,7 +196,7 @@ class PyKeyPresser:
             dll_dir = os.path.dirname(dll_path)
             if dll_dir not in os.environ['PATH']:
                 os.environ['PATH'] = dll_dir + ';' + os.environ['PATH']
-        return win32com.client.Dispatch("dm.dmsoft")
+        return self._dispatch("dm.dmsoft")
     
     def _create_with_alternative_progids(self, dll_path):
         """尝试不同的ProgID"""
@@ -76,7 +209,7 @@ class PyKeyPresser:
         
         for prog_id in prog_ids:
             try:
-                return win32com.client.Dispatch(prog_id)
+                return self._dispatch(prog_id)
             except:
                 continue
         return None
@@ -94,10 +227,453 @@ class PyKeyPresser:
                 os.environ['PATH'] = dll_dir + ';' + os.environ['PATH']
             
             # 尝试创建
-            return win32com.client.Dispatch("dm.dmsoft")
+            return self._dispatch("dm.dmsoft")
         
         return None
 
+    def _out(self, result, *outs):
+        """整理带输出参数方法的返回值
+        后端返回 (结果, 输出参数...) 元组时直接使用，否则沿用传入的输出参数
+        """
+        if isinstance(result, tuple):
+            return result
+        return (result,) + outs
+    
+    @staticmethod
+    def _out_view(out, n):
+        """检查批量方法的输出缓冲区，返回按int32访问的memoryview
+        Args:
+            out: array('i')、一维或形状为(n, 3)的C连续int32 NumPy数组，为None时自动分配
+            n: 结果个数，每个结果3个int32
+        Returns:
+            (out, view)
+        """
+        if out is None:
+            out = array('i', bytes(12 * n))
+        view = memoryview(out)
+        if view.itemsize != 4 or view.format.lstrip('@=<') not in ('i', 'l'):
+            raise TypeError(f"输出缓冲区应为int32，实际格式为{view.format!r}，每项{view.itemsize}字节")
+        if not view.c_contiguous or view.ndim not in (1, 2) or (view.ndim == 2 and view.shape[1] != 3):
+            raise ValueError(f"输出缓冲区应为一维或(n, 3)的连续数组，实际形状为{view.shape}")
+        view = view.cast('B').cast('i')
+        if len(view) < 3 * n:
+            raise ValueError(f"输出缓冲区太小: 需要{3 * n}个int32，实际{len(view)}个")
+        return out, view
+    
+    def _batch(self, name, regions, args, out):
+        """对多个区域调用返回 (结果, x, y) 的查找方法
+        通过同名的包装方法调用，快照、图片池和本地后端与单次调用一致
+        Args:
+            name: 方法名
+            regions: [(x1, y1, x2, y2), ...]
+            args: 区域之后的其余参数
+            out: 预分配的int32缓冲区(array('i')或形状为(n, 3)的NumPy数组)，为None时自动分配
+        Returns:
+            out，每个区域依次写入 result, x, y 三个整数
+        """
+        out, view = self._out_view(out, len(regions))
+        method = getattr(self, name)
+        for i, (x1, y1, x2, y2) in enumerate(regions):
+            result = method(x1, y1, x2, y2, *args)
+            view[3 * i] = int(result[0])
+            view[3 * i + 1] = int(result[1])
+            view[3 * i + 2] = int(result[2])
+        return out
+    
+    def FindColorBatch(self, regions, color, sim, dir=0, out=None):
+        """在多个区域中分别查找颜色
+        Returns:
+            out缓冲区，每个区域依次为 result, x, y
+        """
+        return self._batch('FindColor', regions, (color, sim, dir), out)
+    
+    def FindPicBatch(self, regions, pic_name, delta_color, sim, dir=0, out=None):
+        """在多个区域中分别查找图片
+        Returns:
+            out缓冲区，每个区域依次为 result, x, y
+        """
+        return self._batch('FindPic', regions, (pic_name, delta_color, sim, dir), out)
+    
+    def FindMultiColorBatch(self, regions, first_color, offset_color, sim, dir=0, out=None):
+        """在多个区域中分别查找多点颜色
+        Returns:
+            out缓冲区，每个区域依次为 result, x, y
+        """
+        return self._batch('FindMultiColor', regions, (first_color, offset_color, sim, dir), out)
+    
+    def FindStrBatch(self, jobs, local=False, out=None):
+        """批量查找字符串，颜色和相似度相同且区域重叠的任务合并为一次扫描
+        Args:
+            jobs: [(x1, y1, x2, y2, str_text, color, sim), ...]
+            local: False时每组合并为一次FindStrEx调用，True时每组截图一次后用本地字库匹配
+            out: 预分配的int32缓冲区，为None时自动分配
+        Returns:
+            out缓冲区，每个任务依次为 序号, x, y，同FindStr
+        """
+        from dm_strbatch import group_jobs, run_group
+        out, view = self._out_view(out, len(jobs))
+        for group in group_jobs(jobs):
+            for i, result in run_group(self, jobs, group, local).items():
+                view[3 * i] = int(result[0])
+                view[3 * i + 1] = int(result[1])
+                view[3 * i + 2] = int(result[2])
+        return out
+
+    @property
+    def waiter(self):
+        """WaitFor*使用的等待器(dm_wait.Waiter)，可调整间隔并查看统计"""
+        if self._waiter is None:
+            from dm_wait import Waiter
+            self._waiter = Waiter(self)
+        return self._waiter
+    
+    def WaitForPic(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0, timeout=10, cancel=None, watch=True):
+        """等待图片出现
+        Args:
+            timeout: 超时(秒)，None表示一直等待
+            cancel: threading.Event，置位时停止等待
+            watch: 是否只在区域画面变化后调用FindPic
+        Returns:
+            同FindPic，超时或取消时序号为-1
+        """
+        return self.waiter.until(lambda: self.FindPic(x1, y1, x2, y2, pic_name, delta_color, sim, dir),
+                                 lambda r: r[0] >= 0, (x1, y1, x2, y2) if watch else None, timeout, cancel)
+    
+    def WaitForColor(self, x1, y1, x2, y2, color, sim, dir=0, timeout=10, cancel=None, watch=True):
+        """等待区域中出现颜色，返回同FindColor，超时或取消时result为0"""
+        return self.waiter.until(lambda: self.FindColor(x1, y1, x2, y2, color, sim, dir),
+                                 lambda r: r[0] == 1, (x1, y1, x2, y2) if watch else None, timeout, cancel)
+    
+    def WaitForCmpColor(self, x, y, color, sim, timeout=10, cancel=None):
+        """等待某点颜色匹配，返回同CmpColor(0表示匹配)"""
+        return self.waiter.until(lambda: self.CmpColor(x, y, color, sim),
+                                 lambda r: r == 0, None, timeout, cancel)
+    
+    def WaitForStr(self, x1, y1, x2, y2, str_text, color, sim, timeout=10, cancel=None, watch=True):
+        """等待文字出现，返回同FindStr，超时或取消时序号为-1"""
+        return self.waiter.until(lambda: self.FindStr(x1, y1, x2, y2, str_text, color, sim),
+                                 lambda r: r[0] >= 0, (x1, y1, x2, y2) if watch else None, timeout, cancel)
+    
+    @contextmanager
+    def snapshot(self, x1, y1, x2, y2, ttl=None):
+        """屏幕快照，期间的颜色查询只截取一次屏幕
+        在with块内，区域位于快照范围内的GetColor、GetColorBGR、GetColorHSV、GetAveRGB、
+        CmpColor、FindColor、FindColorEx、FindMultiColor、FindMultiColorEx、FindMulColor
+        直接查询内存中的帧，退出时调用FreeScreenData释放
+        Args:
+            x1, y1, x2, y2: 快照区域
+            ttl: 帧的有效时间(秒)，过期后下一次查询时重新截取，为None时不过期
+        Returns:
+            dm_frame.Snapshot对象
+        """
+        from dm_frame import Snapshot
+        snap = Snapshot(self, x1, y1, x2, y2, ttl)
+        previous = self._snapshot
+        self._snapshot = snap
+        try:
+            yield snap
+        finally:
+            self._snapshot = previous
+            snap.release()
+    
+    def CmpColorBatch(self, points, sim):
+        """批量比较多个点的颜色，快照期间一次向量化完成
+        Args:
+            points: [(x, y, color), ...]
+            sim: 相似度
+        Returns:
+            每个点是否匹配的bool列表
+        """
+        if self._snapshot is not None and points:
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            frame = self._snapshot.lookup(min(xs), min(ys), max(xs) + 1, max(ys) + 1)
+            if frame is not None:
+                return frame.cmp_colors(points, sim).tolist()
+        return [self.CmpColor(x, y, color, sim) == 0 for x, y, color in points]
+    
+    def CaptureFrame(self, x1, y1, x2, y2):
+        """截取区域为dm_frame.Frame，像素已复制，dm的截图数据随即释放"""
+        from dm_frame import Snapshot
+        snap = Snapshot(self, x1, y1, x2, y2)
+        try:
+            return snap.grab().copy()
+        finally:
+            snap.release()
+    
+    def _frame(self, x1, y1, x2, y2):
+        """快照覆盖区域时返回快照的帧，否则截取新的帧"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x1, y1, x2, y2)
+            if frame is not None:
+                return frame
+        return self.CaptureFrame(x1, y1, x2, y2)
+    
+    @property
+    def matcher(self):
+        """本地找图引擎(dm_match.TemplateMatcher)，图片的相对路径基于dm的GetPath"""
+        if self._matcher is None:
+            from dm_match import TemplateMatcher
+            self._matcher = TemplateMatcher(base_path=self.dm.GetPath())
+        return self._matcher
+    
+    def FindPicLocal(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """在截取的帧上本地查找图片，参数与返回值同FindPic
+        多张图片共用一次截图；设置kp.matcher.roi_margin后优先在上次找到的位置附近查找(不保证dir顺序)
+        """
+        return self.matcher.find_pic(self._frame(x1, y1, x2, y2), x1, y1, x2, y2,
+                                     pic_name, delta_color, sim, dir)
+    
+    def FindPicExLocal(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """在截取的帧上本地查找所有图片，参数与返回值同FindPicEx"""
+        return self.matcher.find_pic_ex(self._frame(x1, y1, x2, y2), x1, y1, x2, y2,
+                                        pic_name, delta_color, sim, dir)
+    
+    def glyph_index(self, index=None):
+        """取得字库的本地字形索引(dm_dict.GlyphIndex)，由SetDict/AddDict设置的内容在第一次使用时解析
+        Args:
+            index: 字库序号，默认为UseDict选择的字库
+        """
+        from dm_dict import GlyphIndex
+        if index is None:
+            index = self._dict_index
+        glyphs = self._glyphs.get(index)
+        if glyphs is None:
+            glyphs = GlyphIndex()
+            for kind, value in self._dict_sources.get(index, ()):
+                if kind == 'file':
+                    glyphs.load(value if os.path.isabs(value) else os.path.join(self.dm.GetPath(), value))
+                else:
+                    glyphs.add_line(value)
+            self._glyphs[index] = glyphs
+        return glyphs
+    
+    def _match_glyphs(self, x1, y1, x2, y2, color, sim):
+        """在截取的帧上匹配当前字库的字形，返回屏幕坐标的 [(x, y, glyph), ...]"""
+        from dm_dict import binarize
+        pixels, ox, oy = self._frame(x1, y1, x2, y2).region(x1, y1, x2, y2)
+        matches = self.glyph_index().match(binarize(pixels, color), sim)
+        return [(x + ox, y + oy, glyph) for x, y, glyph in matches]
+    
+    def OcrLocal(self, x1, y1, x2, y2, color, sim):
+        """用本地字形索引识别文字，参数与返回值同Ocr"""
+        from dm_dict import ocr_text
+        return ocr_text(self._match_glyphs(x1, y1, x2, y2, color, sim))
+    
+    def FindStrLocal(self, x1, y1, x2, y2, str_text, color, sim):
+        """用本地字形索引查找字符串，参数与返回值同FindStr"""
+        from dm_dict import find_str
+        return find_str(self._match_glyphs(x1, y1, x2, y2, color, sim), str_text)
+    
+    def EnablePicRegistry(self, budget=64 * 1024 * 1024):
+        """启用图片预加载表(dm_pics.PicRegistry)
+        启用后FindPic、FindPicEx、FindPicE、FindPicEEx使用的图片由LoadPic预先加载，
+        已加载图片超过字节预算时用FreePic释放最久未使用的图片
+        Args:
+            budget: 已加载图片的字节预算
+        Returns:
+            PicRegistry对象，也可通过kp.pics访问
+        """
+        from dm_pics import PicRegistry
+        if self.pics is None:
+            self.pics = PicRegistry(self, budget)
+        else:
+            self.pics.budget = budget
+            self.pics.evict()
+        return self.pics
+    
+    @property
+    def picmem(self):
+        """内存图片池(dm_picmem.PicMemPool)"""
+        if self._picmem is None:
+            from dm_picmem import PicMemPool
+            self._picmem = PicMemPool()
+        return self._picmem
+    
+    def EnableOcrCache(self, size=512):
+        """启用文字识别结果缓存(dm_ocrcache.OcrCache)
+        启用后Ocr、GetWords、GetWordsNoDict、FindStr、FindStrFast、FindStrEx、FindStrFastEx、
+        FindStrWithFont在区域画面、参数和当前字库都相同时直接返回上一次的结果，
+        SetDict、AddDict、UseDict2、SetDictPwd会清除相关的结果，
+        SetMinRowGap、SetMinColGap、SetWordGap、SetWordLineHeight及其NoDict版本会清除全部结果
+        Args:
+            size: 最多缓存的结果数
+        Returns:
+            OcrCache对象，也可通过kp.ocr_cache访问
+        """
+        from dm_ocrcache import OcrCache
+        if self.ocr_cache is None:
+            self.ocr_cache = OcrCache(self, size)
+        else:
+            self.ocr_cache.size = size
+        return self.ocr_cache
+    
+    def EnableProfiling(self, sites=True, samples=4096):
+        """启用调用耗时统计(dm_profile.ProfilingBackend)
+        包装当前后端，记录每个dm方法的调用次数、错误次数、总耗时、p50/p99，以及每个调用位置的耗时
+        Args:
+            sites: 是否按调用位置统计
+            samples: 每个方法保留最近多少次调用的耗时
+        Returns:
+            ProfilingBackend对象，也可通过kp.profiler访问
+        """
+        from dm_profile import ProfilingBackend
+        if self.profiler is None:
+            self.profiler = ProfilingBackend(self.dm, sites, samples)
+            self._dm = self.profiler
+        return self.profiler
+    
+    def DisableProfiling(self):
+        """停止统计并恢复原来的后端，返回ProfilingBackend对象(保留已有统计)"""
+        profiler = self.profiler
+        if profiler is None:
+            return None
+        if self._dm is not profiler:
+            raise Exception("统计之后启用了其它后端包装(如StartRecording)，请先停用")
+        self._dm = profiler._backend
+        self.profiler = None
+        return profiler
+    
+    def StartRecording(self, path, frames=False, compress=True):
+        """开始记录调用(dm_trace.RecordingBackend)
+        之后的每次dm调用(方法、参数、结果、耗时)写入记录文件，可用dm_trace.ReplayBackend回放:
+            kp = PyKeyPresser(backend=ReplayBackend(path))
+        Args:
+            path: 记录文件路径
+            frames: 是否记录GetScreenData截取的像素(快照、本地找图找字回放时需要)
+            compress: 是否压缩像素
+        Returns:
+            RecordingBackend对象，也可通过kp.recorder访问
+        """
+        from dm_trace import RecordingBackend
+        if self.recorder is not None:
+            raise Exception("已经在记录中，请先调用StopRecording")
+        self.recorder = RecordingBackend(self.dm, path, frames, compress)
+        self._dm = self.recorder
+        return self.recorder
+    
+    def StopRecording(self):
+        """停止记录，写入索引并关闭记录文件，恢复原来的后端"""
+        recorder = self.recorder
+        if recorder is None:
+            return None
+        if self._dm is not recorder:
+            raise Exception("记录之后启用了其它后端包装(如EnableProfiling)，请先停用")
+        self._dm = recorder._backend
+        self.recorder = None
+        recorder.close()
+        return recorder
+    
+    def EnableCostModel(self, path=None, window=1000):
+        """启用识别条件的开销模型(dm_cost.CostModel)
+        启用后dm_states的条件记录每个调用位置的耗时和满足率，条件组按实测的期望开销排序
+        Args:
+            path: 统计的JSON文件，存在时加载，StateMachine.run结束时保存
+            window: 每个位置保留的判断次数
+        Returns:
+            CostModel对象，也可通过kp.costs访问
+        """
+        from dm_cost import CostModel
+        if self.costs is None or self.costs.path != path:
+            self.costs = CostModel(path, window)
+        else:
+            self.costs.window = window
+        return self.costs
+    
+    def _ocr(self, name, rect, args, dict_index, compute):
+        """启用缓存时经过缓存调用compute"""
+        if self.ocr_cache is None:
+            return compute()
+        return self.ocr_cache.call(name, rect, args, dict_index, compute)
+    
+    def _dict_changed(self, index=None):
+        """字库内容或识别参数(行列间距、字间距、行高)改变，清除缓存中相关的结果
+        Args:
+            index: 改变的字库序号，为None时清除全部
+        """
+        if self.ocr_cache is not None:
+            self.ocr_cache.invalidate(index)
+    
+    @property
+    def input_scheduler(self):
+        """输入调度器(dm_input.InputScheduler)，KeyCombo(block=False)时使用
+        默认直接使用本对象发送输入，只适用于thread_safe的后端(如ImageBackend)，
+        dm对象需先调用EnableInputScheduler(factory)
+        """
+        if self._input_scheduler is None:
+            from dm_input import InputScheduler
+            self._input_scheduler = InputScheduler(self)
+        return self._input_scheduler
+    
+    def EnableInputScheduler(self, factory=None, spin=0.002):
+        """设置输入调度器
+        dm对象不能跨线程使用，调度线程通过factory创建自己的dm对象发送输入，例如:
+            kp.EnableInputScheduler(lambda: PyKeyPresser(dll_path))
+        绑定窗口时应在factory中对新对象调用BindWindow
+        Args:
+            factory: 在调度线程中调用，返回发送输入的对象；为None时使用本对象(后端须thread_safe)
+            spin: 到点前自旋等待的时间(秒)
+        Returns:
+            InputScheduler对象
+        """
+        from dm_input import InputScheduler
+        if self._input_scheduler is not None:
+            self._input_scheduler.stop()
+        self._input_scheduler = InputScheduler(self, spin, factory)
+        return self._input_scheduler
+    
+    def AddPicMem(self, name, data):
+        """把BMP数据或NumPy图像加入内存图片池
+        Args:
+            name: 图片名
+            data: BMP文件内容，或 (h, w, 3) 的RGB / (h, w, 4) 的BGRA数组
+        Returns:
+            (地址, 字节数)
+        """
+        return self.picmem.add(name, data)
+    
+    def FindPicBuffer(self, x1, y1, x2, y2, names, delta_color, sim, dir=0):
+        """用内存图片池中的图片找图，参数与返回值同FindPic，names为 "a|b" 形式的图片名"""
+        return self.FindPicMem(x1, y1, x2, y2, self.picmem.pic_info(names), delta_color, sim, dir)
+    
+    def FindPicBufferEx(self, x1, y1, x2, y2, names, delta_color, sim, dir=0):
+        """用内存图片池中的图片找图，参数与返回值同FindPicEx"""
+        return self.FindPicMemEx(x1, y1, x2, y2, self.picmem.pic_info(names), delta_color, sim, dir)
+    
+    def ParseExResult(self, str_data, with_id=True):
+        """解析*Ex系列方法返回的结果字符串，见dm_results.ExResult"""
+        from dm_results import ExResult
+        return ExResult.parse(str_data, with_id)
+    
+    def FindPicExResult(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """查找图片，返回ExResult"""
+        return self.ParseExResult(self.FindPicEx(x1, y1, x2, y2, pic_name, delta_color, sim, dir))
+    
+    def FindPicEExResult(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """查找图片(增强)，返回ExResult"""
+        return self.ParseExResult(self.FindPicEEx(x1, y1, x2, y2, pic_name, delta_color, sim, dir))
+    
+    def FindPicMemExResult(self, x1, y1, x2, y2, pic_info, delta_color, sim, dir=0):
+        """在内存中查找图片，返回ExResult"""
+        return self.ParseExResult(self.FindPicMemEx(x1, y1, x2, y2, pic_info, delta_color, sim, dir))
+    
+    def FindColorExResult(self, x1, y1, x2, y2, color, sim, dir=0):
+        """查找颜色，返回ExResult(序号均为0)"""
+        return self.ParseExResult(self.FindColorEx(x1, y1, x2, y2, color, sim, dir), with_id=False)
+    
+    def FindMultiColorExResult(self, x1, y1, x2, y2, first_color, offset_color, sim, dir=0):
+        """查找多点颜色，返回ExResult(序号均为0)"""
+        return self.ParseExResult(self.FindMultiColorEx(x1, y1, x2, y2, first_color, offset_color, sim, dir),
+                                  with_id=False)
+    
+    def FindStrExResult(self, x1, y1, x2, y2, str_text, color, sim):
+        """查找字符串，返回ExResult"""
+        return self.ParseExResult(self.FindStrEx(x1, y1, x2, y2, str_text, color, sim))
+    
+    def FindStrFastExResult(self, x1, y1, x2, y2, str_text, color, sim):
+        """快速查找字符串，返回ExResult"""
+        return self.ParseExResult(self.FindStrFastEx(x1, y1, x2, y2, str_text, color, sim))
+    
     # 按照CKeyPresser.h顺序排列的函数
     
     def Ver(self):
@@ -106,17 +682,22 @@ class PyKeyPresser:
     
     def SetPath(self, path):
         """设置路径"""
+        if self._matcher is not None:
+            self._matcher.base_path = path
         return self.dm.SetPath(path)
     
     def Ocr(self, x1, y1, x2, y2, color, sim):
         """OCR识别"""
-        return self.dm.Ocr(x1, y1, x2, y2, color, sim)
+        return self._ocr('Ocr', (x1, y1, x2, y2), (color, sim), self._dict_index,
+                         lambda: self.dm.Ocr(x1, y1, x2, y2, color, sim))
     
     def FindStr(self, x1, y1, x2, y2, str_text, color, sim):
         """查找字符串"""
-        x, y = 0, 0
-        result = self.dm.FindStr(x1, y1, x2, y2, str_text, color, sim, x, y)
-        return result, x, y
+        def compute():
+            x, y = 0, 0
+            result = self.dm.FindStr(x1, y1, x2, y2, str_text, color, sim, x, y)
+            return self._out(result, x, y)
+        return self._ocr('FindStr', (x1, y1, x2, y2), (str_text, color, sim), self._dict_index, compute)
     
     def GetResultCount(self, str_data):
         """获取结果数量"""
@@ -126,7 +707,7 @@ class PyKeyPresser:
         """获取结果位置"""
         x, y = 0, 0
         result = self.dm.GetResultPos(str_data, index, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def StrStr(self, s, str_text):
         """字符串查找"""
@@ -138,6 +719,7 @@ class PyKeyPresser:
     
     def UseDict(self, index):
         """使用字典"""
+        self._dict_index = index
         return self.dm.UseDict(index)
     
     def GetBasePath(self):
@@ -146,6 +728,7 @@ class PyKeyPresser:
     
     def SetDictPwd(self, pwd):
         """设置字典密码"""
+        self._dict_changed()
         return self.dm.SetDictPwd(pwd)
     
     def OcrInFile(self, x1, y1, x2, y2, pic_name, color, sim):
@@ -184,42 +767,47 @@ class PyKeyPresser:
         """按下字符串键"""
         return self.dm.KeyPressStr(key_str, delay)
     
-    def KeyCombo(self, modifier_key, key_code, delay=0.1):
+    def KeyCombo(self, modifier_key, key_code, delay=0.1, block=True):
         """发送组合键
         Args:
             modifier_key: 修饰键的虚拟键码 (如Ctrl=17, Alt=18, Shift=16)
             key_code: 目标键的虚拟键码
             delay: 按键之间的延迟(秒)
+            block: False时交给输入调度器在后台发送，立即返回
+        Returns:
+            block=False时返回dm_input.InputJob，可wait()或cancel()
         """
+        if not block:
+            return self.input_scheduler.combo(modifier_key, key_code, delay)
         self.KeyDown(modifier_key)
         time.sleep(delay)
         self.KeyPress(key_code)
         time.sleep(delay)
         self.KeyUp(modifier_key)
     
-    def CtrlA(self):
+    def CtrlA(self, block=True):
         """Ctrl+A 全选"""
-        self.KeyCombo(17, 65)  # Ctrl=17, A=65
+        return self.KeyCombo(17, 65, block=block)  # Ctrl=17, A=65
     
-    def CtrlC(self):
+    def CtrlC(self, block=True):
         """Ctrl+C 复制"""
-        self.KeyCombo(17, 67)  # Ctrl=17, C=67
+        return self.KeyCombo(17, 67, block=block)  # Ctrl=17, C=67
     
-    def CtrlV(self):
+    def CtrlV(self, block=True):
         """Ctrl+V 粘贴"""
-        self.KeyCombo(17, 86)  # Ctrl=17, V=86
+        return self.KeyCombo(17, 86, block=block)  # Ctrl=17, V=86
     
-    def CtrlX(self):
+    def CtrlX(self, block=True):
         """Ctrl+X 剪切"""
-        self.KeyCombo(17, 88)  # Ctrl=17, X=88
+        return self.KeyCombo(17, 88, block=block)  # Ctrl=17, X=88
     
-    def CtrlZ(self):
+    def CtrlZ(self, block=True):
         """Ctrl+Z 撤销"""
-        self.KeyCombo(17, 90)  # Ctrl=17, Z=90
+        return self.KeyCombo(17, 90, block=block)  # Ctrl=17, Z=90
     
-    def CtrlS(self):
+    def CtrlS(self, block=True):
         """Ctrl+S 保存"""
-        self.KeyCombo(17, 83)  # Ctrl=17, S=83
+        return self.KeyCombo(17, 83, block=block)  # Ctrl=17, S=83
     
     def LeftClick(self):
         """左键单击"""
@@ -263,10 +851,18 @@ class PyKeyPresser:
     
     def GetColor(self, x, y):
         """获取指定坐标颜色"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x, y, x + 1, y + 1)
+            if frame is not None:
+                return frame.get_color(x, y)
         return self.dm.GetColor(x, y)
     
     def GetColorBGR(self, x, y):
         """获取指定坐标BGR颜色"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x, y, x + 1, y + 1)
+            if frame is not None:
+                return frame.get_color_bgr(x, y)
         return self.dm.GetColorBGR(x, y)
     
     def RGB2BGR(self, rgb_color):
@@ -283,17 +879,21 @@ class PyKeyPresser:
     
     def CmpColor(self, x, y, color, sim):
         """比较颜色"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x, y, x + 1, y + 1)
+            if frame is not None:
+                return frame.cmp_color(x, y, color, sim)
         return self.dm.CmpColor(x, y, color, sim)
     
     def ClientToScreen(self, hwnd, x, y):
         """客户区坐标转屏幕坐标"""
         result = self.dm.ClientToScreen(hwnd, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def ScreenToClient(self, hwnd, x, y):
         """屏幕坐标转客户区坐标"""
         result = self.dm.ScreenToClient(hwnd, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def ShowScrMsg(self, x1, y1, x2, y2, msg, color):
         """显示屏幕消息"""
@@ -301,44 +901,60 @@ class PyKeyPresser:
     
     def SetMinRowGap(self, row_gap):
         """设置最小行间距"""
+        self._dict_changed()
         return self.dm.SetMinRowGap(row_gap)
     
     def SetMinColGap(self, col_gap):
         """设置最小列间距"""
+        self._dict_changed()
         return self.dm.SetMinColGap(col_gap)
     
     def FindColor(self, x1, y1, x2, y2, color, sim, dir=0):
         """查找颜色"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x1, y1, x2, y2)
+            if frame is not None:
+                return frame.find_color(x1, y1, x2, y2, color, sim, dir)
         x, y = 0, 0
         result = self.dm.FindColor(x1, y1, x2, y2, color, sim, dir, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def FindColorEx(self, x1, y1, x2, y2, color, sim, dir=0):
         """查找颜色(扩展)"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x1, y1, x2, y2)
+            if frame is not None:
+                return frame.find_color_ex(x1, y1, x2, y2, color, sim, dir)
         return self.dm.FindColorEx(x1, y1, x2, y2, color, sim, dir)
     
     def SetWordLineHeight(self, line_height):
         """设置字行高度"""
+        self._dict_changed()
         return self.dm.SetWordLineHeight(line_height)
     
     def SetWordGap(self, word_gap):
         """设置字间距"""
+        self._dict_changed()
         return self.dm.SetWordGap(word_gap)
     
     def SetRowGapNoDict(self, row_gap):
         """设置行间距(不使用字典)"""
+        self._dict_changed()
         return self.dm.SetRowGapNoDict(row_gap)
     
     def SetColGapNoDict(self, col_gap):
         """设置列间距(不使用字典)"""
+        self._dict_changed()
         return self.dm.SetColGapNoDict(col_gap)
     
     def SetWordLineHeightNoDict(self, line_height):
         """设置字行高度(不使用字典)"""
+        self._dict_changed()
         return self.dm.SetWordLineHeightNoDict(line_height)
     
     def SetWordGapNoDict(self, word_gap):
         """设置字间距(不使用字典)"""
+        self._dict_changed()
         return self.dm.SetWordGapNoDict(word_gap)
     
     def GetWordResultCount(self, str_data):
@@ -349,7 +965,7 @@ class PyKeyPresser:
         """获取文字识别结果位置"""
         x, y = 0, 0
         result = self.dm.GetWordResultPos(str_data, index, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def GetWordResultStr(self, str_data, index):
         """获取文字识别结果字符串"""
@@ -357,11 +973,13 @@ class PyKeyPresser:
     
     def GetWords(self, x1, y1, x2, y2, color, sim):
         """获取识别到的所有文字"""
-        return self.dm.GetWords(x1, y1, x2, y2, color, sim)
+        return self._ocr('GetWords', (x1, y1, x2, y2), (color, sim), self._dict_index,
+                         lambda: self.dm.GetWords(x1, y1, x2, y2, color, sim))
     
     def GetWordsNoDict(self, x1, y1, x2, y2, color):
         """获取识别到的所有文字(不使用字典)"""
-        return self.dm.GetWordsNoDict(x1, y1, x2, y2, color)
+        return self._ocr('GetWordsNoDict', (x1, y1, x2, y2), (color,), None,
+                         lambda: self.dm.GetWordsNoDict(x1, y1, x2, y2, color))
     
     def SetShowErrorMsg(self, show):
         """设置是否显示错误消息"""
@@ -371,7 +989,7 @@ class PyKeyPresser:
         """获取窗口客户区大小"""
         width, height = 0, 0
         result = self.dm.GetClientSize(hwnd, width, height)
-        return result, width, height
+        return self._out(result, width, height)
     
     def MoveWindow(self, hwnd, x, y):
         """移动窗口"""
@@ -379,10 +997,18 @@ class PyKeyPresser:
     
     def GetColorHSV(self, x, y):
         """获取指定坐标HSV颜色"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x, y, x + 1, y + 1)
+            if frame is not None:
+                return frame.get_color_hsv(x, y)
         return self.dm.GetColorHSV(x, y)
     
     def GetAveRGB(self, x1, y1, x2, y2):
         """获取区域平均RGB颜色"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x1, y1, x2, y2)
+            if frame is not None:
+                return frame.get_ave_rgb(x1, y1, x2, y2)
         return self.dm.GetAveRGB(x1, y1, x2, y2)
     
     def GetAveHSV(self, x1, y1, x2, y2):
@@ -409,6 +1035,10 @@ class PyKeyPresser:
         """枚举窗口"""
         return self.dm.EnumWindow(parent, title, class_name, filter)
     
+    def EnumWindowByProcess(self, process_name, title, class_name, filter):
+        """根据进程名枚举窗口，返回 "hwnd1,hwnd2" """
+        return self.dm.EnumWindowByProcess(process_name, title, class_name, filter)
+    
     def GetWindowState(self, hwnd, flag):
         """获取窗口状态"""
         return self.dm.GetWindowState(hwnd, flag)
@@ -433,7 +1063,7 @@ class PyKeyPresser:
         """获取窗口矩形"""
         x1, y1, x2, y2 = 0, 0, 0, 0
         result = self.dm.GetWindowRect(hwnd, x1, y1, x2, y2)
-        return result, x1, y1, x2, y2
+        return self._out(result, x1, y1, x2, y2)
     
     def GetWindowTitle(self, hwnd):
         """获取窗口标题"""
@@ -548,11 +1178,17 @@ class PyKeyPresser:
         return self.dm.FreePic(pic_name)
     
     def GetScreenData(self, x1, y1, x2, y2):
-        """获取屏幕数据到内存"""
-        return self.dm.GetScreenData(x1, y1, x2, y2)
+        """获取屏幕数据到内存
+        Returns:
+            dm_frame.ScreenData，即数据地址(int)，可用with读取为NumPy数组并在退出时释放
+        """
+        from dm_frame import ScreenData
+        return ScreenData(self.dm.GetScreenData(x1, y1, x2, y2), self, x1, y1, x2, y2)
     
     def FreeScreenData(self, handle):
         """释放屏幕数据内存"""
+        if hasattr(handle, 'free'):
+            return handle.free()
         return self.dm.FreeScreenData(handle)
     
     def WheelUp(self):
@@ -593,16 +1229,23 @@ class PyKeyPresser:
     
     def SetDict(self, index, dict_name):
         """设置字典"""
+        self._dict_changed(index)
+        self._dict_sources[index] = [('file', dict_name)]
+        self._glyphs.pop(index, None)
         return self.dm.SetDict(index, dict_name)
     
     def FindPic(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
         """查找图片"""
         x, y = 0, 0
+        if self.pics is not None:
+            self.pics.use(pic_name)
         result = self.dm.FindPic(x1, y1, x2, y2, pic_name, delta_color, sim, dir, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def FindPicEx(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
         """查找图片(返回所有匹配点)"""
+        if self.pics is not None:
+            self.pics.use(pic_name)
         return self.dm.FindPicEx(x1, y1, x2, y2, pic_name, delta_color, sim, dir)
     
     def SetClientSize(self, hwnd, width, height):
@@ -651,6 +1294,10 @@ class PyKeyPresser:
     
     def AddDict(self, index, dict_info):
         """添加字典"""
+        self._dict_changed(index)
+        self._dict_sources.setdefault(index, []).append(('line', dict_info))
+        if index in self._glyphs:
+            self._glyphs[index].add_line(dict_info)
         return self.dm.AddDict(index, dict_info)
     
     def EnterCri(self):
@@ -803,7 +1450,7 @@ class PyKeyPresser:
         """获取鼠标位置"""
         x, y = 0, 0
         result = self.dm.GetCursorPos(x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def SetCursorPos(self, x, y):
         """设置鼠标位置"""
@@ -943,9 +1590,12 @@ class PyKeyPresser:
         Returns:
             (result, x, y) - 查找结果和坐标
         """
-        x, y = 0, 0
-        result = self.dm.FindStrWithFont(x1, y1, x2, y2, str_text, color, sim, font_name, font_size, flag, x, y)
-        return result, x, y
+        def compute():
+            x, y = 0, 0
+            result = self.dm.FindStrWithFont(x1, y1, x2, y2, str_text, color, sim, font_name, font_size, flag, x, y)
+            return self._out(result, x, y)
+        return self._ocr('FindStrWithFont', (x1, y1, x2, y2),
+                         (str_text, color, sim, font_name, font_size, flag), None, compute)
     
     def GetMachineCode(self):
         """获取机器码"""
@@ -1017,26 +1667,34 @@ class PyKeyPresser:
     
     def FindStrEx(self, x1, y1, x2, y2, str_text, color, sim):
         """查找字符串(扩展)"""
-        return self.dm.FindStrEx(x1, y1, x2, y2, str_text, color, sim)
+        return self._ocr('FindStrEx', (x1, y1, x2, y2), (str_text, color, sim), self._dict_index,
+                         lambda: self.dm.FindStrEx(x1, y1, x2, y2, str_text, color, sim))
     
     def FindStrFast(self, x1, y1, x2, y2, str_text, color, sim):
         """快速查找字符串"""
-        x, y = 0, 0
-        result = self.dm.FindStrFast(x1, y1, x2, y2, str_text, color, sim, x, y)
-        return result, x, y
+        def compute():
+            x, y = 0, 0
+            result = self.dm.FindStrFast(x1, y1, x2, y2, str_text, color, sim, x, y)
+            return self._out(result, x, y)
+        return self._ocr('FindStrFast', (x1, y1, x2, y2), (str_text, color, sim), self._dict_index, compute)
     
     def FindStrFastEx(self, x1, y1, x2, y2, str_text, color, sim):
         """快速查找字符串(扩展)"""
-        return self.dm.FindStrFastEx(x1, y1, x2, y2, str_text, color, sim)
+        return self._ocr('FindStrFastEx', (x1, y1, x2, y2), (str_text, color, sim), self._dict_index,
+                         lambda: self.dm.FindStrFastEx(x1, y1, x2, y2, str_text, color, sim))
     
     def FindPicE(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
         """查找图片(增强)"""
         x, y = 0, 0
+        if self.pics is not None:
+            self.pics.use(pic_name)
         result = self.dm.FindPicE(x1, y1, x2, y2, pic_name, delta_color, sim, dir, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def FindPicEEx(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
         """查找图片(增强扩展)"""
+        if self.pics is not None:
+            self.pics.use(pic_name)
         return self.dm.FindPicEEx(x1, y1, x2, y2, pic_name, delta_color, sim, dir)
     
     def FindMultiColor(self, x1, y1, x2, y2, first_color, offset_color, sim, dir=0):
@@ -1045,15 +1703,20 @@ class PyKeyPresser:
             x1, y1: 左上角坐标
             x2, y2: 右下角坐标
             first_color: 第一个点的颜色
-            offset_color: 偏移颜色点格式，如"00ff00|2,3|0000ff|5,5"
+            offset_color: 偏移颜色，格式为"x|y|颜色,x|y|颜色"，如"1|3|aabbcc,-5|-3|123456-000000"，
+                颜色前加"-"表示该点不能是此颜色
             sim: 相似度
             dir: 查找方向
         Returns:
             (result, x, y) - 查找结果和坐标
         """
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x1, y1, x2, y2)
+            if frame is not None:
+                return frame.find_multi_color(x1, y1, x2, y2, first_color, offset_color, sim, dir)
         x, y = 0, 0
         result = self.dm.FindMultiColor(x1, y1, x2, y2, first_color, offset_color, sim, dir, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def FindMultiColorEx(self, x1, y1, x2, y2, first_color, offset_color, sim, dir=0):
         """查找多点颜色(扩展)
@@ -1061,12 +1724,17 @@ class PyKeyPresser:
             x1, y1: 左上角坐标
             x2, y2: 右下角坐标
             first_color: 第一个点的颜色
-            offset_color: 偏移颜色点格式，如"00ff00|2,3|0000ff|5,5"
+            offset_color: 偏移颜色，格式为"x|y|颜色,x|y|颜色"，如"1|3|aabbcc,-5|-3|123456-000000"，
+                颜色前加"-"表示该点不能是此颜色
             sim: 相似度
             dir: 查找方向
         Returns:
             所有匹配点的坐标字符串
         """
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x1, y1, x2, y2)
+            if frame is not None:
+                return frame.find_multi_color_ex(x1, y1, x2, y2, first_color, offset_color, sim, dir)
         return self.dm.FindMultiColorEx(x1, y1, x2, y2, first_color, offset_color, sim, dir)
     
     def SetWindowTransparent(self, hwnd, v):
@@ -1116,7 +1784,7 @@ class PyKeyPresser:
         """在内存中查找图片"""
         x, y = 0, 0
         result = self.dm.FindPicMem(x1, y1, x2, y2, pic_info, delta_color, sim, dir, x, y)
-        return result, x, y
+        return self._out(result, x, y)
     
     def FindPicMemEx(self, x1, y1, x2, y2, pic_info, delta_color, sim, dir=0):
         """在内存中查找图片(扩展)"""
@@ -1124,6 +1792,7 @@ class PyKeyPresser:
     
     def UseDict2(self, index, dict_name):
         """使用字典2"""
+        self._dict_changed(index)
         return self.dm.UseDict2(index, dict_name)
     
     def ReadIni(self, section, key, file, default):
@@ -1176,6 +1845,10 @@ class PyKeyPresser:
     
     def FindMulColor(self, x1, y1, x2, y2, color, sim):
         """查找多点颜色"""
+        if self._snapshot is not None:
+            frame = self._snapshot.lookup(x1, y1, x2, y2)
+            if frame is not None:
+                return frame.find_mul_color(x1, y1, x2, y2, color, sim)
         return self.dm.FindMulColor(x1, y1, x2, y2, color, sim)
     
     def EnableMouseMsg(self, en):
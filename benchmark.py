@@ -0,0 +1,709 @@
+"""
+PyKeyPresser性能测试
+使用可注入的模拟后端，无需dm.dll即可在Linux上运行
+"""
+from PyKeyPresser import PyKeyPresser
+import os
+import sys
+import time
+import tempfile
+
+
+class FakeDm:
+    """模拟的DM对象"""
+    def Ver(self):
+        return "fake"
+
+
+def make_creator(name, cost, ok):
+    """生成模拟的创建方法
+    Args:
+        name: 方法名
+        cost: 每次创建耗时(秒)，模拟COM往返
+        ok: 是否创建成功
+    """
+    def creator(dll_path):
+        time.sleep(cost)
+        if not ok:
+            raise Exception("模拟创建失败")
+        return FakeDm()
+    creator.__name__ = name
+    return creator
+
+
+def bench_startup(cost=0.005, rounds=20):
+    """对比冷启动、缓存策略与延迟模式的创建耗时"""
+    print("\n=== 启动耗时 ===")
+    start = time.perf_counter()
+    import importlib
+    importlib.reload(sys.modules['PyKeyPresser'])
+    print(f"导入模块: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # 前三个方法失败，最后一个成功，模拟未注册机器
+    creators = [make_creator(f"strategy_{i}", cost, i == 3) for i in range(4)]
+    cache = os.path.join(tempfile.mkdtemp(), "strategy.json")
+
+    def run(**kwargs):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            kp = PyKeyPresser(creation_methods=creators, verbose=False, **kwargs)
+        kp.Ver()
+        return (time.perf_counter() - start) / rounds * 1000
+
+    print(f"无缓存: {run(strategy_cache=False):.2f} ms/次")
+    run(strategy_cache=cache)
+    print(f"缓存策略: {run(strategy_cache=cache):.2f} ms/次")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        PyKeyPresser(creation_methods=creators, verbose=False, lazy=True)
+    print(f"延迟模式(未调用): {(time.perf_counter() - start) / rounds * 1000:.3f} ms/次")
+
+
+def bench_backend(calls=20000):
+    """对比通过包装类与直接调用后端的单次调用耗时"""
+    import numpy as np
+    from dm_backend import ImageBackend
+    print("\n=== 包装类调用开销 ===")
+    frame = np.random.randint(0, 256, (600, 800, 3), dtype=np.uint8)
+    backend = ImageBackend(frame)
+    kp = PyKeyPresser(backend=backend)
+    for i in range(1000):  # 预热
+        kp.GetColor(i % 800, i % 600)
+
+    start = time.perf_counter()
+    for i in range(calls):
+        backend.GetColor(i % 800, i % 600)
+    direct = (time.perf_counter() - start) / calls * 1e6
+
+    start = time.perf_counter()
+    for i in range(calls):
+        kp.GetColor(i % 800, i % 600)
+    wrapped = (time.perf_counter() - start) / calls * 1e6
+    print(f"直接调用后端: {direct:.2f} us/次")
+    print(f"通过PyKeyPresser: {wrapped:.2f} us/次 (开销 {wrapped - direct:.2f} us)")
+
+
+class FakeOleObj:
+    """模拟的PyIDispatch，GetIDsOfNames按名称查表"""
+    def __init__(self, lookup_cost=0.0):
+        self.lookup_cost = lookup_cost
+        self.names = {"FindPic": 1, "GetColor": 2, "CmpColor": 3}
+        self.lookups = 0
+
+    def GetIDsOfNames(self, name):
+        self.lookups += 1
+        if self.lookup_cost:
+            deadline = time.perf_counter() + self.lookup_cost
+            while time.perf_counter() < deadline:
+                pass
+        return self.names[name]
+
+    def Invoke(self, dispid, lcid, flags, result_wanted, *args):
+        return 0
+
+
+class FakeDispatch:
+    """模拟的晚绑定COM对象，每次调用都先按名称查找DISPID"""
+    def __init__(self, oleobj):
+        self._oleobj_ = oleobj
+
+    def __getattr__(self, name):
+        oleobj = self.__dict__['_oleobj_']
+        def method(*args):
+            return oleobj.Invoke(oleobj.GetIDsOfNames(name), 0x400, 1, 1, *args)
+        return method
+
+
+def bench_dispid(calls=50000, lookup_cost=2e-6):
+    """对比缓存DISPID与晚绑定的单次调用耗时"""
+    from dm_backend import ComBackend
+    print("\n=== DISPID缓存 ===")
+    for early_bind in (False, True):
+        oleobj = FakeOleObj(lookup_cost)
+        kp = PyKeyPresser(backend=ComBackend(FakeDispatch(oleobj), early_bind=early_bind))
+        start = time.perf_counter()
+        for _ in range(calls):
+            kp.CmpColor(10, 10, "ffffff", 1.0)
+        cost = (time.perf_counter() - start) / calls * 1e6
+        name = "缓存DISPID" if early_bind else "晚绑定"
+        print(f"{name}: {cost:.2f} us/次, GetIDsOfNames调用 {oleobj.lookups} 次")
+
+
+def bench_color(probes=200, ticks=50):
+    """对比逐个CmpColor与快照内批量比较的每帧耗时"""
+    import numpy as np
+    from dm_backend import ImageBackend
+    print("\n=== 颜色比较 ===")
+    frame = np.random.randint(0, 256, (600, 800, 3), dtype=np.uint8)
+    kp = PyKeyPresser(backend=ImageBackend(frame))
+    rng = np.random.default_rng(0)
+    points = [(int(x), int(y), "ff0000-202020") for x, y in
+              zip(rng.integers(0, 800, probes), rng.integers(0, 600, probes))]
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        [kp.CmpColor(x, y, color, 0.9) for x, y, color in points]
+    single = (time.perf_counter() - start) / ticks * 1000
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        with kp.snapshot(0, 0, 800, 600):
+            kp.CmpColorBatch(points, 0.9)
+    batch = (time.perf_counter() - start) / ticks * 1000
+    print(f"逐个CmpColor: {single:.2f} ms/帧 ({probes}个点)")
+    print(f"快照+CmpColorBatch: {batch:.2f} ms/帧")
+
+
+def bench_find_pic(count=30, size=32):
+    """对比逐张截图找图与一次截图查找多张图片"""
+    import numpy as np
+    import dm_image
+    from dm_backend import ImageBackend
+    print("\n=== 本地找图 ===")
+    rng = np.random.default_rng(0)
+    screen = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    folder = tempfile.mkdtemp()
+    names = []
+    for i in range(count):
+        y, x = rng.integers(0, 1080 - size), rng.integers(0, 1920 - size)
+        dm_image.write_bmp(os.path.join(folder, f"{i}.bmp"), screen[y:y + size, x:x + size])
+        names.append(f"{i}.bmp")
+    kp = PyKeyPresser(backend=ImageBackend(screen))
+    kp.SetPath(folder)
+
+    start = time.perf_counter()
+    for name in names:
+        kp.FindPicLocal(0, 0, 1920, 1080, name, "000000", 1.0)
+    print(f"逐张截图查找: {(time.perf_counter() - start) * 1000:.1f} ms ({count}张)")
+
+    start = time.perf_counter()
+    kp.FindPicExLocal(0, 0, 1920, 1080, "|".join(names), "000000", 1.0)
+    print(f"一次截图查找全部: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    with kp.snapshot(0, 0, 1920, 1080):
+        for name in names:
+            kp.FindPicLocal(0, 0, 1920, 1080, name, "000000", 1.0)
+    print(f"快照内逐张查找: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    kp.matcher.roi_margin = 16
+    start = time.perf_counter()
+    with kp.snapshot(0, 0, 1920, 1080):
+        for name in names:
+            kp.FindPicLocal(0, 0, 1920, 1080, name, "000000", 1.0)
+    print(f"快照内逐张查找(优先上次位置，不保证dir顺序): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def bench_combo(count=20, delay=0.01):
+    """对比阻塞KeyCombo与调度器发送的调用方耗时和计时偏差"""
+    from dm_backend import ImageBackend
+    print("\n=== 组合键 ===")
+    kp = PyKeyPresser(backend=ImageBackend())
+
+    start = time.perf_counter()
+    for _ in range(count):
+        kp.KeyCombo(17, 67, delay)
+    blocking = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    jobs = [kp.KeyCombo(17, 67, delay, block=False) for _ in range(count)]
+    queued = (time.perf_counter() - start) * 1000
+    for job in jobs:
+        job.wait()
+    stats = kp.input_scheduler.stats()
+    print(f"阻塞调用: {blocking:.1f} ms ({count}次)")
+    print(f"调度器入队: {queued:.2f} ms, 平均偏差 {stats['mean_jitter'] * 1e6:.0f} us, "
+          f"最大偏差 {stats['max_jitter'] * 1e6:.0f} us")
+
+
+class SlowWindowDm:
+    """模拟绑定窗口的dm对象，每次找图耗时cost秒(COM调用期间不占用GIL)"""
+    def __init__(self, cost):
+        self.cost = cost
+        self.hwnd = 0
+
+    def BindWindow(self, hwnd, display, mouse, keypad, mode):
+        self.hwnd = hwnd
+        return 1
+
+    def UnBindWindow(self):
+        self.hwnd = 0
+        return 1
+
+    def GetWindowState(self, hwnd, flag):
+        return int(hwnd == self.hwnd)
+
+    def FindPic(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir, x, y):
+        time.sleep(self.cost)
+        return 0, -1, -1
+
+
+def bench_pool(tasks=200, cost=0.002):
+    """多窗口工作池的吞吐量随实例数的变化"""
+    from dm_pool import WindowPool
+    print("\n=== 多窗口工作池 ===")
+    factory = lambda: PyKeyPresser(backend=SlowWindowDm(cost))
+    find = lambda kp: kp.FindPic(0, 0, 800, 600, "ok.bmp", "000000", 0.9)
+    base = None
+    for count in (1, 2, 4, 8, 16):
+        with WindowPool(range(1, count + 1), factory=factory) as pool:
+            pool.check()
+            start = time.perf_counter()
+            futures = [pool.submit(i % count + 1, find) for i in range(tasks)]
+            for future in futures:
+                future.result()
+            rate = tasks / (time.perf_counter() - start)
+        base = base or rate
+        print(f"{count:2d}个实例: {rate:.0f} 次/秒 (x{rate / base:.1f})")
+
+
+def bench_shard(count=16, size=32):
+    """对比单进程与多进程分片查找多张图片"""
+    import numpy as np
+    import dm_image
+    from dm_backend import ImageBackend
+    from dm_shard import ShardPool
+    print("\n=== 多进程分片找图 ===")
+    rng = np.random.default_rng(1)
+    screen = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    folder = tempfile.mkdtemp()
+    names = []
+    for i in range(count):
+        # 不在屏幕上的图片，每张都要扫描整个区域
+        dm_image.write_bmp(os.path.join(folder, f"{i}.bmp"),
+                           rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+        names.append(f"{i}.bmp")
+    pic_name = "|".join(names)
+    kp = PyKeyPresser(backend=ImageBackend(screen))
+    kp.SetPath(folder)
+    kp.FindPicEx(0, 0, 1920, 1080, pic_name, "000000", 1.0)
+
+    start = time.perf_counter()
+    kp.FindPicEx(0, 0, 1920, 1080, pic_name, "000000", 1.0)
+    print(f"单进程: {(time.perf_counter() - start) * 1000:.1f} ms ({count}张)")
+
+    with ShardPool(setup=[("SetPath", (folder,))]) as pool:
+        with pool.share(kp.CaptureFrame(0, 0, 1920, 1080)) as frame:
+            pool.find_pic_ex(frame, 0, 0, 1920, 1080, pic_name, "000000", 1.0)
+            start = time.perf_counter()
+            pool.find_pic_ex(frame, 0, 0, 1920, 1080, pic_name, "000000", 1.0)
+            print(f"{pool.processes}个进程: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def bench_stream(seconds=1.0, fps=60, detectors=3):
+    """对比每个检测各自截图与共用截图流的每帧耗时，以及消费者较慢时的丢帧"""
+    import numpy as np
+    from dm_backend import ImageBackend
+    from dm_stream import FrameStream
+    print("\n=== 截图流 ===")
+    kp = PyKeyPresser(backend=ImageBackend(np.zeros((1080, 1920, 3), dtype=np.uint8)))
+
+    ticks = 30
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for _ in range(detectors):
+            kp.CaptureFrame(0, 0, 1920, 1080)
+    print(f"{detectors}个检测各自截图: {(time.perf_counter() - start) / ticks * 1000:.2f} ms/帧")
+
+    with FrameStream(kp, 0, 0, 1920, 1080, fps=fps) as stream:
+        ages = []
+        for _ in range(ticks):
+            timestamp, frame = stream.latest()
+            ages.append(time.perf_counter() - timestamp)
+    print(f"共用截图流: 检测线程不截图, 取得的帧平均已截取 {sum(ages) / ticks * 1000:.2f} ms")
+
+    for block in (False, True):
+        with FrameStream(kp, 0, 0, 1920, 1080, fps=fps, block=block) as stream:
+            end = time.perf_counter() + seconds
+            for _ in stream.frames(latest=False):
+                time.sleep(0.03)  # 较慢的消费者
+                if time.perf_counter() > end:
+                    break
+        stats = stream.stats()
+        mode = "等待" if block else "丢弃旧帧"
+        print(f"{mode}: 截取 {stats['captured']} 帧, 交付 {stats['delivered']}, "
+              f"丢弃 {stats['dropped']}, 延误 {stats['late']}")
+
+
+def bench_watch(count=10, size=32, ticks=20):
+    """画面不变时，对比每帧重新找图与变化检测后复用结果"""
+    import numpy as np
+    import dm_image
+    from dm_backend import ImageBackend
+    from dm_watch import Watcher
+    print("\n=== 变化检测 ===")
+    rng = np.random.default_rng(2)
+    screen = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    folder = tempfile.mkdtemp()
+    kp = PyKeyPresser(backend=ImageBackend(screen))
+    kp.SetPath(folder)
+    watcher = Watcher(kp, 0, 0, 1920, 1080)
+    for i in range(count):
+        dm_image.write_bmp(os.path.join(folder, f"{i}.bmp"),
+                           rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+        x, y = i % 5 * 380, i // 5 * 500
+        watcher.watch_pic(f"pic{i}", x, y, x + 380, y + 500, f"{i}.bmp", "000000", 1.0)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        watcher.invalidate()
+        watcher.tick()
+    full = (time.perf_counter() - start) / ticks * 1000
+
+    watcher.tick()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        watcher.tick()
+    gated = (time.perf_counter() - start) / ticks * 1000
+    print(f"每帧重新查找{count}张图片: {full:.2f} ms/帧")
+    print(f"画面未变化时复用结果: {gated:.2f} ms/帧 (截图+块校验)")
+
+
+def bench_ocr_cache(calls=200, cost=0.005):
+    """静态文字区域重复识别时，对比每次识别与使用结果缓存"""
+    import numpy as np
+    from dm_backend import ImageBackend
+
+    class SlowOcrBackend(ImageBackend):
+        def Ocr(self, x1, y1, x2, y2, color, sim):
+            time.sleep(cost)
+            return "HP 100/100"
+
+    print("\n=== 文字识别缓存 ===")
+    kp = PyKeyPresser(backend=SlowOcrBackend(np.zeros((1080, 1920, 3), dtype=np.uint8)))
+    start = time.perf_counter()
+    for _ in range(calls):
+        kp.Ocr(10, 10, 210, 40, "ffffff-101010", 0.9)
+    plain = (time.perf_counter() - start) / calls * 1000
+
+    cache = kp.EnableOcrCache()
+    start = time.perf_counter()
+    for _ in range(calls):
+        kp.Ocr(10, 10, 210, 40, "ffffff-101010", 0.9)
+    cached = (time.perf_counter() - start) / calls * 1000
+    print(f"每次识别: {plain:.2f} ms/次")
+    print(f"使用缓存: {cached:.3f} ms/次, 命中率 {cache.stats()['hit_rate']:.0%}")
+
+
+def bench_glyphs(sizes=(500, 5000)):
+    """本地文字识别耗时随字库大小的变化"""
+    import numpy as np
+    from dm_backend import ImageBackend
+    from dm_dict import encode_glyph
+    print("\n=== 本地字库识别 ===")
+    rng = np.random.default_rng(3)
+    glyphs = []
+    for i in range(max(sizes)):
+        bits = rng.random((int(rng.integers(8, 12)), int(rng.integers(5, 12)))) < 0.4
+        bits[0, :] = bits[-1, :] = bits[:, 0] = bits[:, -1] = True
+        glyphs.append((chr(0x4e00 + i), bits))
+    screen = np.zeros((40, 300, 3), dtype=np.uint8)
+    x = 4
+    for char, bits in glyphs[:20]:
+        screen[10:10 + bits.shape[0], x:x + bits.shape[1]][bits] = 255
+        x += bits.shape[1] + 2
+    for size in sizes:
+        folder = tempfile.mkdtemp()
+        with open(os.path.join(folder, "dict.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(encode_glyph(bits, char) for char, bits in glyphs[:size]))
+        kp = PyKeyPresser(backend=ImageBackend(screen))
+        kp.SetPath(folder)
+        kp.SetDict(0, "dict.txt")
+        kp.OcrLocal(0, 0, 300, 40, "ffffff", 1.0)
+        for sim in (1.0, 0.9):
+            start = time.perf_counter()
+            for _ in range(10):
+                text = kp.OcrLocal(0, 0, 300, 40, "ffffff", sim)
+            cost = (time.perf_counter() - start) / 10 * 1000
+            print(f"{size}个字形, sim={sim}: {cost:.2f} ms, 识别 {len(text)} 个字")
+
+
+def bench_str_batch(labels=40):
+    """对比逐个FindStr与按颜色/区域分组的FindStrBatch"""
+    import numpy as np
+    from dm_backend import ImageBackend
+    from dm_dict import encode_glyph
+    print("\n=== 批量查找字符串 ===")
+    rng = np.random.default_rng(4)
+    glyphs = []
+    for i in range(500):
+        bits = rng.random((int(rng.integers(8, 12)), int(rng.integers(5, 12)))) < 0.4
+        bits[0, :] = bits[-1, :] = bits[:, 0] = bits[:, -1] = True
+        glyphs.append((chr(0x4e00 + i), bits))
+    screen = np.zeros((600, 800, 3), dtype=np.uint8)
+    jobs = []
+    for i in range(labels):
+        x, y = 10 + i % 4 * 190, 10 + i // 4 * 55
+        text = ""
+        for char, bits in glyphs[i * 4:i * 4 + 4]:
+            screen[y:y + bits.shape[0], x:x + bits.shape[1]][bits] = 255
+            x += bits.shape[1] + 2
+            text += char
+        jobs.append((0, y - 5, 800, y + 25, text, "ffffff", 1.0))
+    folder = tempfile.mkdtemp()
+    with open(os.path.join(folder, "dict.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(encode_glyph(bits, char) for char, bits in glyphs))
+    kp = PyKeyPresser(backend=ImageBackend(screen))
+    kp.SetPath(folder)
+    kp.SetDict(0, "dict.txt")
+
+    start = time.perf_counter()
+    for job in jobs:
+        kp.FindStr(*job)
+    single = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    kp.FindStrBatch(jobs)
+    merged = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    kp.FindStrBatch(jobs, local=True)
+    local = (time.perf_counter() - start) * 1000
+    print(f"逐个FindStr: {single:.1f} ms ({labels}个标签)")
+    print(f"FindStrBatch(合并FindStrEx): {merged:.1f} ms")
+    print(f"FindStrBatch(一次截图本地匹配): {local:.1f} ms")
+
+
+def bench_wait(appear=0.6, sleep=0.5):
+    """对比固定间隔轮询与WaitForPic的检测延迟和FindPic调用次数"""
+    import threading
+    import numpy as np
+    import dm_image
+    from dm_backend import ImageBackend
+
+    class CountingBackend(ImageBackend):
+        calls = 0
+        captures = 0
+
+        def FindPic(self, *args):
+            CountingBackend.calls += 1
+            return ImageBackend.FindPic(self, *args)
+
+        def GetScreenData(self, *args):
+            CountingBackend.captures += 1
+            return ImageBackend.GetScreenData(self, *args)
+
+    print("\n=== 等待图片 ===")
+    rng = np.random.default_rng(5)
+    screen = rng.integers(0, 256, (600, 800, 3), dtype=np.uint8)
+    pic = rng.integers(0, 256, (24, 24, 3), dtype=np.uint8)
+    folder = tempfile.mkdtemp()
+    dm_image.write_bmp(os.path.join(folder, "target.bmp"), pic)
+    changed = screen.copy()
+    changed[300:324, 400:424] = pic
+
+    for mode in ("固定间隔轮询", "WaitForPic"):
+        kp = PyKeyPresser(backend=CountingBackend(screen))
+        kp.SetPath(folder)
+        CountingBackend.calls = CountingBackend.captures = 0
+        timer = threading.Timer(appear, kp.dm.set_frame, (changed,))
+        start = time.perf_counter()
+        timer.start()
+        if mode == "WaitForPic":
+            kp.WaitForPic(0, 0, 800, 600, "target.bmp", "000000", 1.0)
+        else:
+            while kp.FindPic(0, 0, 800, 600, "target.bmp", "000000", 1.0)[0] < 0:
+                time.sleep(sleep)
+        latency = (time.perf_counter() - start - appear) * 1000
+        print(f"{mode}: 出现后 {latency:.0f} ms 检测到, FindPic调用 {CountingBackend.calls} 次, "
+              f"截图 {CountingBackend.captures} 次")
+
+
+def bench_states(states=5, ticks=20, capture=0.005):
+    """对比if/elif链与状态机每个tick的耗时，dm每次找图都要截图，用capture模拟截图耗时"""
+    import numpy as np
+    import dm_image
+    from dm_backend import ImageBackend
+    from dm_states import StateMachine, State, Pic, Color
+
+    class CaptureBackend(ImageBackend):
+        captures = 0
+
+        def _capture(self):
+            CaptureBackend.captures += 1
+            time.sleep(capture)
+
+        def FindPic(self, *args):
+            self._capture()
+            return ImageBackend.FindPic(self, *args)
+
+        def GetScreenData(self, *args):
+            self._capture()
+            return ImageBackend.GetScreenData(self, *args)
+
+    print("\n=== 状态机 ===")
+    rng = np.random.default_rng(6)
+    screen = rng.integers(0, 256, (600, 800, 3), dtype=np.uint8)
+    folder = tempfile.mkdtemp()
+    for i in range(states):
+        pic = rng.integers(0, 256, (24, 24, 3), dtype=np.uint8)
+        dm_image.write_bmp(os.path.join(folder, f"s{i}.bmp"), pic)
+    # 只有最后一个状态的图片在屏幕上，其它状态的颜色条件不满足
+    screen[300:324, 400:424] = pic
+    marker = "%02x%02x%02x" % tuple(int(c) for c in screen[10, 10])
+    colors = ["000001"] * (states - 1) + [marker]
+    kp = PyKeyPresser(backend=CaptureBackend(screen))
+    kp.SetPath(folder)
+
+    # 手写的判断链: 先找图再比较颜色
+    CaptureBackend.captures = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for i in range(states):
+            if kp.FindPic(0, 0, 800, 600, f"s{i}.bmp", "000000", 1.0)[0] >= 0 and \
+                    kp.CmpColor(10, 10, colors[i], 1.0) == 0:
+                break
+    chain = (time.perf_counter() - start) / ticks
+    chain_captures = CaptureBackend.captures / ticks
+
+    machine = StateMachine(kp, [
+        State(f"s{i}", [Pic(0, 0, 800, 600, f"s{i}.bmp", "000000", 1.0), Color(10, 10, colors[i])])
+        for i in range(states)], region=(0, 0, 800, 600))
+    CaptureBackend.captures = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        match = machine.tick()
+    engine = (time.perf_counter() - start) / ticks
+    print(f"if/elif链: {chain * 1000:.2f} ms/tick, 截图 {chain_captures:.0f} 次/tick")
+    print(f"状态机: {engine * 1000:.2f} ms/tick, 截图 {CaptureBackend.captures / ticks:.0f} 次/tick, "
+          f"匹配 {match.state.name}")
+    for name, item in machine.stats().items():
+        print(f"  {name}: 判断 {item['evals']} 次, 命中 {item['hits']} 次, 平均 {item['eval_ms']:.3f} ms")
+
+
+def bench_cost_model(ticks=200, cost=0.002):
+    """对比按静态开销与按实测开销排序条件组的每个tick耗时"""
+    import random
+    import numpy as np
+    from dm_backend import ImageBackend
+    from dm_states import StateMachine, State, Check
+
+    print("\n=== 条件开销模型 ===")
+    rng = random.Random(7)
+
+    def usually(kp):
+        time.sleep(cost)
+        return True
+
+    def rarely(kp):
+        time.sleep(cost)
+        return rng.random() < 0.1
+
+    # 静态开销估计错误: usually看起来便宜但总是满足，rarely很少满足，应先判断rarely
+    path = os.path.join(tempfile.mkdtemp(), "costs.json")
+    for mode in ("静态开销", "开销模型", "加载保存的统计"):
+        kp = PyKeyPresser(backend=ImageBackend(np.zeros((100, 100, 3), dtype=np.uint8)))
+        if mode != "静态开销":
+            kp.EnableCostModel(path)
+        machine = StateMachine(kp, [State("target", [Check(usually, cost=0.5), Check(rarely, cost=5.0)])],
+                               region=(0, 0, 100, 100))
+        start = time.perf_counter()
+        for _ in range(ticks):
+            machine.tick()
+        elapsed = (time.perf_counter() - start) / ticks
+        if kp.costs is not None:
+            kp.costs.save()
+        print(f"{mode}: {elapsed * 1000:.2f} ms/tick, 顺序 {machine.plans()['target']}")
+
+
+def bench_profile(calls=20000, sleep=0.002, sleeps=50):
+    """调用耗时统计的额外开销，以及用已知耗时的假后端验证统计结果"""
+    print("\n=== 调用耗时统计 ===")
+
+    class NoopDm(FakeDm):
+        def MoveTo(self, x, y):
+            return 1
+
+        def FindPic(self, *args):
+            time.sleep(sleep)
+            return -1, -1, -1
+
+    for mode in ("未启用", "启用(不记录调用位置)", "启用"):
+        kp = PyKeyPresser(backend=NoopDm())
+        if mode != "未启用":
+            kp.EnableProfiling(sites=mode == "启用")
+        start = time.perf_counter()
+        for _ in range(calls):
+            kp.MoveTo(1, 2)
+        print(f"{mode}: {(time.perf_counter() - start) / calls * 1e6:.2f} us/调用")
+
+    for _ in range(sleeps):
+        kp.FindPic(0, 0, 100, 100, "a.bmp", "000000", 0.9)
+    item = kp.profiler.stats()["FindPic"]
+    print(f"FindPic(实际耗时{sleep * 1000:.1f} ms): {item['calls']} 次, p50 {item['p50'] * 1000:.2f} ms, "
+          f"p99 {item['p99'] * 1000:.2f} ms, 调用位置 {list(item['sites'])}")
+
+
+def bench_trace(loops=200, cost=0.002):
+    """记录一次脚本运行，再对比回放的耗时"""
+    import numpy as np
+    import dm_image
+    from dm_backend import ImageBackend
+    from dm_trace import ReplayBackend, TraceReader
+
+    class SlowBackend(ImageBackend):
+        def FindPic(self, *args):
+            time.sleep(cost)
+            return ImageBackend.FindPic(self, *args)
+
+    print("\n=== 记录与回放 ===")
+    rng = np.random.default_rng(8)
+    screen = rng.integers(0, 256, (200, 300, 3), dtype=np.uint8)
+    folder = tempfile.mkdtemp()
+    dm_image.write_bmp(os.path.join(folder, "p.bmp"), screen[50:70, 100:120])
+    path = os.path.join(folder, "run.trace")
+
+    def bot(kp):
+        results = []
+        for _ in range(loops):
+            index, x, y = kp.FindPic(0, 0, 300, 200, "p.bmp", "000000", 1.0)
+            results.append((index, x, y, kp.CmpColor(5, 5, "000000", 1.0)))
+            if index >= 0:
+                kp.MoveTo(x, y)
+                kp.LeftClick()
+        return results
+
+    kp = PyKeyPresser(backend=SlowBackend(screen))
+    kp.SetPath(folder)
+    kp.StartRecording(path)
+    start = time.perf_counter()
+    recorded = bot(kp)
+    record_time = time.perf_counter() - start
+    kp.StopRecording()
+
+    replay = PyKeyPresser(backend=ReplayBackend(path))
+    start = time.perf_counter()
+    same = bot(replay) == recorded
+    replay_time = time.perf_counter() - start
+    with TraceReader(path) as reader:
+        start = time.perf_counter()
+        reader.seek(len(reader) - 1)
+        seek_time = time.perf_counter() - start
+        count = len(reader)
+    print(f"记录: {record_time * 1000:.0f} ms, {count} 次调用, 文件 {os.path.getsize(path) / 1024:.0f} KB")
+    print(f"回放: {replay_time * 1000:.0f} ms, 结果一致: {same}")
+    print(f"跳到最后一次调用: {seek_time * 1000:.2f} ms")
+
+
+def main():
+    bench_startup()
+    bench_backend()
+    bench_dispid()
+    bench_color()
+    bench_find_pic()
+    bench_combo()
+    bench_pool()
+    bench_shard()
+    bench_stream()
+    bench_watch()
+    bench_ocr_cache()
+    bench_glyphs()
+    bench_str_batch()
+    bench_wait()
+    bench_states()
+    bench_cost_model()
+    bench_profile()
+    bench_trace()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+asyncio接口
+dm对象在一个专用的单线程执行器(STA)中创建和调用，所有方法变为协程，
+延迟使用asyncio.sleep，等待类方法可以被取消。
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from PyKeyPresser import PyKeyPresser
+
+
+def _co_initialize():
+    """执行器线程初始化COM(单线程套间)"""
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+
+
+class AsyncKeyPresser:
+    """PyKeyPresser的asyncio包装
+
+    用法:
+        async with AsyncKeyPresser() as kp:
+            result, x, y = await kp.FindPic(0, 0, 800, 600, "ok.bmp", "000000", 0.9)
+            await kp.KeyCombo(17, 67)
+    """
+
+    def __init__(self, *args, **kwargs):
+        """参数与PyKeyPresser相同，对象在执行器线程中创建"""
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dm",
+                                           initializer=_co_initialize)
+        self._kp = self.executor.submit(PyKeyPresser, *args, **kwargs)
+        self._closed = False
+
+    async def run(self, func, *args):
+        """在执行器线程中调用 func(kp, *args)，用于快照等需要连续同步调用的代码"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(self._kp.result(), *args))
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(PyKeyPresser, name, None)):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(lambda kp: getattr(kp, name)(*args, **kwargs))
+        call.__name__ = name
+        self.__dict__[name] = call
+        return call
+
+    async def KeyCombo(self, modifier_key, key_code, delay=0.1):
+        """发送组合键，被取消时仍会释放修饰键"""
+        await self.KeyDown(modifier_key)
+        try:
+            await asyncio.sleep(delay)
+            await self.KeyPress(key_code)
+            await asyncio.sleep(delay)
+        finally:
+            await self.KeyUp(modifier_key)
+
+    async def CtrlA(self):
+        """Ctrl+A 全选"""
+        await self.KeyCombo(17, 65)
+
+    async def CtrlC(self):
+        """Ctrl+C 复制"""
+        await self.KeyCombo(17, 67)
+
+    async def CtrlV(self):
+        """Ctrl+V 粘贴"""
+        await self.KeyCombo(17, 86)
+
+    async def CtrlX(self):
+        """Ctrl+X 剪切"""
+        await self.KeyCombo(17, 88)
+
+    async def CtrlZ(self):
+        """Ctrl+Z 撤销"""
+        await self.KeyCombo(17, 90)
+
+    async def CtrlS(self):
+        """Ctrl+S 保存"""
+        await self.KeyCombo(17, 83)
+
+    async def WaitKey(self, key_code, time_out=0, interval=0.02):
+        """等待按键，可以被取消
+        Args:
+            key_code: 虚拟键码，0表示任意键
+            time_out: 超时(毫秒)，0表示一直等待
+            interval: 检查间隔(秒)
+        Returns:
+            超时返回0；key_code不为0时按下返回1，为0时返回按下的键码
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_out / 1000.0 if time_out else None
+        slice_ms = max(1, int(interval * 1000))
+        while True:
+            if key_code:
+                if await self.GetKeyState(key_code):
+                    return 1
+                await asyncio.sleep(interval)
+            else:
+                # 任意键只能由dm等待，分成短时间片以便取消
+                result = await self.run(lambda kp: kp.dm.WaitKey(0, slice_ms))
+                if result:
+                    return result
+            if deadline is not None and loop.time() >= deadline:
+                return 0
+
+    async def close(self):
+        """在执行器线程中释放对象(PyKeyPresser.Release)并关闭执行器，可重复调用"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self.run(lambda kp: kp.Release())
+        finally:
+            self.executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        await self.run(lambda kp: None)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,366 @@
+"""
+PyKeyPresser后端
+后端对象提供与dm.dmsoft同名的方法，PyKeyPresser把调用转发给后端。
+带输出参数的方法(如FindPic的x, y)返回 (结果, 输出参数...) 元组，与早绑定的COM调用一致。
+"""
+import ctypes
+import hashlib
+import os
+import time
+
+try:
+    import numpy as np
+    import dm_dict
+    import dm_image
+    from dm_frame import Frame
+    from dm_match import TemplateMatcher
+except ImportError:  # 只有ImageBackend需要numpy
+    np = None
+
+
+class DmBackend:
+    """后端基类，未实现的方法访问时抛出AttributeError
+    thread_safe为True表示可以在多个线程中同时调用(dm的COM对象不可以)
+    """
+
+    thread_safe = False
+
+    def __getattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} 不支持 {name}")
+
+
+# 与pythoncom中的常量相同，避免在导入时依赖pywin32
+DISPATCH_METHOD = 1
+LOCALE_USER_DEFAULT = 0x400
+VT_I4 = 3
+VT_BYREF = 0x4000
+
+# 带输出参数的方法: 方法名 -> 位于参数列表末尾的输出参数个数
+OUT_PARAMS = {
+    'FindStr': 2,
+    'FindStrFast': 2,
+    'FindStrWithFont': 2,
+    'FindColor': 2,
+    'FindPic': 2,
+    'FindPicMem': 2,
+    'FindMultiColor': 2,
+    'GetResultPos': 2,
+    'GetWordResultPos': 2,
+    'GetCursorPos': 2,
+    'GetClientSize': 2,
+    'GetWindowRect': 4,
+    'ClientToScreen': 2,
+    'ScreenToClient': 2,
+}
+
+
+def _variant_type():
+    """取得win32com的VARIANT类，没有pywin32时返回None"""
+    try:
+        from win32com.client import VARIANT
+    except ImportError:
+        return None
+    return VARIANT
+
+
+class ComBackend(DmBackend):
+    """dm.dmsoft COM对象后端
+
+    早绑定模式下每个方法只调用一次GetIDsOfNames，之后直接用缓存的DISPID调用Invoke，
+    避免每次调用都按名称查找。
+    """
+
+    def __init__(self, dispatch, early_bind=True):
+        """
+        Args:
+            dispatch: win32com创建的dm对象
+            early_bind: 是否缓存DISPID并直接调用Invoke
+        """
+        self.dispatch = dispatch
+        self.dispids = {}
+        self._oleobj = getattr(dispatch, '_oleobj_', None) if early_bind else None
+        self._variant = _variant_type()
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name in ('dispatch', 'dispids'):
+            raise AttributeError(name)
+        attr = None
+        if self._oleobj is not None:
+            try:
+                attr = self._bind(name, self._oleobj.GetIDsOfNames(name))
+            except Exception:
+                attr = None
+        if attr is None:
+            attr = getattr(self.dispatch, name)
+        if name in OUT_PARAMS:
+            attr = self._marshal_out(name, attr, OUT_PARAMS[name])
+        # 缓存方法对象，之后直接从实例字典中取得
+        self.__dict__[name] = attr
+        return attr
+
+    def _bind(self, name, dispid):
+        """生成通过DISPID调用的方法"""
+        self.dispids[name] = dispid
+        invoke = self._oleobj.Invoke
+
+        def method(*args):
+            return invoke(dispid, LOCALE_USER_DEFAULT, DISPATCH_METHOD, 1, *args)
+        method.__name__ = name
+        return method
+
+    def _marshal_out(self, name, method, count):
+        """把末尾的输出参数包装为VARIANT(VT_BYREF|VT_I4)，返回 (结果, 输出参数...)
+
+        makepy早绑定的方法直接返回元组，此时原样返回。每个方法复用同一组VARIANT。
+        """
+        if self._variant is None:
+            refs = None
+        else:
+            refs = [self._variant(VT_BYREF | VT_I4, 0) for _ in range(count)]
+
+        def call(*args):
+            if refs is None:
+                result = method(*args)
+                outs = args[-count:]
+            else:
+                for ref, value in zip(refs, args[-count:]):
+                    ref.value = int(value)
+                result = method(*args[:-count], *refs)
+                outs = [ref.value for ref in refs]
+            if isinstance(result, tuple):
+                return result
+            return (result,) + tuple(outs)
+        call.__name__ = name
+        return call
+
+
+def _input_method(name):
+    """生成记录输入事件的方法"""
+    def method(self, *args):
+        self.events.append((time.perf_counter(), name, args))
+        return 1
+    method.__name__ = name
+    method.__doc__ = f"记录{name}事件"
+    return method
+
+
+class ImageBackend(DmBackend):
+    """从内存图像提供屏幕内容的纯Python/NumPy后端，用于无界面环境下的测试与性能测试"""
+
+    INPUT_METHODS = (
+        'KeyPress', 'KeyDown', 'KeyUp', 'KeyDownChar', 'KeyUpChar', 'KeyPressChar',
+        'KeyPressStr', 'LeftClick', 'RightClick', 'MiddleClick', 'LeftDoubleClick',
+        'LeftDown', 'LeftUp', 'RightDown', 'RightUp', 'WheelUp', 'WheelDown',
+        'SendString',
+    )
+
+    # 只读内存中的图像并追加输入事件，可在多个线程中使用
+    thread_safe = True
+
+    def __init__(self, frame=None, width=1920, height=1080):
+        """
+        Args:
+            frame: 初始屏幕图像，(h, w, 3) 的RGB数组或 (h, w, 4) 的BGRA数组
+            width, height: 未提供frame时黑屏的大小
+        """
+        if np is None:
+            raise ImportError("ImageBackend需要numpy")
+        self.events = []
+        self.path = ""
+        self.cursor = (0, 0)
+        self.hwnd = 0
+        self._screen_data = {}
+        self.matcher = TemplateMatcher()
+        self.dicts = {}
+        self.dict_index = 0
+        if frame is None:
+            frame = np.zeros((height, width, 4), dtype=np.uint8)
+        self.set_frame(frame)
+
+    def set_frame(self, frame, x=0, y=0):
+        """更换屏幕图像，x, y为图像左上角的屏幕坐标"""
+        self.frame = dm_image.to_bgra(frame)
+        self.screen = Frame(self.frame, x, y)
+
+    def _region(self, x1, y1, x2, y2):
+        """取得区域图像，坐标裁剪到屏幕范围内，不含x2, y2"""
+        return self.screen.region(x1, y1, x2, y2)
+
+    def Ver(self):
+        return "ImageBackend"
+
+    def SetPath(self, path):
+        self.path = path
+        self.matcher.base_path = path
+        return 1
+
+    def GetPath(self):
+        return self.path
+
+    def GetBasePath(self):
+        return ""
+
+    def MoveTo(self, x, y):
+        self.cursor = (x, y)
+        self.events.append((time.perf_counter(), 'MoveTo', (x, y)))
+        return 1
+
+    def MoveR(self, rx, ry):
+        return self.MoveTo(self.cursor[0] + rx, self.cursor[1] + ry)
+
+    def GetCursorPos(self, x=0, y=0):
+        return 1, self.cursor[0], self.cursor[1]
+
+    def GetKeyState(self, vk_code):
+        """按已记录的KeyDown/KeyUp事件判断按键是否按下"""
+        for _, name, args in reversed(self.events):
+            if name in ('KeyDown', 'KeyUp') and args and args[0] == vk_code:
+                return int(name == 'KeyDown')
+        return 0
+
+    def BindWindow(self, hwnd, display, mouse, keypad, mode):
+        self.hwnd = hwnd
+        return 1
+
+    def BindWindowEx(self, hwnd, display, mouse, keypad, public_desc, mode):
+        self.hwnd = hwnd
+        return 1
+
+    def UnBindWindow(self):
+        self.hwnd = 0
+        return 1
+
+    def GetClientSize(self, hwnd, width=0, height=0):
+        h, w = self.frame.shape[:2]
+        return 1, w, h
+
+    def GetWindowRect(self, hwnd, x1=0, y1=0, x2=0, y2=0):
+        h, w = self.frame.shape[:2]
+        return 1, 0, 0, w, h
+
+    def GetScreenDepth(self):
+        return 32
+
+    def GetColor(self, x, y):
+        return self.screen.get_color(x, y)
+
+    def GetColorBGR(self, x, y):
+        return self.screen.get_color_bgr(x, y)
+
+    def GetColorHSV(self, x, y):
+        return self.screen.get_color_hsv(x, y)
+
+    def CmpColor(self, x, y, color, sim):
+        return self.screen.cmp_color(x, y, color, sim)
+
+    def FindColor(self, x1, y1, x2, y2, color, sim, dir=0, x=0, y=0):
+        return self.screen.find_color(x1, y1, x2, y2, color, sim, dir)
+
+    def FindColorEx(self, x1, y1, x2, y2, color, sim, dir=0):
+        return self.screen.find_color_ex(x1, y1, x2, y2, color, sim, dir)
+
+    def FindMultiColor(self, x1, y1, x2, y2, first_color, offset_color, sim, dir=0, x=0, y=0):
+        return self.screen.find_multi_color(x1, y1, x2, y2, first_color, offset_color, sim, dir)
+
+    def FindMultiColorEx(self, x1, y1, x2, y2, first_color, offset_color, sim, dir=0):
+        return self.screen.find_multi_color_ex(x1, y1, x2, y2, first_color, offset_color, sim, dir)
+
+    def FindMulColor(self, x1, y1, x2, y2, color, sim):
+        return self.screen.find_mul_color(x1, y1, x2, y2, color, sim)
+
+    def GetAveRGB(self, x1, y1, x2, y2):
+        return self.screen.get_ave_rgb(x1, y1, x2, y2)
+
+    def LoadPic(self, pic_name):
+        for name in pic_name.split('|'):
+            self.matcher.get(name)
+        return 1
+
+    def FreePic(self, pic_name):
+        for name in pic_name.split('|'):
+            self.matcher.remove(name)
+        return 1
+
+    def FindPic(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0, x=0, y=0):
+        return self.matcher.find_pic(self.screen, x1, y1, x2, y2, pic_name, delta_color, sim, dir)
+
+    def FindPicEx(self, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        return self.matcher.find_pic_ex(self.screen, x1, y1, x2, y2, pic_name, delta_color, sim, dir)
+
+    def _mem_pic_names(self, pic_info):
+        """把 "addr,size|addr,size" 中的内存图片加入找图引擎，返回对应的图片名
+        释放的缓冲区地址可能被新图片重用，图片名按内容的哈希区分
+        """
+        names = []
+        for part in pic_info.split('|'):
+            addr, size = (int(v) for v in part.split(','))
+            data = ctypes.string_at(addr, size)
+            name = 'mem:' + hashlib.blake2b(data, digest_size=16).hexdigest()
+            if name not in self.matcher.templates:
+                self.matcher.add(name, dm_image.decode_bmp(data))
+            names.append(name)
+        return '|'.join(names)
+
+    def FindPicMem(self, x1, y1, x2, y2, pic_info, delta_color, sim, dir=0, x=0, y=0):
+        return self.FindPic(x1, y1, x2, y2, self._mem_pic_names(pic_info), delta_color, sim, dir)
+
+    def FindPicMemEx(self, x1, y1, x2, y2, pic_info, delta_color, sim, dir=0):
+        return self.FindPicEx(x1, y1, x2, y2, self._mem_pic_names(pic_info), delta_color, sim, dir)
+
+    def SetDict(self, index, dict_name):
+        path = dict_name if os.path.isabs(dict_name) else os.path.join(self.path, dict_name)
+        glyphs = dm_dict.GlyphIndex()
+        try:
+            glyphs.load(path)
+        except OSError:
+            return 0
+        self.dicts[index] = glyphs
+        return 1
+
+    def AddDict(self, index, dict_info):
+        glyph = self.dicts.setdefault(index, dm_dict.GlyphIndex()).add_line(dict_info)
+        return int(glyph is not None)
+
+    def UseDict(self, index):
+        self.dict_index = index
+        return 1
+
+    def _match_glyphs(self, x1, y1, x2, y2, color, sim):
+        pixels, ox, oy = self._region(x1, y1, x2, y2)
+        glyphs = self.dicts.get(self.dict_index, dm_dict.GlyphIndex())
+        matches = glyphs.match(dm_dict.binarize(pixels, color), sim)
+        return [(x + ox, y + oy, glyph) for x, y, glyph in matches]
+
+    def Ocr(self, x1, y1, x2, y2, color, sim):
+        return dm_dict.ocr_text(self._match_glyphs(x1, y1, x2, y2, color, sim))
+
+    def FindStr(self, x1, y1, x2, y2, str_text, color, sim, x=0, y=0):
+        return dm_dict.find_str(self._match_glyphs(x1, y1, x2, y2, color, sim), str_text)
+
+    def FindStrFast(self, x1, y1, x2, y2, str_text, color, sim, x=0, y=0):
+        return self.FindStr(x1, y1, x2, y2, str_text, color, sim)
+
+    def FindStrEx(self, x1, y1, x2, y2, str_text, color, sim):
+        return dm_dict.find_str_ex(self._match_glyphs(x1, y1, x2, y2, color, sim), str_text)
+
+    def FindStrFastEx(self, x1, y1, x2, y2, str_text, color, sim):
+        return self.FindStrEx(x1, y1, x2, y2, str_text, color, sim)
+
+    def Capture(self, x1, y1, x2, y2, file_path):
+        dm_image.write_bmp(file_path, self._region(x1, y1, x2, y2)[0])
+        return 1
+
+    def GetScreenData(self, x1, y1, x2, y2):
+        if not (x1 < x2 and y1 < y2 and self.screen.covers(x1, y1, x2, y2)):
+            return 0
+        data = np.ascontiguousarray(self._region(x1, y1, x2, y2)[0])
+        addr = data.ctypes.data
+        self._screen_data[addr] = data
+        return addr
+
+    def FreeScreenData(self, handle):
+        return 1 if self._screen_data.pop(handle, None) is not None else 0
+
+
+for _name in ImageBackend.INPUT_METHODS:
+    setattr(ImageBackend, _name, _input_method(_name))
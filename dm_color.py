@@ -0,0 +1,238 @@
+"""
+dm颜色格式解析与本地颜色比较
+颜色格式为 "RRGGBB-DRDGDB"，多个颜色用 "|" 分隔，像素数据为BGRA uint8数组。
+查找函数一次向量化扫描整个区域，返回区域内的局部坐标，dir的含义与dm相同:
+    0: 从左到右,从上到下    1: 从左到右,从下到上    2: 从右到左,从上到下
+    3: 从右到左,从下到上    4: 从中心往外          5: 从上到下,从左到右
+    6: 从上到下,从右到左    7: 从下到上,从左到右    8: 从下到上,从右到左
+"""
+import numpy as np
+
+
+def sim_tolerance(sim):
+    """相似度换算为每个通道的额外容差"""
+    return int(round((1.0 - float(sim)) * 255))
+
+
+def parse_color(color):
+    """解析颜色字符串
+    Args:
+        color: 如 "ffffff-101010|aabbcc"
+    Returns:
+        [(r, g, b, dr, dg, db), ...]
+    """
+    colors = []
+    for part in color.split('|'):
+        part = part.strip()
+        if not part:
+            continue
+        value, _, delta = part.partition('-')
+        delta = delta or '000000'
+        colors.append((int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16),
+                       int(delta[0:2], 16), int(delta[2:4], 16), int(delta[4:6], 16)))
+    if not colors:
+        raise ValueError(f"无效的颜色: {color!r}")
+    return colors
+
+
+def color_mask(pixels, color, sim=1.0):
+    """计算与颜色匹配的像素掩码
+    Args:
+        pixels: (..., 4) 的BGRA数组
+        color: 颜色字符串
+        sim: 相似度(0.1-1.0)
+    Returns:
+        与pixels前几维形状相同的bool数组
+    """
+    tol = sim_tolerance(sim)
+    b = pixels[..., 0].astype(np.int16)
+    g = pixels[..., 1].astype(np.int16)
+    r = pixels[..., 2].astype(np.int16)
+    mask = None
+    for cr, cg, cb, dr, dg, db in parse_color(color):
+        m = ((np.abs(r - cr) <= dr + tol) & (np.abs(g - cg) <= dg + tol)
+             & (np.abs(b - cb) <= db + tol))
+        mask = m if mask is None else mask | m
+    return mask
+
+
+def cmp_colors(pixels, points, sim=1.0):
+    """批量比较多个点的颜色
+    Args:
+        pixels: (h, w, 4) 的BGRA数组
+        points: [(x, y, color), ...]，坐标为数组内的局部坐标
+        sim: 相似度
+    Returns:
+        每个点是否匹配的bool数组
+    """
+    result = np.zeros(len(points), dtype=bool)
+    groups = {}
+    for i, (x, y, color) in enumerate(points):
+        groups.setdefault(color, []).append(i)
+    for color, indices in groups.items():
+        xs = np.array([points[i][0] for i in indices])
+        ys = np.array([points[i][1] for i in indices])
+        result[indices] = color_mask(pixels[ys, xs], color, sim)
+    return result
+
+
+def _views(mask, dir):
+    """把掩码变换为按行扫描即为dir顺序的视图"""
+    if dir == 0:
+        return mask
+    if dir == 1:
+        return mask[::-1]
+    if dir == 2:
+        return mask[:, ::-1]
+    if dir == 3:
+        return mask[::-1, ::-1]
+    if dir == 5:
+        return mask.T
+    if dir == 6:
+        return mask[:, ::-1].T
+    if dir == 7:
+        return mask[::-1].T
+    if dir == 8:
+        return mask[::-1, ::-1].T
+    raise ValueError(f"不支持的查找方向: {dir}")
+
+
+def _restore(ys, xs, shape, dir):
+    """把视图中的坐标还原为掩码中的坐标"""
+    h, w = shape
+    if dir >= 5:
+        ys, xs = xs, ys
+    if dir in (1, 3, 7, 8):
+        ys = h - 1 - ys
+    if dir in (2, 3, 6, 8):
+        xs = w - 1 - xs
+    return ys, xs
+
+
+def ordered_points(mask, dir=0):
+    """按dir顺序列出掩码中为True的点
+    Returns:
+        (ys, xs) 两个int数组
+    """
+    if dir == 4:
+        ys, xs = np.nonzero(mask)
+        h, w = mask.shape
+        dist = (ys - (h - 1) / 2.0) ** 2 + (xs - (w - 1) / 2.0) ** 2
+        order = np.argsort(dist, kind='stable')
+        return ys[order], xs[order]
+    ys, xs = np.nonzero(_views(mask, dir))
+    return _restore(ys, xs, mask.shape, dir)
+
+
+def first_point(mask, dir=0):
+    """按dir顺序找第一个为True的点
+    Returns:
+        (x, y)，没有时返回None
+    """
+    if not mask.size:
+        return None
+    if dir == 4:
+        ys, xs = ordered_points(mask, 4)
+        return (int(xs[0]), int(ys[0])) if len(xs) else None
+    view = _views(mask, dir)
+    index = int(np.argmax(view))
+    if not view.flat[index]:
+        return None
+    vy, vx = divmod(index, view.shape[1])
+    ys, xs = _restore(np.array([vy]), np.array([vx]), mask.shape, dir)
+    return int(xs[0]), int(ys[0])
+
+
+def find_color(pixels, color, sim=1.0, dir=0):
+    """查找颜色，返回 (result, x, y)，未找到时为 (0, -1, -1)"""
+    point = first_point(color_mask(pixels, color, sim), dir)
+    if point is None:
+        return 0, -1, -1
+    return 1, point[0], point[1]
+
+
+def find_color_ex(pixels, color, sim=1.0, dir=0):
+    """查找所有颜色点，返回 (ys, xs)"""
+    return ordered_points(color_mask(pixels, color, sim), dir)
+
+
+def parse_offset_color(offset_color):
+    """解析多点颜色的偏移颜色
+    Args:
+        offset_color: 如 "1|3|aabbcc,-5|-3|123456-000000"，颜色前加 "-" 表示该点不能是此颜色，
+            有多个候选颜色时每个前面都加 "-"，如 "1|1|-123456-000000|-654321-000000"
+    Returns:
+        [(dx, dy, color, negate), ...]
+    """
+    offsets = []
+    for part in offset_color.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        dx, dy, color = part.split('|', 2)
+        negate = color.startswith('-')
+        if negate:
+            color = '|'.join(c.strip()[1:] if c.strip().startswith('-') else c for c in color.split('|'))
+        offsets.append((int(dx), int(dy), color, negate))
+    return offsets
+
+
+def _shift(mask, dx, dy):
+    """result[y, x] = mask[y + dy, x + dx]，超出范围为False"""
+    h, w = mask.shape
+    result = np.zeros_like(mask)
+    if abs(dx) >= w or abs(dy) >= h:
+        return result
+    result[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)] = \
+        mask[max(0, dy):h - max(0, -dy), max(0, dx):w - max(0, -dx)]
+    return result
+
+
+def multi_color_mask(pixels, first_color, offset_color, sim=1.0):
+    """计算所有满足多点颜色条件的首点位置，偏移点超出区域时视为不满足"""
+    mask = color_mask(pixels, first_color, sim)
+    valid = np.ones_like(mask)
+    masks = {}
+    for dx, dy, color, negate in parse_offset_color(offset_color):
+        if not mask.any():
+            break
+        if color not in masks:
+            masks[color] = color_mask(pixels, color, sim)
+        shifted = _shift(masks[color], dx, dy)
+        if negate:
+            inside = _shift(valid, dx, dy)
+            mask &= inside & ~shifted
+        else:
+            mask &= shifted
+    return mask
+
+
+def find_multi_color(pixels, first_color, offset_color, sim=1.0, dir=0):
+    """查找多点颜色，返回 (result, x, y)，未找到时为 (0, -1, -1)"""
+    point = first_point(multi_color_mask(pixels, first_color, offset_color, sim), dir)
+    if point is None:
+        return 0, -1, -1
+    return 1, point[0], point[1]
+
+
+def find_multi_color_ex(pixels, first_color, offset_color, sim=1.0, dir=0):
+    """查找所有满足多点颜色的首点，返回 (ys, xs)"""
+    return ordered_points(multi_color_mask(pixels, first_color, offset_color, sim), dir)
+
+
+def find_mul_color(pixels, color, sim=1.0):
+    """区域内是否包含颜色列表中的所有颜色，1表示全部找到，同FindMulColor"""
+    for part in color.split('|'):
+        if part.strip() and not color_mask(pixels, part, sim).any():
+            return 0
+    return 1
+
+
+def format_points(ys, xs, ox=0, oy=0):
+    """把坐标格式化为 "x,y|x,y" 字符串"""
+    return '|'.join(f'{x + ox},{y + oy}' for x, y in zip(xs.tolist(), ys.tolist()))
+
+
+def pixel_hex(pixel):
+    """BGRA像素转为 "rrggbb" 字符串"""
+    return '%02x%02x%02x' % (pixel[2], pixel[1], pixel[0])
@@ -0,0 +1,134 @@
+"""
+识别条件的开销模型
+按调用位置(条件名称)记录每次判断的耗时和是否满足，估计每个条件的期望耗时c和满足概率p。
+条件组按期望开销排序: 所有条件都要满足时按 c/(1-p) 从小到大，任一条件满足时按 c/p 从小到大，
+即先判断便宜且最可能让结果确定的条件。统计可保存为JSON，下次运行时加载。
+"""
+import json
+import os
+import time
+
+
+class SiteStats:
+    """一个调用位置的统计"""
+
+    def __init__(self, calls=0, hits=0, time=0.0):
+        self.calls = calls
+        self.hits = hits
+        self.time = time
+
+    def to_dict(self):
+        return {'calls': self.calls, 'hits': self.hits, 'time': self.time}
+
+
+class CostModel:
+    """开销模型"""
+
+    def __init__(self, path=None, window=1000, prior=1.0):
+        """
+        Args:
+            path: 统计的JSON文件，存在时加载，save时写入；为None时不保存
+            window: 每个位置的判断次数超过window时统计减半，使估计跟上画面内容的变化
+            prior: 先验的权重，没有统计时使用条件的静态开销和0.5的满足概率
+        """
+        self.path = path
+        self.window = window
+        self.prior = prior
+        self.sites = {}
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def record(self, site, elapsed, hit):
+        """记录一次判断
+        Args:
+            site: 调用位置
+            elapsed: 耗时(秒)
+            hit: 是否满足
+        """
+        stats = self.sites.get(site)
+        if stats is None:
+            stats = self.sites[site] = SiteStats()
+        stats.calls += 1
+        stats.hits += 1 if hit else 0
+        stats.time += elapsed
+        if stats.calls > self.window:
+            stats.calls /= 2
+            stats.hits /= 2
+            stats.time /= 2
+
+    def measure(self, site, func, hit=bool):
+        """调用func()并记录耗时，hit(结果)为是否满足，返回func的结果"""
+        start = time.perf_counter()
+        result = func()
+        self.record(site, time.perf_counter() - start, hit(result))
+        return result
+
+    def estimate(self, site, cost):
+        """估计期望耗时和满足概率
+        Args:
+            site: 调用位置
+            cost: 静态开销(毫秒)，作为先验
+        Returns:
+            (期望耗时(毫秒), 满足概率)
+        """
+        stats = self.sites.get(site)
+        if stats is None:
+            return cost, 0.5
+        k = self.prior
+        c = (stats.time * 1000 + cost * k) / (stats.calls + k)
+        p = (stats.hits + 0.5 * k) / (stats.calls + k)
+        return c, p
+
+    def stats(self):
+        """每个调用位置的判断次数、满足率和平均耗时(毫秒)"""
+        return {site: {'calls': s.calls, 'hit_rate': s.hits / s.calls if s.calls else 0.0,
+                       'mean_ms': s.time / s.calls * 1000 if s.calls else 0.0}
+                for site, s in self.sites.items()}
+
+    def load(self, path=None):
+        """加载统计，与已有统计合并"""
+        with open(path or self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for site, item in data.get('sites', {}).items():
+            stats = self.sites.get(site)
+            if stats is None:
+                stats = self.sites[site] = SiteStats()
+            stats.calls += item.get('calls', 0)
+            stats.hits += item.get('hits', 0)
+            stats.time += item.get('time', 0.0)
+
+    def save(self, path=None):
+        """保存统计"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("没有指定保存路径")
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'sites': {site: s.to_dict() for site, s in self.sites.items()}},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+
+def order_all(items):
+    """所有条件都要满足时的判断顺序
+    Args:
+        items: [(条件, 期望耗时, 满足概率), ...]
+    Returns:
+        (排序后的条件列表, 组的期望耗时, 组的满足概率)
+    """
+    items = sorted(items, key=lambda item: item[1] / max(1.0 - item[2], 1e-6))
+    cost, reach = 0.0, 1.0
+    for _, c, p in items:
+        cost += reach * c
+        reach *= p
+    return [item[0] for item in items], cost, reach
+
+
+def order_any(items):
+    """任一条件满足时的判断顺序，参数与返回值同order_all"""
+    items = sorted(items, key=lambda item: item[1] / max(item[2], 1e-6))
+    cost, reach = 0.0, 1.0
+    for _, c, p in items:
+        cost += reach * c
+        reach *= 1.0 - p
+    return [item[0] for item in items], cost, 1.0 - reach
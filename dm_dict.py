@@ -0,0 +1,301 @@
+"""
+dm字库解析与本地文字识别
+字库每行为 "点阵$字符$0.0.点数$高度"，点阵是按列存储的十六进制位串，每列11位(高度超过11时为高度位)。
+字形裁剪为最小外框后按 (宽, 高) 分桶，用积分图按点数筛选候选位置，完全相同的点阵用哈希直接查到，
+相似度小于1时只和同尺寸、点数相近的字形比较。
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import dm_color
+
+
+class Glyph:
+    """字库中的一个字形"""
+
+    def __init__(self, char, bits, top=0):
+        """
+        Args:
+            char: 字符(也可以是多个字符组成的词)
+            bits: (高, 宽) 的bool数组，已裁剪为最小外框
+            top: 外框上边在原字形中的行号
+        """
+        self.char = char
+        self.bits = bits
+        self.top = top
+        self.count = int(bits.sum())
+
+    @property
+    def width(self):
+        return self.bits.shape[1]
+
+    @property
+    def height(self):
+        return self.bits.shape[0]
+
+    def __repr__(self):
+        return f"Glyph({self.char!r}, {self.width}x{self.height}, {self.count})"
+
+
+def decode_glyph(data, height):
+    """解析点阵
+    Args:
+        data: 十六进制点阵
+        height: 字形高度
+    Returns:
+        (裁剪后的bool数组, 上边行号)，没有点时返回 (None, 0)
+    """
+    stride = max(11, height)
+    nbits = len(data) * 4
+    width = nbits // stride
+    bits = np.unpackbits(np.frombuffer(bytes.fromhex(data.zfill(len(data) + len(data) % 2)), dtype=np.uint8))
+    bits = bits[len(bits) - nbits:][:width * stride].astype(bool)
+    # 按列存储，转置为 (行, 列)
+    bits = bits.reshape(width, stride).T[:height]
+    rows = np.flatnonzero(bits.any(axis=1))
+    cols = np.flatnonzero(bits.any(axis=0))
+    if not len(rows):
+        return None, 0
+    return np.ascontiguousarray(bits[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]), int(rows[0])
+
+
+def encode_glyph(bits, char):
+    """把bool点阵编码为字库的一行，可用于AddDict
+    Args:
+        bits: (高, 宽) 的bool数组，高度不超过11时按11位一列存储
+        char: 字符
+    """
+    bits = np.asarray(bits, dtype=bool)
+    height, width = bits.shape
+    stride = max(11, height)
+    columns = np.zeros((width, stride), dtype=bool)
+    columns[:, :height] = bits.T
+    flat = columns.ravel()
+    pad = -len(flat) % 4
+    value = int(''.join('1' if b else '0' for b in flat) + '0' * pad, 2)
+    return '%0*X$%s$0.0.%d$%d' % ((len(flat) + pad) // 4, value, char, int(bits.sum()), height)
+
+
+def parse_dict_line(line):
+    """解析字库的一行，返回Glyph，空行或无法解析时返回None"""
+    parts = line.strip().split('$')
+    if len(parts) < 4 or not parts[0]:
+        return None
+    try:
+        bits, top = decode_glyph(parts[0], int(parts[-1]))
+    except ValueError:
+        return None
+    if bits is None:
+        return None
+    return Glyph(parts[1], bits, top)
+
+
+def read_dict_lines(path):
+    """读取字库文件的所有行，字库一般为GBK编码"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            return data.decode(encoding).splitlines()
+        except UnicodeDecodeError:
+            continue
+    return data.decode('gbk', errors='replace').splitlines()
+
+
+class Bucket:
+    """同一尺寸的字形"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.glyphs = []
+        self.exact = {}
+        self._matrix = None
+        self._counts = None
+
+    def add(self, glyph):
+        self.glyphs.append(glyph)
+        self.exact.setdefault(np.packbits(glyph.bits).tobytes(), glyph)
+        self._matrix = None
+
+    @property
+    def counts(self):
+        """每个字形的点数"""
+        if self._matrix is None:
+            self._build()
+        return self._counts
+
+    @property
+    def matrix(self):
+        """(字形数, 宽*高) 的float32矩阵，用于批量计算不同点数"""
+        if self._matrix is None:
+            self._build()
+        return self._matrix
+
+    def _build(self):
+        self._matrix = np.array([g.bits.ravel() for g in self.glyphs], dtype=np.float32)
+        self._counts = np.array([g.count for g in self.glyphs])
+
+
+class GlyphIndex:
+    """字形索引，按 (宽, 高) 分桶"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+
+    def add(self, glyph):
+        key = (glyph.width, glyph.height)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = Bucket(*key)
+        bucket.add(glyph)
+        self.count += 1
+
+    def add_line(self, line):
+        """添加一行字库数据(同AddDict)"""
+        glyph = parse_dict_line(line)
+        if glyph is not None:
+            self.add(glyph)
+        return glyph
+
+    def load(self, path):
+        """加载字库文件，返回加载的字形数"""
+        before = self.count
+        for line in read_dict_lines(path):
+            self.add_line(line)
+        return self.count - before
+
+    def __len__(self):
+        return self.count
+
+    def match(self, binary, sim=1.0):
+        """在二值图像中查找所有字形
+        Args:
+            binary: (h, w) 的bool数组
+            sim: 相似度
+        Returns:
+            [(x, y, glyph), ...]，y为字形原点(含上边空行)的行号，重叠的结果只保留点数多的
+        """
+        h, w = binary.shape
+        # 积分图，用于快速计算每个窗口的点数
+        integral = np.zeros((h + 1, w + 1), dtype=np.int32)
+        integral[1:, 1:] = binary.cumsum(0).cumsum(1)
+        found = []
+        for (gw, gh), bucket in self.buckets.items():
+            if gw > w or gh > h:
+                continue
+            sums = (integral[gh:, gw:] - integral[:-gh, gw:] - integral[gh:, :-gw] + integral[:-gh, :-gw])
+            counts = bucket.counts
+            slack = int((1.0 - sim) * counts.max() + 1e-9)
+            lo, hi = counts.min() - slack, counts.max() + slack
+            ys, xs = np.nonzero((sums >= max(lo, 1)) & (sums <= hi))
+            if not len(ys):
+                continue
+            windows = sliding_window_view(binary, (gh, gw))[ys, xs].reshape(len(ys), -1)
+            keys = np.packbits(windows, axis=1)
+            missing = []
+            for i, key in enumerate(keys):
+                glyph = bucket.exact.get(key.tobytes())
+                if glyph is not None:
+                    found.append((int(xs[i]), int(ys[i]), glyph, 0))
+                elif sim < 1.0:
+                    missing.append(i)
+            if missing:
+                found.extend(self._approximate(bucket, windows[missing], xs[missing], ys[missing], sim))
+        return _resolve(found)
+
+    @staticmethod
+    def _approximate(bucket, windows, xs, ys, sim):
+        """相似度匹配: 不同点数 = 窗口点数 + 字形点数 - 2 * 共同点数"""
+        win = windows.astype(np.float32)
+        diff = win.sum(1)[:, None] + bucket.counts[None, :] - 2 * (win @ bucket.matrix.T)
+        allowed = np.floor((1.0 - sim) * bucket.counts + 1e-9)
+        diff[diff > allowed[None, :]] = np.inf
+        best = diff.argmin(axis=1)
+        result = []
+        for i, j in enumerate(best):
+            if np.isfinite(diff[i, j]):
+                result.append((int(xs[i]), int(ys[i]), bucket.glyphs[j], float(diff[i, j])))
+        return result
+
+
+def _resolve(found):
+    """去掉重叠的结果，点数多、差异小的优先"""
+    found.sort(key=lambda item: (-item[2].count, item[3]))
+    taken = []
+    result = []
+    for x, y, glyph, _ in found:
+        box = (x, y, x + glyph.width, y + glyph.height)
+        if any(box[0] < t[2] and t[0] < box[2] and box[1] < t[3] and t[1] < box[3] for t in taken):
+            continue
+        taken.append(box)
+        result.append((x, y - glyph.top, glyph))
+    return result
+
+
+def _lines(matches, line_height=11):
+    """按行分组，每行按x排序"""
+    lines = []
+    for item in sorted(matches, key=lambda m: (m[1], m[0])):
+        if lines and abs(item[1] - lines[-1][0][1]) <= line_height // 2:
+            lines[-1].append(item)
+        else:
+            lines.append([item])
+    return [sorted(line, key=lambda m: m[0]) for line in lines]
+
+
+def ocr_text(matches):
+    """把匹配结果按从上到下、从左到右组成字符串，同Ocr"""
+    return ''.join(glyph.char for line in _lines(matches) for _, _, glyph in line)
+
+
+def _line_texts(matches):
+    """每行的字符串及每个字符的位置"""
+    texts = []
+    for line in _lines(matches):
+        chars, points = [], []
+        for x, y, glyph in line:
+            for ch in glyph.char:
+                chars.append(ch)
+                points.append((x, y))
+        texts.append((''.join(chars), points))
+    return texts
+
+
+def find_str(matches, str_text):
+    """在匹配结果中查找字符串
+    Args:
+        str_text: "a|b|c"
+    Returns:
+        (序号, x, y)，未找到时为 (-1, -1, -1)
+    """
+    texts = _line_texts(matches)
+    for index, target in enumerate(str_text.split('|')):
+        if not target:
+            continue
+        for text, points in texts:
+            pos = text.find(target)
+            if pos >= 0:
+                return index, points[pos][0], points[pos][1]
+    return -1, -1, -1
+
+
+def find_str_ex(matches, str_text):
+    """查找所有字符串，返回 "id,x,y|..."，同FindStrEx"""
+    texts = _line_texts(matches)
+    parts = []
+    for index, target in enumerate(str_text.split('|')):
+        if not target:
+            continue
+        for text, points in texts:
+            pos = text.find(target)
+            while pos >= 0:
+                parts.append(f'{index},{points[pos][0]},{points[pos][1]}')
+                pos = text.find(target, pos + len(target))
+    return '|'.join(parts)
+
+
+def binarize(pixels, color, sim=1.0):
+    """按文字颜色把BGRA图像转为二值图像"""
+    return dm_color.color_mask(pixels, color, sim)
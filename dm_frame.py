@@ -0,0 +1,247 @@
+"""
+截图帧
+Frame保存一块屏幕区域的BGRA像素及其在屏幕上的位置，在内存中回答颜色查询，
+坐标均为屏幕坐标，区域不含x2, y2。
+"""
+import colorsys
+import ctypes
+import time
+
+try:
+    import dm_color
+except ImportError:  # 没有numpy时只能使用ScreenData的地址和memoryview，Frame和array需要numpy
+    dm_color = None
+
+
+class Frame:
+    """一帧屏幕区域图像"""
+
+    def __init__(self, pixels, x=0, y=0, timestamp=None):
+        """
+        Args:
+            pixels: (h, w, 4) 的BGRA uint8数组
+            x, y: 区域左上角的屏幕坐标
+            timestamp: 截图时间(time.perf_counter)，为None时取当前时间
+        """
+        self.pixels = pixels
+        self.x = x
+        self.y = y
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+        # 由像素计算出的数据(如找图用的颜色平面)，同一帧内复用
+        self.cache = {}
+
+    @property
+    def width(self):
+        return self.pixels.shape[1]
+
+    @property
+    def height(self):
+        return self.pixels.shape[0]
+
+    def covers(self, x1, y1, x2, y2):
+        """区域是否完全位于帧内"""
+        return (self.x <= x1 and self.y <= y1
+                and x2 <= self.x + self.width and y2 <= self.y + self.height)
+
+    def region(self, x1, y1, x2, y2):
+        """取得区域像素，坐标裁剪到帧范围内
+        Returns:
+            (像素数组, 区域左上角x, 区域左上角y)
+        """
+        x1 = max(self.x, int(x1))
+        y1 = max(self.y, int(y1))
+        x2 = max(x1, min(self.x + self.width, int(x2)))
+        y2 = max(y1, min(self.y + self.height, int(y2)))
+        return self.pixels[y1 - self.y:y2 - self.y, x1 - self.x:x2 - self.x], x1, y1
+
+    def pixel(self, x, y):
+        """取得单个像素(BGRA)"""
+        return self.pixels[y - self.y, x - self.x]
+
+    def get_color(self, x, y):
+        """获取颜色，格式同GetColor"""
+        return dm_color.pixel_hex(self.pixel(x, y))
+
+    def get_color_bgr(self, x, y):
+        """获取颜色，格式同GetColorBGR"""
+        b, g, r = self.pixel(x, y)[:3]
+        return '%02x%02x%02x' % (b, g, r)
+
+    def get_color_hsv(self, x, y):
+        """获取HSV颜色，格式为 "H.S.V"，H为0-359，S和V为0-255"""
+        b, g, r = self.pixel(x, y)[:3]
+        h, s, v = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
+        return '%d.%d.%d' % (int(round(h * 360)) % 360, int(round(s * 255)), int(round(v * 255)))
+
+    def get_ave_rgb(self, x1, y1, x2, y2):
+        """区域平均颜色，格式同GetAveRGB"""
+        pixels = self.region(x1, y1, x2, y2)[0]
+        if not pixels.size:
+            return '000000'
+        b, g, r = pixels[..., :3].reshape(-1, 3).mean(axis=0).astype(int)
+        return '%02x%02x%02x' % (r, g, b)
+
+    def cmp_color(self, x, y, color, sim):
+        """比较颜色，0表示匹配，1表示不匹配，同CmpColor"""
+        return 0 if dm_color.color_mask(self.pixel(x, y), color, sim) else 1
+
+    def cmp_colors(self, points, sim=1.0):
+        """批量比较多个点的颜色
+        Args:
+            points: [(x, y, color), ...]，屏幕坐标
+        Returns:
+            每个点是否匹配的bool数组
+        """
+        local = [(x - self.x, y - self.y, color) for x, y, color in points]
+        return dm_color.cmp_colors(self.pixels, local, sim)
+
+    def find_color(self, x1, y1, x2, y2, color, sim, dir=0):
+        """查找颜色，返回 (result, x, y)，同FindColor"""
+        pixels, ox, oy = self.region(x1, y1, x2, y2)
+        result, x, y = dm_color.find_color(pixels, color, sim, dir)
+        return (1, x + ox, y + oy) if result else (0, -1, -1)
+
+    def find_color_ex(self, x1, y1, x2, y2, color, sim, dir=0):
+        """查找所有颜色点，返回 "x,y|x,y" 字符串，同FindColorEx"""
+        pixels, ox, oy = self.region(x1, y1, x2, y2)
+        ys, xs = dm_color.find_color_ex(pixels, color, sim, dir)
+        return dm_color.format_points(ys, xs, ox, oy)
+
+    def find_multi_color(self, x1, y1, x2, y2, first_color, offset_color, sim, dir=0):
+        """查找多点颜色，返回 (result, x, y)，同FindMultiColor"""
+        pixels, ox, oy = self.region(x1, y1, x2, y2)
+        result, x, y = dm_color.find_multi_color(pixels, first_color, offset_color, sim, dir)
+        return (1, x + ox, y + oy) if result else (0, -1, -1)
+
+    def find_multi_color_ex(self, x1, y1, x2, y2, first_color, offset_color, sim, dir=0):
+        """查找所有多点颜色，返回 "x,y|x,y" 字符串，同FindMultiColorEx"""
+        pixels, ox, oy = self.region(x1, y1, x2, y2)
+        ys, xs = dm_color.find_multi_color_ex(pixels, first_color, offset_color, sim, dir)
+        return dm_color.format_points(ys, xs, ox, oy)
+
+    def find_mul_color(self, x1, y1, x2, y2, color, sim):
+        """区域内是否包含所有颜色，同FindMulColor"""
+        return dm_color.find_mul_color(self.region(x1, y1, x2, y2)[0], color, sim)
+
+    def copy(self):
+        """复制像素数据，得到不依赖dm缓冲区的帧，可在其它线程中使用"""
+        return Frame(self.pixels.copy(), self.x, self.y, self.timestamp)
+
+
+def wrap_screen_data(addr, width, height):
+    """把GetScreenData返回的地址包装为 (h, w, 4) 的BGRA数组，不复制数据
+    数组只在FreeScreenData之前有效。
+    """
+    import numpy as np
+    buffer = (ctypes.c_ubyte * (width * height * 4)).from_address(addr)
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4)
+
+
+class ScreenData(int):
+    """GetScreenData返回的数据地址
+
+    仍然是int，可以直接传给FreeScreenData；同时记录区域大小，可以不复制地读取为
+    NumPy数组或memoryview。作为上下文管理器使用时退出即调用FreeScreenData:
+
+        with kp.GetScreenData(0, 0, 800, 600) as data:
+            pixels = data.array  # (600, 800, 4) BGRA，只在with内有效
+    """
+
+    def __new__(cls, handle, kp, x1, y1, x2, y2):
+        self = int.__new__(cls, handle or 0)
+        self.kp = kp
+        self.x = x1
+        self.y = y1
+        self.width = max(0, x2 - x1)
+        self.height = max(0, y2 - y1)
+        # dm的截图数据每个像素4字节，行之间没有填充
+        self.stride = self.width * 4
+        self.freed = False
+        self._array = None
+        return self
+
+    def _check(self):
+        if not self:
+            raise Exception(f"GetScreenData失败: {(self.x, self.y, self.x + self.width, self.y + self.height)}")
+        if self.freed:
+            raise ValueError("截图数据已释放")
+
+    @property
+    def array(self):
+        """(height, width, 4) 的BGRA数组，直接引用dm的缓冲区"""
+        if self._array is None:
+            self._check()
+            self._array = wrap_screen_data(int(self), self.width, self.height)
+        return self._array
+
+    def memoryview(self):
+        """按字节访问的memoryview，长度为 stride * height"""
+        self._check()
+        return memoryview((ctypes.c_ubyte * (self.stride * self.height)).from_address(int(self))).cast('B')
+
+    def frame(self):
+        """包装为Frame，坐标为屏幕坐标"""
+        return Frame(self.array, self.x, self.y)
+
+    def free(self):
+        """释放dm的截图数据，可以重复调用"""
+        if not self or self.freed:
+            return 0
+        self.freed = True
+        self._array = None
+        return self.kp.dm.FreeScreenData(int(self))
+
+    def __enter__(self):
+        self._check()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.free()
+
+
+class Snapshot:
+    """屏幕快照，截取一次后在内存中回答颜色查询
+
+    快照期间PyKeyPresser的GetColor/CmpColor等方法改为查询内存中的帧，
+    区域超出快照范围时仍调用dm。设置ttl后帧过期会在下一次查询时重新截取。
+    """
+
+    def __init__(self, kp, x1, y1, x2, y2, ttl=None):
+        self.kp = kp
+        self.rect = (x1, y1, x2, y2)
+        self.ttl = ttl
+        self.captures = 0
+        self._frame = None
+        self._data = None
+
+    def grab(self):
+        """重新截取，释放上一次的数据"""
+        self.release()
+        data = self.kp.GetScreenData(*self.rect)
+        data._check()
+        self._data = data
+        self._frame = data.frame()
+        self.captures += 1
+        return self._frame
+
+    @property
+    def frame(self):
+        """当前帧，过期时重新截取"""
+        if self._frame is None or (self.ttl is not None
+                                   and time.perf_counter() - self._frame.timestamp > self.ttl):
+            return self.grab()
+        return self._frame
+
+    def release(self):
+        """释放截图数据"""
+        if self._data is not None:
+            self._data.free()
+        self._data = None
+        self._frame = None
+
+    def lookup(self, x1, y1, x2, y2):
+        """区域在快照范围内时返回帧，否则返回None"""
+        rx1, ry1, rx2, ry2 = self.rect
+        if rx1 <= x1 and ry1 <= y1 and x2 <= rx2 and y2 <= ry2:
+            return self.frame
+        return None
@@ -0,0 +1,82 @@
+"""
+BMP图片读写
+不依赖PIL，图像统一使用 (高, 宽, 4) 的BGRA uint8数组表示
+"""
+import struct
+
+import numpy as np
+
+
+def to_bgra(image):
+    """转换为连续的BGRA数组
+    Args:
+        image: (h, w, 3) 的RGB数组或 (h, w, 4) 的BGRA数组
+    Returns:
+        (h, w, 4) 的BGRA uint8数组
+    """
+    image = np.asarray(image, dtype=np.uint8)
+    if image.ndim != 3 or image.shape[2] not in (3, 4):
+        raise ValueError(f"不支持的图像形状: {image.shape}")
+    if image.shape[2] == 4:
+        return np.ascontiguousarray(image)
+    bgra = np.zeros(image.shape[:2] + (4,), dtype=np.uint8)
+    bgra[..., 0] = image[..., 2]
+    bgra[..., 1] = image[..., 1]
+    bgra[..., 2] = image[..., 0]
+    return bgra
+
+
+def decode_bmp(data):
+    """解析BMP数据
+    Args:
+        data: BMP文件内容
+    Returns:
+        (h, w, 4) 的BGRA uint8数组
+    """
+    if data[:2] != b'BM':
+        raise ValueError("不是BMP数据")
+    offset = struct.unpack_from('<I', data, 10)[0]
+    width, height, planes, bpp, compression = struct.unpack_from('<iiHHI', data, 18)
+    if bpp not in (24, 32) or compression not in (0, 3):
+        raise ValueError(f"不支持的BMP格式: {bpp}位, 压缩方式{compression}")
+    top_down = height < 0
+    height = abs(height)
+    channels = bpp // 8
+    stride = (width * channels + 3) & ~3
+    rows = np.frombuffer(data, dtype=np.uint8, count=stride * height, offset=offset)
+    rows = rows.reshape(height, stride)[:, :width * channels].reshape(height, width, channels)
+    if not top_down:
+        rows = rows[::-1]
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+    image[..., :3] = rows[..., :3]
+    return image
+
+
+def read_bmp(path):
+    """读取BMP文件"""
+    with open(path, 'rb') as f:
+        return decode_bmp(f.read())
+
+
+def encode_bmp(image):
+    """编码为24位BMP数据
+    Args:
+        image: (h, w, 3) 的RGB数组或 (h, w, 4) 的BGRA数组
+    Returns:
+        BMP文件内容
+    """
+    image = to_bgra(image)
+    height, width = image.shape[:2]
+    stride = (width * 3 + 3) & ~3
+    pixels = np.zeros((height, stride), dtype=np.uint8)
+    pixels[:, :width * 3] = image[::-1, :, :3].reshape(height, width * 3)
+    size = 54 + pixels.nbytes
+    header = struct.pack('<2sIHHI', b'BM', size, 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, pixels.nbytes, 0, 0, 0, 0)
+    return header + info + pixels.tobytes()
+
+
+def write_bmp(path, image):
+    """保存为24位BMP文件"""
+    with open(path, 'wb') as f:
+        f.write(encode_bmp(image))
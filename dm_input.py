@@ -0,0 +1,201 @@
+"""
+输入调度
+在后台线程中按目标时间依次发送KeyDown/KeyPress/KeyUp等输入，调用方不必sleep等待。
+使用time.perf_counter计时，到点前先等待再短暂自旋，并记录每个事件的实际偏差。
+dm对象不能跨线程使用，调度线程通过factory在线程内创建自己的dm对象发送输入；
+只有后端声明thread_safe(如ImageBackend)时才可以省略factory，直接使用调用方的对象。
+"""
+import heapq
+import itertools
+import threading
+import time
+
+
+class InputJob:
+    """一组已调度的输入事件"""
+
+    def __init__(self, scheduler, release=()):
+        """
+        Args:
+            scheduler: 所属的InputScheduler
+            release: 已开始执行但被取消时需要立即执行的事件，如释放已按下的修饰键
+        """
+        self.scheduler = scheduler
+        self.release = list(release)
+        self.remaining = 0
+        self.started = False
+        self.cancelled = False
+        self.jitter = []
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """等待全部事件执行完毕或被取消，返回是否已结束"""
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        """取消尚未执行的事件，已开始时立即执行release中的事件"""
+        self.scheduler._cancel(self)
+
+
+class InputScheduler:
+    """输入调度器，第一次调度时启动后台线程"""
+
+    def __init__(self, kp, spin=0.002, factory=None):
+        """
+        Args:
+            kp: 调用方的PyKeyPresser对象
+            spin: 到点前自旋等待的时间(秒)，越大越准确但占用CPU越多
+            factory: 在调度线程中调用，返回发送输入的对象(如 lambda: PyKeyPresser(dll_path))，
+                事件通过它的同名方法发送；为None时使用kp，要求kp的后端thread_safe
+        """
+        self.kp = kp
+        self.spin = spin
+        self.factory = factory
+        self.target = None
+        self.error = None
+        self.executed = 0
+        self.max_jitter = 0.0
+        self.total_jitter = 0.0
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def schedule(self, events, release=()):
+        """调度一组事件
+        Args:
+            events: [(相对现在的延迟秒数, 方法名, 参数元组), ...]
+            release: 取消时需要执行的 [(方法名, 参数元组), ...]
+        Returns:
+            InputJob
+        """
+        if self.factory is None and not getattr(self.kp.dm, 'thread_safe', False):
+            raise Exception("dm对象不能跨线程使用，请用kp.EnableInputScheduler(factory)提供在调度线程中创建的对象")
+        job = InputJob(self, release)
+        now = time.perf_counter()
+        with self._cond:
+            if self.error is not None:
+                raise self.error
+            if self._stopped:
+                raise Exception("输入调度器已停止")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="InputScheduler", daemon=True)
+                self._thread.start()
+            job.remaining = len(events)
+            for delay, name, args in events:
+                heapq.heappush(self._queue, (now + delay, next(self._seq), job, name, args))
+            self._cond.notify()
+        if not events:
+            job._done.set()
+        return job
+
+    def combo(self, modifier_key, key_code, delay=0.1):
+        """调度组合键: 按下修饰键，delay后按键，再delay后释放修饰键"""
+        return self.schedule([(0, 'KeyDown', (modifier_key,)),
+                              (delay, 'KeyPress', (key_code,)),
+                              (2 * delay, 'KeyUp', (modifier_key,))],
+                             release=[('KeyUp', (modifier_key,))])
+
+    def stats(self):
+        """计时偏差统计(秒)"""
+        return {
+            'executed': self.executed,
+            'mean_jitter': self.total_jitter / self.executed if self.executed else 0.0,
+            'max_jitter': self.max_jitter,
+        }
+
+    def stop(self):
+        """停止后台线程，未执行的事件被丢弃，所有未结束的任务被取消
+        已开始的任务先执行release中的事件(如释放已按下的修饰键)，等待任务的调用方随即返回
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _cancel(self, job):
+        """标记取消，并放入一个立即执行的结束事件"""
+        with self._cond:
+            if job.cancelled or job.done:
+                return
+            job.cancelled = True
+            heapq.heappush(self._queue, (time.perf_counter(), next(self._seq), job, None, None))
+            self._cond.notify()
+
+    def _finish(self, job):
+        """结束一个任务，被取消且已开始时执行释放事件"""
+        if job.cancelled and job.started:
+            for name, args in job.release:
+                try:
+                    getattr(self.target, name)(*args)
+                except Exception as e:
+                    job.error = e
+        job._done.set()
+
+    def _run(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        try:
+            self.target = self.kp if self.factory is None else self.factory()
+        except Exception as e:
+            # 无法创建发送输入的对象，所有任务以该错误结束
+            with self._cond:
+                self.error = e
+                self._stopped = True
+                jobs = [item[2] for item in self._queue]
+                self._queue.clear()
+            for job in jobs:
+                job.error = e
+                job._done.set()
+            return
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._queue:
+                        self._cond.wait()
+                        continue
+                    wait = self._queue[0][0] - time.perf_counter() - self.spin
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopped:
+                    jobs = list({id(item[2]): item[2] for item in self._queue}.values())
+                    self._queue.clear()
+                    break
+                target, _, job, name, args = heapq.heappop(self._queue)
+            if job.done:
+                continue
+            if job.cancelled:
+                self._finish(job)
+                continue
+            while time.perf_counter() < target:
+                pass
+            jitter = time.perf_counter() - target
+            try:
+                getattr(self.target, name)(*args)
+            except Exception as e:
+                job.error = e
+                job.cancelled = True
+            job.started = True
+            job.jitter.append(jitter)
+            self.executed += 1
+            self.total_jitter += jitter
+            self.max_jitter = max(self.max_jitter, jitter)
+            job.remaining -= 1
+            if job.remaining == 0 or job.cancelled:
+                self._finish(job)
+        # 停止时在本线程中取消剩余的任务，释放事件要用本线程的对象发送
+        for job in jobs:
+            if not job.done:
+                job.cancelled = True
+                self._finish(job)
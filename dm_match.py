@@ -0,0 +1,320 @@
+"""
+本地找图
+在截取的帧上按dm的FindPic规则匹配模板:
+    - delta_color 为每个通道允许的偏差，如 "101010"
+    - sim 为模板中需要匹配的像素比例
+    - 模板四个角颜色相同时该颜色视为透明色，不参与比较
+匹配时逐个比较模板像素并排除不匹配的位置，候选位置变少后改为只比较剩余位置。
+多张图片共用同一份帧数据；可选先在缩小的图像上粗筛。
+可选优先在上次找到的位置附近查找(roi_margin)，这是对FindPic语义的放宽: 在那里找到时直接返回，
+不再按dir顺序比较整个区域中的其它位置，默认关闭。
+"""
+import os
+
+import numpy as np
+
+import dm_color
+import dm_image
+
+
+def parse_delta(delta_color):
+    """解析偏色 "rrggbb"，返回BGR顺序的int数组"""
+    delta_color = (delta_color or '000000').strip()
+    r, g, b = int(delta_color[0:2], 16), int(delta_color[2:4], 16), int(delta_color[4:6], 16)
+    return np.array([b, g, r], dtype=np.int32)
+
+
+def _downsample(pixels, opaque):
+    """按2x2块取平均缩小，只有块内像素全部不透明时结果才不透明"""
+    h, w = pixels.shape[0] // 2 * 2, pixels.shape[1] // 2 * 2
+    blocks = pixels[:h, :w, :3].astype(np.uint16).reshape(h // 2, 2, w // 2, 2, 3)
+    small = np.zeros((h // 2, w // 2, 4), dtype=np.uint8)
+    small[..., :3] = (blocks.sum(axis=(1, 3)) // 4).astype(np.uint8)
+    if opaque is None:
+        return small, None
+    return small, opaque[:h, :w].reshape(h // 2, 2, w // 2, 2).all(axis=(1, 3))
+
+
+class Template:
+    """找图模板"""
+
+    def __init__(self, name, pixels, opaque=None):
+        """
+        Args:
+            name: 图片名
+            pixels: (h, w, 3) 的RGB数组或 (h, w, 4) 的BGRA数组
+            opaque: 参与比较的像素掩码，为None时按四角颜色判断透明色
+        """
+        self.name = name
+        self.pixels = dm_image.to_bgra(pixels)
+        h, w = self.pixels.shape[:2]
+        bgr = self.pixels[..., :3]
+        if opaque is None:
+            opaque = np.ones((h, w), dtype=bool)
+            corners = bgr[[0, 0, -1, -1], [0, -1, 0, -1]]
+            if h > 1 and w > 1 and (corners == corners[0]).all():
+                opaque = (bgr != corners[0]).any(axis=2)
+        self.opaque = opaque
+        ys, xs = np.nonzero(opaque)
+        colors = bgr[ys, xs].astype(np.int32)
+        # 与平均色相差大的像素先比较，更快排除候选位置
+        if len(colors):
+            order = np.argsort(-np.abs(colors - colors.mean(axis=0)).sum(axis=1), kind='stable')
+            ys, xs, colors = ys[order], xs[order], colors[order]
+        self.ys, self.xs, self.colors = ys, xs, colors
+        self._coarse = None
+
+    @property
+    def width(self):
+        return self.pixels.shape[1]
+
+    @property
+    def height(self):
+        return self.pixels.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.pixels.nbytes
+
+    def coarse(self):
+        """缩小一半的模板"""
+        if self._coarse is None:
+            small, opaque = _downsample(self.pixels, self.opaque)
+            self._coarse = Template(self.name, small, opaque)
+        return self._coarse
+
+
+def to_planes(pixels):
+    """把BGRA像素拆分为连续的B、G、R三个uint8平面，第四个平面为打包的0x00RRGGBB颜色，
+    偏色为0时只需比较一次打包颜色"""
+    planes = [np.ascontiguousarray(pixels[..., c]) for c in range(3)]
+    packed = planes[0].astype(np.uint32)
+    packed |= planes[1].astype(np.uint32) << 8
+    packed |= planes[2].astype(np.uint32) << 16
+    return tuple(planes) + (packed,)
+
+
+def _pack(colors):
+    """BGR颜色打包为0x00RRGGBB"""
+    colors = colors.astype(np.uint32)
+    return colors[:, 0] | (colors[:, 1] << 8) | (colors[:, 2] << 16)
+
+
+def _bounds(tpl, delta):
+    """每个模板像素每个通道允许的上下限，偏色为0时返回打包颜色和None"""
+    colors = tpl.colors
+    if not delta.any():
+        return _pack(colors), None
+    return np.clip(colors - delta, 0, 255), np.clip(colors + delta, 0, 255)
+
+
+def _mismatch(planes, lo, hi, i, py, px):
+    """比较第i个(或切片i中的)模板像素，py和px为切片或下标数组，返回不匹配的掩码"""
+    if hi is None:
+        return planes[3][py, px] != lo[i]
+    bad = None
+    for c in range(3):
+        value = planes[c][py, px]
+        m = (value < lo[i, c]) | (value > hi[i, c])
+        bad = m if bad is None else bad | m
+    return bad
+
+
+def _prune(planes, tpl, lo, hi, allowed, cy, cx, misses, start):
+    """只在候选位置上继续比较模板像素，返回剩余的候选位置
+    每次比较一批像素，候选位置越少每批的像素越多
+    """
+    n = len(tpl.xs)
+    i = start
+    while i < n and len(cy):
+        step = max(1, min(n - i, 65536 // len(cy)))
+        index = slice(i, i + step)
+        py = cy[:, None] + tpl.ys[index]
+        px = cx[:, None] + tpl.xs[index]
+        misses = misses + _mismatch(planes, lo, hi, index, py, px).sum(axis=1)
+        keep = misses <= allowed
+        if not keep.all():
+            cy, cx, misses = cy[keep], cx[keep], misses[keep]
+        i += step
+    return cy, cx
+
+
+def match(planes, tpl, delta, sim):
+    """在整幅图像上匹配模板
+    Args:
+        planes: to_planes的结果
+        tpl: Template
+        delta: parse_delta的结果
+        sim: 相似度
+    Returns:
+        匹配位置左上角 (ys, xs)
+    """
+    H, W = planes[0].shape
+    hp, wp = H - tpl.height + 1, W - tpl.width + 1
+    empty = np.zeros(0, dtype=np.intp)
+    if hp <= 0 or wp <= 0:
+        return empty, empty
+    n = len(tpl.xs)
+    lo, hi = _bounds(tpl, delta)
+    allowed = int((1.0 - float(sim)) * n + 1e-9)
+    if n and not allowed:
+        # 不允许不匹配时第一个像素即可确定候选位置
+        y, x = tpl.ys[0], tpl.xs[0]
+        cy, cx = np.nonzero(~_mismatch(planes, lo, hi, 0, slice(y, y + hp), slice(x, x + wp)))
+        return _prune(planes, tpl, lo, hi, 0, cy, cx, np.zeros(len(cy), dtype=np.int32), 1)
+    misses = np.zeros((hp, wp), dtype=np.int32)
+    for i in range(n):
+        y, x = tpl.ys[i], tpl.xs[i]
+        misses += _mismatch(planes, lo, hi, i, slice(y, y + hp), slice(x, x + wp))
+        if i >= allowed:
+            alive = misses <= allowed
+            count = int(np.count_nonzero(alive))
+            if not count:
+                return empty, empty
+            # 候选位置足够少时改为逐个位置比较
+            if count * 16 < hp * wp:
+                cy, cx = np.nonzero(alive)
+                return _prune(planes, tpl, lo, hi, allowed, cy, cx, misses[cy, cx], i + 1)
+    return np.nonzero(misses <= allowed)
+
+
+def verify(planes, tpl, delta, sim, cy, cx):
+    """只在给定的左上角位置上匹配模板"""
+    H, W = planes[0].shape
+    inside = (cy >= 0) & (cx >= 0) & (cy + tpl.height <= H) & (cx + tpl.width <= W)
+    cy, cx = cy[inside], cx[inside]
+    lo, hi = _bounds(tpl, delta)
+    allowed = int((1.0 - float(sim)) * len(tpl.xs) + 1e-9)
+    return _prune(planes, tpl, lo, hi, allowed, cy, cx, np.zeros(len(cy), dtype=np.int32), 0)
+
+
+def frame_planes(frame, x1, y1, x2, y2):
+    """取得帧中区域的颜色平面，整帧的平面缓存在frame.cache中
+    Returns:
+        (planes, 区域左上角x, 区域左上角y)
+    """
+    planes = frame.cache.get('planes')
+    if planes is None:
+        planes = frame.cache['planes'] = to_planes(frame.pixels)
+    pixels, ox, oy = frame.region(x1, y1, x2, y2)
+    sy, sx = oy - frame.y, ox - frame.x
+    h, w = pixels.shape[:2]
+    return tuple(p[sy:sy + h, sx:sx + w] for p in planes), ox, oy
+
+
+class TemplateMatcher:
+    """本地找图引擎，缓存已加载的模板和每张图片上次找到的位置"""
+
+    def __init__(self, base_path="", levels=0, roi_margin=0, coarse_slack=24):
+        """
+        Args:
+            base_path: 相对路径图片的目录，对应dm的SetPath
+            levels: 粗筛的金字塔层数，0表示不粗筛；粗筛是近似的，噪声大的画面可能漏找
+            roi_margin: 优先查找上次位置时向外扩展的像素数，0表示不使用(与FindPic一致)；
+                大于0时在上次位置附近找到即返回，不保证是dir顺序的第一个
+            coarse_slack: 粗筛时额外放宽的偏色
+        """
+        self.base_path = base_path
+        self.levels = levels
+        self.roi_margin = roi_margin
+        self.coarse_slack = coarse_slack
+        self.templates = {}
+        self.last_hits = {}
+
+    def add(self, name, pixels):
+        """添加内存中的模板"""
+        tpl = Template(name, pixels)
+        self.templates[name] = tpl
+        return tpl
+
+    def get(self, name):
+        """取得模板，第一次使用时从文件加载"""
+        tpl = self.templates.get(name)
+        if tpl is None:
+            path = name if os.path.isabs(name) else os.path.join(self.base_path, name)
+            tpl = self.add(name, dm_image.read_bmp(path))
+        return tpl
+
+    def remove(self, name):
+        """移除模板"""
+        self.templates.pop(name, None)
+        self.last_hits.pop(name, None)
+
+    def _search(self, planes, tpl, delta, sim):
+        """在整幅图像上查找，层数大于0时先在缩小的图像上粗筛"""
+        if not self.levels or min(tpl.width, tpl.height) < 4 << self.levels:
+            return match(planes, tpl, delta, sim)
+        coarse, coarse_tpl = np.stack(planes[:3], axis=2), tpl
+        for _ in range(self.levels):
+            coarse = _downsample(coarse, None)[0]
+            coarse_tpl = coarse_tpl.coarse()
+        coarse_planes = to_planes(coarse)
+        # 缩小后一个不匹配的像素最多影响一个块，按块数放宽相似度
+        coarse_sim = max(0.0, 1.0 - (1.0 - float(sim)) * (4 ** self.levels))
+        cy, cx = match(coarse_planes, coarse_tpl, delta + self.coarse_slack, coarse_sim)
+        scale = 1 << self.levels
+        offsets = np.arange(-1, scale + 1)
+        cy = (cy[:, None, None] * scale + offsets[None, :, None]).repeat(len(offsets), axis=2).ravel()
+        cx = (cx[:, None, None] * scale + offsets[None, None, :]).repeat(len(offsets), axis=1).ravel()
+        if len(cy):
+            cy, cx = np.unique(np.stack([cy, cx]), axis=1)
+        return verify(planes, tpl, delta, sim, cy, cx)
+
+    def find_all(self, planes, name, delta, sim, origin=(0, 0), use_roi=True):
+        """查找一张图片
+        Args:
+            planes: to_planes的结果
+            origin: planes左上角的屏幕坐标，用于记录上次找到的位置
+            use_roi: 是否先在上次找到的位置附近查找，在那里找到时只返回附近的结果
+        Returns:
+            匹配位置左上角 (ys, xs)，为planes内的坐标
+        """
+        tpl = self.get(name)
+        ox, oy = origin
+        last = self.last_hits.get(name)
+        if last is not None and use_roi and self.roi_margin:
+            # 先在上次找到的位置附近查找
+            lx, ly = last[0] - ox, last[1] - oy
+            m = self.roi_margin
+            y1, x1 = max(0, ly - m), max(0, lx - m)
+            sub = tuple(p[y1:max(y1, ly + tpl.height + m), x1:max(x1, lx + tpl.width + m)]
+                        for p in planes)
+            ys, xs = match(sub, tpl, delta, sim)
+            if len(ys):
+                return ys + y1, xs + x1
+        ys, xs = self._search(planes, tpl, delta, sim)
+        if len(ys):
+            self.last_hits[name] = (int(xs[0]) + ox, int(ys[0]) + oy)
+        else:
+            self.last_hits.pop(name, None)
+        return ys, xs
+
+    def find_pic(self, frame, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """在帧上查找图片，同FindPic
+        Returns:
+            (序号, x, y)，未找到时为 (-1, -1, -1)
+        """
+        planes, ox, oy = frame_planes(frame, x1, y1, x2, y2)
+        delta = parse_delta(delta_color)
+        for index, name in enumerate(pic_name.split('|')):
+            ys, xs = self.find_all(planes, name, delta, sim, (ox, oy))
+            if len(ys):
+                mask = np.zeros(planes[0].shape, dtype=bool)
+                mask[ys, xs] = True
+                x, y = dm_color.first_point(mask, dir)
+                return index, x + ox, y + oy
+        return -1, -1, -1
+
+    def find_pic_ex(self, frame, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """在帧上查找所有图片，返回 "id,x,y|id,x,y" 字符串，同FindPicEx"""
+        planes, ox, oy = frame_planes(frame, x1, y1, x2, y2)
+        delta = parse_delta(delta_color)
+        results = []
+        for index, name in enumerate(pic_name.split('|')):
+            ys, xs = self.find_all(planes, name, delta, sim, (ox, oy), use_roi=False)
+            if len(ys):
+                mask = np.zeros(planes[0].shape, dtype=bool)
+                mask[ys, xs] = True
+                ys, xs = dm_color.ordered_points(mask, dir)
+                results.extend(f'{index},{x + ox},{y + oy}' for x, y in zip(xs.tolist(), ys.tolist()))
+        return '|'.join(results)
@@ -0,0 +1,87 @@
+"""
+文字识别结果缓存
+以 (方法, 区域, 区域像素哈希, 颜色/相似度等参数, 当前字库序号) 为键缓存Ocr、GetWords、FindStr等结果，
+区域画面不变时直接返回上一次的结果。按条目数以LRU顺序淘汰，字库改变时清除相关条目。
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def region_hash(pixels):
+    """区域像素的哈希"""
+    pixels = np.ascontiguousarray(pixels)
+    digest = hashlib.blake2b(pixels.data, digest_size=16)
+    digest.update(repr(pixels.shape).encode())
+    return digest.digest()
+
+
+class OcrCache:
+    """文字识别结果缓存"""
+
+    def __init__(self, kp, size=512):
+        """
+        Args:
+            kp: PyKeyPresser对象
+            size: 最多缓存的结果数
+        """
+        self.kp = kp
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def call(self, name, rect, args, dict_index, compute):
+        """查询缓存，未命中时调用compute()并保存结果
+        Args:
+            name: 方法名
+            rect: (x1, y1, x2, y2)
+            args: 影响结果的其它参数
+            dict_index: 使用的字库序号，不使用字库时为None
+            compute: 实际识别的函数
+        """
+        try:
+            pixels = self.kp._frame(*rect).region(*rect)[0]
+        except Exception:
+            # 无法截图时不缓存
+            return compute()
+        key = (name, tuple(rect), region_hash(pixels), tuple(args), dict_index)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        result = compute()
+        self.entries[key] = result
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def invalidate(self, dict_index=None):
+        """清除使用某个字库的结果，dict_index为None时清除全部"""
+        if dict_index is None:
+            removed = len(self.entries)
+            self.entries.clear()
+        else:
+            keys = [key for key in self.entries if key[4] == dict_index]
+            for key in keys:
+                del self.entries[key]
+            removed = len(keys)
+        self.invalidations += removed
+
+    def stats(self):
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            'count': len(self.entries),
+            'size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
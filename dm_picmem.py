@@ -0,0 +1,75 @@
+"""
+内存图片
+把BMP数据或NumPy图像保存在地址固定的ctypes缓冲区中，生成FindPicMem使用的
+"addr,size|addr,size" 描述串，找图时不需要先写入临时文件。
+"""
+import ctypes
+from collections import OrderedDict
+
+
+def _bmp_bytes(data):
+    """BMP数据原样返回，NumPy图像编码为BMP"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+        if data[:2] != b'BM':
+            raise ValueError("不是BMP数据")
+        return data
+    import dm_image
+    return dm_image.encode_bmp(data)
+
+
+class PicMemPool:
+    """内存图片池，缓冲区在移除前地址不变"""
+
+    def __init__(self):
+        self.buffers = OrderedDict()
+        self._infos = {}
+
+    def add(self, name, data):
+        """添加或替换图片
+        Args:
+            name: 图片名
+            data: BMP文件内容，或 (h, w, 3) 的RGB / (h, w, 4) 的BGRA数组
+        Returns:
+            (地址, 字节数)
+        """
+        bmp = _bmp_bytes(data)
+        self.buffers[name] = ctypes.create_string_buffer(bmp, len(bmp))
+        self._infos.clear()
+        return self.address(name)
+
+    def remove(self, name):
+        """移除图片并释放缓冲区"""
+        if self.buffers.pop(name, None) is not None:
+            self._infos.clear()
+
+    def address(self, name):
+        """图片缓冲区的 (地址, 字节数)"""
+        buf = self.buffers[name]
+        return ctypes.addressof(buf), len(buf)
+
+    def pic_info(self, names):
+        """生成FindPicMem的pic_info
+        Args:
+            names: "a|b" 或名称列表
+        Returns:
+            "addr,size|addr,size"，顺序与names相同
+        """
+        if isinstance(names, str):
+            names = names.split('|')
+        key = tuple(names)
+        info = self._infos.get(key)
+        if info is None:
+            info = '|'.join('%d,%d' % self.address(name) for name in names)
+            self._infos[key] = info
+        return info
+
+    @property
+    def nbytes(self):
+        return sum(len(buf) for buf in self.buffers.values())
+
+    def __contains__(self, name):
+        return name in self.buffers
+
+    def __len__(self):
+        return len(self.buffers)
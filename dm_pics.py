@@ -0,0 +1,124 @@
+"""
+图片预加载表
+通过LoadPic/FreePic管理dm中已加载的图片，按字节预算以LRU顺序释放最久未使用的图片。
+"""
+import glob
+import os
+import struct
+from collections import OrderedDict
+
+
+def pic_footprint(path):
+    """估算图片加载后占用的内存(按每像素4字节)，无法读取BMP头时使用文件大小"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(26)
+        if header[:2] == b'BM':
+            width, height = struct.unpack_from('<ii', header, 18)
+            return abs(width) * abs(height) * 4
+        return os.path.getsize(path)
+    except (OSError, struct.error):
+        return 0
+
+
+class PicRegistry:
+    """图片预加载表"""
+
+    def __init__(self, kp, budget=64 * 1024 * 1024):
+        """
+        Args:
+            kp: PyKeyPresser对象
+            budget: 已加载图片的字节预算
+        """
+        self.kp = kp
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, name):
+        """图片名对应的文件路径，相对路径基于dm的GetPath"""
+        return name if os.path.isabs(name) else os.path.join(self.kp.dm.GetPath(), name)
+
+    def _load(self, name):
+        """加载一张图片"""
+        self.kp.dm.LoadPic(name)
+        size = pic_footprint(self._path(name))
+        self.entries[name] = size
+        self.used += size
+
+    def preload(self, pattern):
+        """按通配符预加载图片
+        Args:
+            pattern: 如 "icons/*.bmp"，相对路径基于dm的GetPath
+        Returns:
+            加载的图片名列表
+        """
+        base = self.kp.dm.GetPath()
+        names = []
+        for path in sorted(glob.glob(self._path(pattern))):
+            name = path if os.path.isabs(pattern) else os.path.relpath(path, base)
+            if name in self.entries:
+                self.entries.move_to_end(name)
+            else:
+                self._load(name)
+            names.append(name)
+        self.evict(keep=names)
+        return names
+
+    def use(self, pic_name):
+        """使用图片前调用，未加载的图片会先加载，并更新最近使用顺序
+        Args:
+            pic_name: 如 "a.bmp|b.bmp"
+        Returns:
+            pic_name，可直接传给FindPic
+        """
+        names = pic_name.split('|')
+        for name in names:
+            if name in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(name)
+            else:
+                self.misses += 1
+                self._load(name)
+        if self.used > self.budget:
+            self.evict(keep=names)
+        return pic_name
+
+    def evict(self, keep=()):
+        """释放最久未使用的图片直到不超过预算，keep中的图片不释放"""
+        keep = set(keep)
+        for name in list(self.entries):
+            if self.used <= self.budget:
+                break
+            if name in keep:
+                continue
+            self.free(name)
+            self.evictions += 1
+
+    def free(self, name):
+        """释放一张图片"""
+        size = self.entries.pop(name, None)
+        if size is not None:
+            self.used -= size
+            self.kp.dm.FreePic(name)
+
+    def clear(self):
+        """释放所有图片"""
+        for name in list(self.entries):
+            self.free(name)
+
+    def stats(self):
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            'count': len(self.entries),
+            'bytes': self.used,
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,223 @@
+"""
+多窗口工作池
+每个窗口一个dm对象，各自在已初始化COM的线程中创建、绑定并执行任务，
+不同窗口的任务并行执行，同一窗口的任务按提交顺序执行。
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from PyKeyPresser import PyKeyPresser
+
+
+def _default_health(kp, hwnd):
+    """窗口仍然存在即为正常"""
+    return kp.GetWindowState(hwnd, 0) == 1
+
+
+class WindowWorker:
+    """绑定一个窗口的工作线程"""
+
+    def __init__(self, hwnd, factory, bind_args, health=None):
+        """
+        Args:
+            hwnd: 窗口句柄
+            factory: 创建PyKeyPresser对象的函数，在工作线程中调用
+            bind_args: BindWindow的 (display, mouse, keypad, mode)，
+                或BindWindowEx的 (display, mouse, keypad, public_desc, mode)
+            health: 健康检查函数 health(kp, hwnd)，返回False时重新绑定
+        """
+        self.hwnd = hwnd
+        self.factory = factory
+        self.bind_args = tuple(bind_args)
+        self.health = health or _default_health
+        self.kp = None
+        self.bound = False
+        self.tasks = 0
+        self.errors = 0
+        self.rebinds = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"WindowWorker-{hwnd}", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args):
+        """提交任务 func(kp, *args)，返回concurrent.futures.Future"""
+        future = Future()
+        self._queue.put((future, func, args))
+        return future
+
+    def bind(self):
+        """绑定窗口，返回是否成功"""
+        if len(self.bind_args) == 5:
+            result = self.kp.BindWindowEx(self.hwnd, *self.bind_args)
+        else:
+            result = self.kp.BindWindow(self.hwnd, *self.bind_args)
+        self.bound = result == 1
+        return self.bound
+
+    def rebind(self):
+        """解除绑定后重新绑定"""
+        self.rebinds += 1
+        try:
+            self.kp.UnBindWindow()
+        except Exception:
+            pass
+        return self.bind()
+
+    def check(self):
+        """在工作线程中执行健康检查，不正常时重新绑定，返回Future(bool)"""
+        def probe(kp):
+            try:
+                if self.bound and self.health(kp, self.hwnd):
+                    return True
+            except Exception:
+                pass
+            return self.rebind()
+        return self.submit(probe)
+
+    def stop(self):
+        """执行完已提交的任务后解除绑定并结束线程"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        try:
+            self.kp = self.factory()
+            self.bind()
+        except Exception as e:
+            self._fail_all(e)
+            return
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, func, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(self.kp, *args))
+            except Exception as e:
+                self.errors += 1
+                future.set_exception(e)
+            self.tasks += 1
+        if self.bound:
+            self.kp.UnBindWindow()
+
+    def _fail_all(self, error):
+        """dm对象创建失败时，已提交和之后提交的任务都以该异常结束"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future = item[0]
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+
+class WindowPool:
+    """多窗口工作池
+
+    用法:
+        pool = WindowPool.from_process("game.exe", bind_args=("dx2", "windows", "windows", 0))
+        futures = pool.map(lambda kp: kp.FindPic(0, 0, 800, 600, "ok.bmp", "000000", 0.9))
+        for hwnd, future in futures.items():
+            print(hwnd, future.result())
+    """
+
+    def __init__(self, hwnds, factory=None, bind_args=("normal", "normal", "normal", 0),
+                 health=None, check_interval=None):
+        """
+        Args:
+            hwnds: 窗口句柄列表
+            factory: 创建PyKeyPresser对象的函数，默认 PyKeyPresser(verbose=False)
+            bind_args: 绑定参数，见WindowWorker
+            health: 健康检查函数 health(kp, hwnd)
+            check_interval: 自动健康检查的间隔(秒)，None表示不自动检查
+        """
+        self.factory = factory or (lambda: PyKeyPresser(verbose=False))
+        self.bind_args = bind_args
+        self.health = health
+        self.workers = {}
+        for hwnd in hwnds:
+            self.add(hwnd)
+        self._stop = threading.Event()
+        self._checker = None
+        if check_interval:
+            self._checker = threading.Thread(target=self._check_loop, args=(check_interval,),
+                                             name="WindowPool-check", daemon=True)
+            self._checker.start()
+
+    @classmethod
+    def from_process(cls, process_name, class_name="", title="", filter=None, **kwargs):
+        """用EnumWindowByProcess找到进程的所有窗口后创建工作池
+        Args:
+            process_name: 进程名，如 "game.exe"
+            class_name, title: 窗口类名和标题
+            filter: EnumWindowByProcess的过滤条件，默认按提供的标题/类名过滤可见窗口
+        """
+        if filter is None:
+            filter = (1 if title else 0) | (2 if class_name else 0) | 16
+        # 查找窗口用的对象用完即释放
+        with (kwargs.get('factory') or (lambda: PyKeyPresser(verbose=False)))() as finder:
+            found = finder.EnumWindowByProcess(process_name, title, class_name, filter)
+        return cls([int(h) for h in found.split(',') if h], **kwargs)
+
+    def add(self, hwnd):
+        """为窗口创建工作线程"""
+        if hwnd not in self.workers:
+            self.workers[hwnd] = WindowWorker(hwnd, self.factory, self.bind_args, self.health)
+        return self.workers[hwnd]
+
+    def remove(self, hwnd):
+        """停止并移除窗口的工作线程"""
+        worker = self.workers.pop(hwnd, None)
+        if worker is not None:
+            worker.stop()
+
+    def submit(self, hwnd, func, *args):
+        """向指定窗口提交任务 func(kp, *args)，返回Future"""
+        return self.workers[hwnd].submit(func, *args)
+
+    def map(self, func, *args):
+        """向所有窗口提交同一任务，返回 {hwnd: Future}"""
+        return {hwnd: worker.submit(func, *args) for hwnd, worker in self.workers.items()}
+
+    def check(self, timeout=None):
+        """检查所有窗口，必要时重新绑定，返回 {hwnd: 是否正常}"""
+        futures = {hwnd: worker.check() for hwnd, worker in self.workers.items()}
+        result = {}
+        for hwnd, future in futures.items():
+            try:
+                result[hwnd] = future.result(timeout)
+            except Exception:
+                result[hwnd] = False
+        return result
+
+    def stats(self):
+        """每个窗口的任务数、错误数和重新绑定次数"""
+        return {hwnd: {'bound': w.bound, 'tasks': w.tasks, 'errors': w.errors,
+                       'rebinds': w.rebinds, 'pending': w._queue.qsize()}
+                for hwnd, w in self.workers.items()}
+
+    def _check_loop(self, interval):
+        while not self._stop.wait(interval):
+            self.check()
+
+    def close(self):
+        """停止所有工作线程"""
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join()
+        for hwnd in list(self.workers):
+            self.remove(hwnd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
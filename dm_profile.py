@@ -0,0 +1,180 @@
+"""
+调用耗时统计
+ProfilingBackend包装后端，记录每个方法的调用次数、错误次数、总耗时和最近调用的耗时分布(p50/p99)，
+并按调用位置(PyKeyPresser和dm_*模块之外的第一个调用者)统计，可导出为Prometheus文本格式或JSON。
+未启用时不包装后端，没有额外开销。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class MethodStats:
+    """一个方法的统计"""
+
+    def __init__(self, samples=4096):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=samples)
+        self.sites = {}
+
+    def percentile(self, q):
+        """最近调用耗时的分位数(秒)"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _internal(filename, cache={}):
+    """是否为本包内部的文件(PyKeyPresser.py、dm_*.py)"""
+    result = cache.get(filename)
+    if result is None:
+        base = os.path.basename(filename)
+        result = cache[filename] = (os.path.dirname(os.path.abspath(filename)) == _PACKAGE_DIR
+                                    and (base == 'PyKeyPresser.py' or base.startswith('dm_')))
+    return result
+
+
+def call_site(depth=2):
+    """调用位置 "文件名:行号"，跳过本包内部的帧"""
+    frame = sys._getframe(depth)
+    while frame is not None and _internal(frame.f_code.co_filename):
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+class ProfilingBackend:
+    """统计耗时的后端代理，其它属性直接访问被包装的后端"""
+
+    def __init__(self, backend, sites=True, samples=4096):
+        """
+        Args:
+            backend: 被包装的后端
+            sites: 是否按调用位置统计
+            samples: 每个方法保留最近多少次调用的耗时，用于计算分位数
+        """
+        self._backend = backend
+        self._sites = sites
+        self._samples = samples
+        self._lock = threading.Lock()
+        self.methods = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        wrapper = self._wrap(name, attr)
+        # 缓存包装函数，之后的访问不再经过__getattr__
+        self.__dict__[name] = wrapper
+        return wrapper
+
+    def _wrap(self, name, method):
+        stats = self.methods.get(name)
+        if stats is None:
+            stats = self.methods[name] = MethodStats(self._samples)
+        lock = self._lock
+        sites = self._sites
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            failed = False
+            try:
+                return method(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                site = call_site() if sites else None
+                with lock:
+                    stats.calls += 1
+                    stats.total += elapsed
+                    stats.samples.append(elapsed)
+                    if elapsed > stats.max:
+                        stats.max = elapsed
+                    if failed:
+                        stats.errors += 1
+                    if site is not None:
+                        entry = stats.sites.get(site)
+                        if entry is None:
+                            stats.sites[site] = [1, elapsed]
+                        else:
+                            entry[0] += 1
+                            entry[1] += elapsed
+
+        wrapper.__name__ = name
+        return wrapper
+
+    def reset(self):
+        """清除统计"""
+        with self._lock:
+            for stats in self.methods.values():
+                stats.__init__(self._samples)
+
+    def stats(self):
+        """每个方法的统计，按总耗时从大到小
+        Returns:
+            {方法名: {'calls', 'errors', 'total', 'mean', 'p50', 'p99', 'max', 'sites'}}，
+            时间单位为秒，sites为 {调用位置: (次数, 总耗时)}
+        """
+        with self._lock:
+            items = sorted(self.methods.items(), key=lambda item: -item[1].total)
+            return {name: {
+                'calls': s.calls,
+                'errors': s.errors,
+                'total': s.total,
+                'mean': s.total / s.calls if s.calls else 0.0,
+                'p50': s.percentile(0.5),
+                'p99': s.percentile(0.99),
+                'max': s.max,
+                'sites': {site: tuple(entry) for site, entry in s.sites.items()},
+            } for name, s in items if s.calls}
+
+    def to_json(self, path=None):
+        """导出为JSON，指定path时写入文件，返回JSON字符串"""
+        text = json.dumps({name: dict(item, sites={site: list(v) for site, v in item['sites'].items()})
+                           for name, item in self.stats().items()}, ensure_ascii=False, indent=1)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, path=None, prefix='dm'):
+        """导出为Prometheus文本格式，指定path时写入文件(可供node_exporter的textfile收集)，返回文本"""
+        stats = self.stats()
+        lines = [f'# HELP {prefix}_call_seconds dm方法调用耗时',
+                 f'# TYPE {prefix}_call_seconds summary']
+        for name, item in stats.items():
+            for q in ('0.5', '0.99'):
+                value = item['p50'] if q == '0.5' else item['p99']
+                lines.append(f'{prefix}_call_seconds{{method="{name}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'{prefix}_call_seconds_sum{{method="{name}"}} {item["total"]:.9f}')
+            lines.append(f'{prefix}_call_seconds_count{{method="{name}"}} {item["calls"]}')
+        lines += [f'# HELP {prefix}_call_errors_total dm方法调用出错次数',
+                  f'# TYPE {prefix}_call_errors_total counter']
+        lines += [f'{prefix}_call_errors_total{{method="{name}"}} {item["errors"]}' for name, item in stats.items()]
+        for metric, help_text, column in (('site_calls_total', '每个调用位置的调用次数', 0),
+                                          ('site_seconds_total', '每个调用位置的总耗时', 1)):
+            lines += [f'# HELP {prefix}_{metric} {help_text}', f'# TYPE {prefix}_{metric} counter']
+            for name, item in stats.items():
+                for site, entry in item['sites'].items():
+                    site = site.replace('\\', '\\\\').replace('"', '\\"')
+                    lines.append(f'{prefix}_{metric}{{method="{name}",site="{site}"}} {entry[column]:g}')
+        text = '\n'.join(lines) + '\n'
+        if path is not None:
+            # 先写临时文件再替换，避免收集到写了一半的文件
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp, path)
+        return text
@@ -0,0 +1,96 @@
+"""
+*Ex系列查找结果解析
+把 "id,x,y|id,x,y" 或 "x,y|x,y" 格式的字符串一次性解析为array('i')，
+查询时不再需要逐个调用GetResultCount/GetResultPos。
+"""
+from array import array
+
+
+class ExResult:
+    """由三个array('i')保存的查找结果，没有序号的结果(如FindColorEx)序号为0"""
+
+    def __init__(self, ids=None, xs=None, ys=None):
+        self.ids = ids if ids is not None else array('i')
+        self.xs = xs if xs is not None else array('i')
+        self.ys = ys if ys is not None else array('i')
+
+    @classmethod
+    def parse(cls, text, with_id=True):
+        """解析结果字符串
+        Args:
+            text: dm返回的结果字符串
+            with_id: 每个结果是否以序号开头
+        """
+        if not text:
+            return cls()
+        values = array('i', map(int, text.replace('|', ',').split(',')))
+        if with_id:
+            return cls(values[0::3], values[1::3], values[2::3])
+        return cls(array('i', bytes(4 * (len(values) // 2))), values[0::2], values[1::2])
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __bool__(self):
+        return len(self.xs) > 0
+
+    def __getitem__(self, index):
+        return self.ids[index], self.xs[index], self.ys[index]
+
+    def __iter__(self):
+        return zip(self.ids, self.xs, self.ys)
+
+    def __repr__(self):
+        return f"ExResult({list(self)[:5]}{'...' if len(self) > 5 else ''}, count={len(self)})"
+
+    def _select(self, indices):
+        """按下标取子集"""
+        return ExResult(array('i', [self.ids[i] for i in indices]),
+                        array('i', [self.xs[i] for i in indices]),
+                        array('i', [self.ys[i] for i in indices]))
+
+    def first(self):
+        """第一个结果，没有结果时返回None"""
+        return self[0] if self else None
+
+    def nearest(self, x, y):
+        """距离(x, y)最近的结果，没有结果时返回None"""
+        if not self:
+            return None
+        xs, ys = self.xs, self.ys
+        best = min(range(len(xs)), key=lambda i: (xs[i] - x) ** 2 + (ys[i] - y) ** 2)
+        return self[best]
+
+    def by_id(self, *ids):
+        """筛选指定序号的结果，序号对应pic_name或字符串列表中的位置"""
+        wanted = set(ids)
+        return self._select([i for i, v in enumerate(self.ids) if v in wanted])
+
+    def in_region(self, x1, y1, x2, y2):
+        """筛选位于区域内的结果(不含x2, y2)"""
+        xs, ys = self.xs, self.ys
+        return self._select([i for i in range(len(xs))
+                             if x1 <= xs[i] < x2 and y1 <= ys[i] < y2])
+
+    def sort(self, order='row'):
+        """排序
+        Args:
+            order: 'row' 从上到下、从左到右；'col' 从左到右、从上到下
+        """
+        xs, ys = self.xs, self.ys
+        if order == 'row':
+            key = lambda i: (ys[i], xs[i])
+        elif order == 'col':
+            key = lambda i: (xs[i], ys[i])
+        else:
+            raise ValueError(f"不支持的排序方式: {order}")
+        return self._select(sorted(range(len(xs)), key=key))
+
+    def to_numpy(self):
+        """转换为字段为id, x, y的NumPy结构化数组"""
+        import numpy as np
+        result = np.empty(len(self), dtype=[('id', 'i4'), ('x', 'i4'), ('y', 'i4')])
+        result['id'] = self.ids
+        result['x'] = self.xs
+        result['y'] = self.ys
+        return result
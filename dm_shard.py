@@ -0,0 +1,217 @@
+"""
+多进程分片
+截图帧放入multiprocessing.shared_memory，多个工作进程各自持有一个PyKeyPresser对象，
+分别处理不同的图片、字库或区域，结果在主进程中合并。
+
+工作进程的后端如果有set_frame方法(如ImageBackend)，执行任务前会把共享帧设为屏幕图像，
+因此找图、找色直接在共享内存上进行；dm COM后端则自行截图，只使用分片后的参数。
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from PyKeyPresser import PyKeyPresser
+
+
+class SharedFrame:
+    """放在共享内存中的一帧图像，工作进程按名称映射，不复制像素"""
+
+    def __init__(self, pixels, x=0, y=0):
+        """
+        Args:
+            pixels: (h, w, 4) 的BGRA数组，或dm_frame.Frame
+            x, y: 图像左上角的屏幕坐标
+        """
+        if hasattr(pixels, 'pixels'):
+            pixels, x, y = pixels.pixels, pixels.x, pixels.y
+        pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        self.shape = pixels.shape
+        self.x = x
+        self.y = y
+        self.shm = shared_memory.SharedMemory(create=True, size=pixels.nbytes)
+        np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)[:] = pixels
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """传给工作进程的描述 (名称, 形状, x, y)"""
+        return self.shm.name, self.shape, self.x, self.y
+
+    def close(self):
+        """释放共享内存"""
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def image_worker():
+    """默认的工作进程对象: ImageBackend，在共享帧上本地找图找色"""
+    from dm_backend import ImageBackend
+    return PyKeyPresser(backend=ImageBackend(width=1, height=1), verbose=False)
+
+
+# 工作进程中的状态
+_kp = None
+_attached = None
+
+
+def _init_worker(factory, setup):
+    """工作进程初始化: 创建对象并执行setup调用(如SetPath、SetDict)"""
+    global _kp
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+    _kp = factory()
+    for method, args in setup:
+        getattr(_kp, method)(*args)
+
+
+def _open_shared(name):
+    """映射已有的共享内存，不交给resource_tracker管理(由创建它的主进程释放)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python 3.13之前没有track参数
+        shm = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _attach(spec):
+    """映射共享帧，同一帧只映射一次"""
+    global _attached
+    name, shape, x, y = spec
+    if _attached is not None and _attached[0] == name:
+        return
+    shm = _open_shared(name)
+    backend = _kp.dm
+    if hasattr(backend, 'set_frame'):
+        backend.set_frame(np.ndarray(shape, dtype=np.uint8, buffer=shm.buf), x, y)
+    if _attached is not None:
+        try:
+            _attached[1].close()
+        except BufferError:  # 仍有数组引用旧帧时由垃圾回收释放
+            pass
+    _attached = (name, shm)
+
+
+def _run_calls(spec, calls):
+    """依次执行 [(方法名, 参数), ...]，返回最后一个调用的结果"""
+    if spec is not None:
+        _attach(spec)
+    result = None
+    for method, args in calls:
+        result = getattr(_kp, method)(*args)
+    return result
+
+
+def split(items, count):
+    """把列表尽量均匀地分成count份，保持原顺序"""
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    shards, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+
+class ShardPool:
+    """多进程分片执行器
+
+    用法:
+        with ShardPool(setup=[('SetPath', ("pics",))]) as pool:
+            with pool.share(kp.CaptureFrame(0, 0, 1920, 1080)) as frame:
+                index, x, y = pool.find_pic(frame, 0, 0, 1920, 1080, "a.bmp|b.bmp|c.bmp", "000000", 0.9)
+    """
+
+    def __init__(self, processes=None, factory=image_worker, setup=()):
+        """
+        Args:
+            processes: 进程数，默认为CPU核数
+            factory: 在工作进程中创建PyKeyPresser的函数，必须可以被pickle(模块级函数)
+            setup: 每个工作进程创建对象后执行的 [(方法名, 参数元组), ...]
+        """
+        self.processes = processes or multiprocessing.cpu_count()
+        self.pool = multiprocessing.Pool(self.processes, _init_worker, (factory, list(setup)))
+
+    def share(self, pixels, x=0, y=0):
+        """把图像或Frame放入共享内存，返回SharedFrame"""
+        return SharedFrame(pixels, x, y)
+
+    def run(self, frame, jobs):
+        """并行执行多个任务
+        Args:
+            frame: SharedFrame或None
+            jobs: 每个任务为 [(方法名, 参数元组), ...]，在同一工作进程中依次执行
+        Returns:
+            每个任务最后一个调用的结果，顺序与jobs相同
+        """
+        spec = frame.spec() if frame is not None else None
+        return self.pool.starmap(_run_calls, [(spec, list(calls)) for calls in jobs])
+
+    def map_regions(self, frame, method, regions, *args):
+        """对多个区域执行同一方法，如 map_regions(frame, "FindStrFast", regions, "确定", "ffffff", 0.9)
+        Returns:
+            每个区域的结果
+        """
+        return self.run(frame, [[(method, tuple(region) + args)] for region in regions])
+
+    def find_pic(self, frame, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """按图片分片的FindPic，返回 (序号, x, y)，与FindPic一样取列表中最靠前的图片"""
+        names = pic_name.split('|')
+        shards = split(names, self.processes)
+        results = self.run(frame, [[('FindPic', (x1, y1, x2, y2, '|'.join(shard), delta_color, sim, dir))]
+                                   for shard in shards])
+        offset = 0
+        for shard, (index, x, y) in zip(shards, results):
+            if index >= 0:
+                return offset + index, x, y
+            offset += len(shard)
+        return -1, -1, -1
+
+    def find_pic_ex(self, frame, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """按图片分片的FindPicEx，返回 "id,x,y|..."，id为在pic_name中的序号"""
+        names = pic_name.split('|')
+        shards = split(names, self.processes)
+        results = self.run(frame, [[('FindPicEx', (x1, y1, x2, y2, '|'.join(shard), delta_color, sim, dir))]
+                                   for shard in shards])
+        parts, offset = [], 0
+        for shard, text in zip(shards, results):
+            for item in filter(None, (text or '').split('|')):
+                index, x, y = item.split(',')
+                parts.append(f'{int(index) + offset},{x},{y}')
+            offset += len(shard)
+        return '|'.join(parts)
+
+    def ocr_dicts(self, frame, x1, y1, x2, y2, color, sim, dict_indexes):
+        """用多个字库分别识别同一区域，每个字库一个任务
+        Returns:
+            {字库序号: 识别结果}
+        """
+        jobs = [[('UseDict', (index,)), ('Ocr', (x1, y1, x2, y2, color, sim))] for index in dict_indexes]
+        return dict(zip(dict_indexes, self.run(frame, jobs)))
+
+    def close(self):
+        """结束工作进程"""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,429 @@
+"""
+状态机
+每个状态声明识别条件(图片、颜色、多点颜色、文字)和动作。每个tick截取一次快照，
+候选状态的条件都在同一帧上判断，条件组内先判断开销小的条件并在结果确定时停止。
+启用开销模型(kp.EnableCostModel)后按实测的耗时和满足率排序条件组(见dm_cost)。
+"""
+import os
+import threading
+import time
+
+
+def _func_name(func):
+    """函数的名称，lambda加上定义位置以区分"""
+    name = getattr(func, '__qualname__', None) or repr(func)
+    code = getattr(func, '__code__', None)
+    if '<lambda>' in name and code is not None:
+        name += f"@{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+    return name
+
+
+class Predicate:
+    """识别条件，子类实现check返回查找结果，matched判断结果是否满足
+    cost为静态开销(毫秒)，没有实测统计时用于排序
+    """
+
+    cost = 1.0
+
+    def __init__(self, name=None):
+        """
+        Args:
+            name: 结果在Match中的名称，默认为条件的描述
+        """
+        self.name = name or self.describe()
+
+    def describe(self):
+        """默认名称，包含所有参数，参数不同的条件不会共用统计和结果"""
+        args = getattr(self, 'args', None)
+        return type(self).__name__ if args is None else f"{type(self).__name__}{args!r}"
+
+    def check(self, kp):
+        raise NotImplementedError
+
+    def matched(self, result):
+        return bool(result)
+
+    def expected(self, costs):
+        """(期望耗时(毫秒), 满足概率)"""
+        if costs is None:
+            return self.cost, 0.5
+        return costs.estimate(self.name, self.cost)
+
+    def evaluate(self, kp, match):
+        """判断条件，满足时把结果记入match"""
+        start = time.perf_counter()
+        result = self.check(kp)
+        ok = self.matched(result)
+        if kp.costs is not None:
+            kp.costs.record(self.name, time.perf_counter() - start, ok)
+        if ok:
+            match.values[self.name] = result
+        return ok
+
+    def __and__(self, other):
+        return All(self, other)
+
+    def __or__(self, other):
+        return Any(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class Pic(Predicate):
+    """区域中有图片，结果为 (序号, x, y)"""
+
+    cost = 5.0
+
+    def __init__(self, x1, y1, x2, y2, pic_name, delta_color="000000", sim=0.9, dir=0, name=None):
+        self.args = (x1, y1, x2, y2, pic_name, delta_color, sim, dir)
+        super().__init__(name)
+
+    def check(self, kp):
+        return kp.FindPicLocal(*self.args)
+
+    def matched(self, result):
+        return result[0] >= 0
+
+
+class Color(Predicate):
+    """某点颜色匹配，结果为 (x, y)"""
+
+    cost = 0.01
+
+    def __init__(self, x, y, color, sim=1.0, name=None):
+        self.args = (x, y, color, sim)
+        super().__init__(name)
+
+    def check(self, kp):
+        return self.args[:2] if kp.CmpColor(*self.args) == 0 else None
+
+
+class FindColor(Predicate):
+    """区域中有颜色，结果为 (1, x, y)"""
+
+    cost = 0.5
+
+    def __init__(self, x1, y1, x2, y2, color, sim=1.0, dir=0, name=None):
+        self.args = (x1, y1, x2, y2, color, sim, dir)
+        super().__init__(name)
+
+    def check(self, kp):
+        return kp.FindColor(*self.args)
+
+    def matched(self, result):
+        return result[0] == 1
+
+
+class MultiColor(Predicate):
+    """区域中有多点颜色，结果为 (1, x, y)"""
+
+    cost = 1.0
+
+    def __init__(self, x1, y1, x2, y2, first_color, offset_color, sim=1.0, dir=0, name=None):
+        self.args = (x1, y1, x2, y2, first_color, offset_color, sim, dir)
+        super().__init__(name)
+
+    def check(self, kp):
+        return kp.FindMultiColor(*self.args)
+
+    def matched(self, result):
+        return result[0] == 1
+
+
+class Str(Predicate):
+    """区域中有文字，结果为 (序号, x, y)；已设置本地字库时在快照上识别，否则调用FindStr"""
+
+    cost = 10.0
+
+    def __init__(self, x1, y1, x2, y2, str_text, color, sim=0.9, name=None):
+        self.args = (x1, y1, x2, y2, str_text, color, sim)
+        super().__init__(name)
+
+    def check(self, kp):
+        if len(kp.glyph_index()):
+            return kp.FindStrLocal(*self.args)
+        return kp.FindStr(*self.args)
+
+    def matched(self, result):
+        return result[0] >= 0
+
+
+class Ocr(Predicate):
+    """识别区域中的文字，test(文字)为真即满足(默认为识别到文字)，结果为文字；
+    已设置本地字库时在快照上识别，否则调用Ocr
+    """
+
+    cost = 20.0
+
+    def __init__(self, x1, y1, x2, y2, color, sim=0.9, test=None, name=None):
+        self.args = (x1, y1, x2, y2, color, sim)
+        self.test = test or bool
+        super().__init__(name)
+
+    def describe(self):
+        return f"Ocr{self.args!r}:{_func_name(self.test)}"
+
+    def check(self, kp):
+        if len(kp.glyph_index()):
+            return kp.OcrLocal(*self.args)
+        return kp.Ocr(*self.args)
+
+    def matched(self, result):
+        return bool(self.test(result))
+
+
+class Check(Predicate):
+    """自定义条件 func(kp)，返回值为真即满足"""
+
+    def __init__(self, func, cost=1.0, name=None):
+        self.func = func
+        self.cost = cost
+        super().__init__(name or _func_name(func))
+
+    def check(self, kp):
+        return self.func(kp)
+
+
+class Group(Predicate):
+    """条件组"""
+
+    def __init__(self, *children, name=None):
+        self.children = list(children)
+        super().__init__(name)
+
+    def describe(self):
+        sep = ' & ' if isinstance(self, All) else ' | '
+        return '(' + sep.join(c.name for c in self.children) + ')'
+
+    @property
+    def cost(self):
+        return self.plan(None)[1]
+
+    def plan(self, costs):
+        """(判断顺序, 期望耗时, 满足概率)，没有开销模型时按静态开销排序"""
+        raise NotImplementedError
+
+    def expected(self, costs):
+        return self.plan(costs)[1:]
+
+    def ordered(self, costs=None):
+        """判断顺序"""
+        return self.plan(costs)[0]
+
+
+class All(Group):
+    """所有条件都满足"""
+
+    def plan(self, costs):
+        from dm_cost import order_all
+        return order_all([(c,) + tuple(c.expected(costs)) for c in self.children])
+
+    def evaluate(self, kp, match):
+        for child in self.ordered(kp.costs):
+            if not child.evaluate(kp, match):
+                return False
+        return True
+
+
+class Any(Group):
+    """任一条件满足"""
+
+    def plan(self, costs):
+        from dm_cost import order_any
+        return order_any([(c,) + tuple(c.expected(costs)) for c in self.children])
+
+    def evaluate(self, kp, match):
+        for child in self.ordered(kp.costs):
+            if child.evaluate(kp, match):
+                return True
+        return False
+
+
+class Not(Predicate):
+    """条件不满足"""
+
+    def __init__(self, child, name=None):
+        self.child = child
+        super().__init__(name)
+
+    def describe(self):
+        return f"~{self.child.name}"
+
+    @property
+    def cost(self):
+        return self.child.cost
+
+    def expected(self, costs):
+        cost, p = self.child.expected(costs)
+        return cost, 1.0 - p
+
+    def evaluate(self, kp, match):
+        return not self.child.evaluate(kp, Match(None))
+
+
+class Match:
+    """一次匹配的结果，values为 {条件名称: 查找结果}"""
+
+    def __init__(self, state):
+        self.state = state
+        self.values = {}
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+    def point(self, name=None):
+        """结果中的 (x, y)
+        Args:
+            name: 条件名称，默认优先取找图、找色、找字的结果，其次是比较颜色的点
+        Returns:
+            (x, y)，没有带坐标的结果时返回None
+        """
+        if name is not None:
+            value = self.values[name]
+            return value[-2], value[-1]
+        points = [v for v in self.values.values() if isinstance(v, tuple) and len(v) >= 2]
+        points.sort(key=lambda v: len(v) < 3)
+        return (points[0][-2], points[0][-1]) if points else None
+
+
+class State:
+    """状态"""
+
+    def __init__(self, name, when, action=None, next=None):
+        """
+        Args:
+            name: 状态名
+            when: 识别条件，列表表示所有条件都要满足
+            action: 进入状态时执行的 action(kp, match)
+            next: 之后只检查这些状态，None表示检查所有状态
+        """
+        self.name = name
+        self.when = All(*when) if isinstance(when, (list, tuple)) else when
+        self.action = action
+        self.next = next
+        self.evals = 0
+        self.hits = 0
+        self.eval_time = 0.0
+        self.action_time = 0.0
+
+
+def _check_names(predicates):
+    """开销统计和Match按名称区分条件，不同的条件不能同名"""
+    seen = {}
+    stack = list(predicates)
+    while stack:
+        pred = stack.pop()
+        if isinstance(pred, Group):
+            stack.extend(pred.children)
+        elif isinstance(pred, Not):
+            stack.append(pred.child)
+        other = seen.setdefault(pred.name, pred)
+        if other is not pred and other.describe() != pred.describe():
+            raise ValueError(f"条件名称重复: {pred.name!r} 用于 {other.describe()} 和 {pred.describe()}，请指定不同的name")
+
+
+class StateMachine:
+    """状态机
+
+    用法:
+        machine = StateMachine(kp, [
+            State("login", Pic(0, 0, 800, 600, "login.bmp"), lambda kp, m: kp.MoveTo(*m.point())),
+            State("battle", [Color(20, 20, "ff0000"), Str(0, 0, 800, 100, "战斗", "ffffff")]),
+        ], region=(0, 0, 800, 600))
+        machine.run(timeout=60)
+    """
+
+    def __init__(self, kp, states, region, interval=0.05):
+        """
+        Args:
+            kp: PyKeyPresser对象
+            states: 状态列表，排在前面的优先
+            region: 每个tick快照的区域，应包含所有条件的区域
+            interval: tick间隔(秒)
+        """
+        self.kp = kp
+        self.states = list(states)
+        self.by_name = {state.name: state for state in self.states}
+        _check_names([state.when for state in self.states])
+        self.region = region
+        self.interval = interval
+        self.current = None
+        self.ticks = 0
+        self.capture_time = 0.0
+
+    def candidates(self):
+        """当前状态之后需要检查的状态"""
+        if self.current is None or self.current.next is None:
+            return self.states
+        return [self.by_name[name] for name in self.current.next]
+
+    def tick(self):
+        """截取一帧并判断，返回匹配的Match，没有状态满足时返回None"""
+        self.ticks += 1
+        match = None
+        with self.kp.snapshot(*self.region) as snap:
+            # 先截取，截图耗时单独统计，不计入第一个判断的条件
+            start = time.perf_counter()
+            snap.frame
+            self.capture_time += time.perf_counter() - start
+            for state in self.candidates():
+                start = time.perf_counter()
+                candidate = Match(state)
+                ok = state.when.evaluate(self.kp, candidate)
+                state.eval_time += time.perf_counter() - start
+                state.evals += 1
+                if ok:
+                    state.hits += 1
+                    match = candidate
+                    break
+        if match is not None:
+            # 动作在快照之外执行，动作之后的查询看到新的画面
+            self.current = match.state
+            if match.state.action is not None:
+                start = time.perf_counter()
+                match.state.action(self.kp, match)
+                match.state.action_time += time.perf_counter() - start
+        return match
+
+    def run(self, until=None, timeout=None, cancel=None):
+        """反复tick直到进入until状态、超时或被取消
+        Returns:
+            最后匹配的状态名
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        cancel = cancel or threading.Event()
+        while not cancel.is_set():
+            start = time.perf_counter()
+            match = self.tick()
+            if match is not None and match.state.name == until:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            cancel.wait(max(0.0, self.interval - (time.perf_counter() - start)))
+        if self.kp.costs is not None and self.kp.costs.path is not None:
+            self.kp.costs.save()
+        return self.current.name if self.current is not None else None
+
+    def plans(self):
+        """每个状态当前的条件判断顺序"""
+        result = {}
+        for state in self.states:
+            when = state.when
+            order = when.ordered(self.kp.costs) if isinstance(when, Group) else [when]
+            result[state.name] = [p.name for p in order]
+        return result
+
+    def stats(self):
+        """每个状态的判断次数、命中次数和平均耗时(毫秒)，'<capture>'为每个tick截图的次数和平均耗时"""
+        result = {s.name: {'evals': s.evals, 'hits': s.hits,
+                           'eval_ms': s.eval_time / s.evals * 1000 if s.evals else 0.0,
+                           'action_ms': s.action_time / s.hits * 1000 if s.hits else 0.0}
+                  for s in self.states}
+        result['<capture>'] = {'evals': self.ticks, 'hits': self.ticks,
+                               'eval_ms': self.capture_time / self.ticks * 1000 if self.ticks else 0.0,
+                               'action_ms': 0.0}
+        return result
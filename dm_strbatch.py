@@ -0,0 +1,78 @@
+"""
+批量查找字符串
+把 (区域, 字符串, 颜色, 相似度) 任务按颜色、相似度和相互重叠的区域分组，
+每组只扫描一次: 合并为一次FindStrEx调用，或截图一次后用本地字库匹配，再分别得到每个任务的结果。
+"""
+from dm_results import ExResult
+
+
+def _overlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _union(a, b):
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def group_jobs(jobs):
+    """分组
+    Args:
+        jobs: [(x1, y1, x2, y2, str_text, color, sim), ...]
+    Returns:
+        [(合并后的区域, color, sim, [任务下标, ...]), ...]
+    """
+    by_color = {}
+    for i, job in enumerate(jobs):
+        by_color.setdefault((job[5], job[6]), []).append(i)
+    groups = []
+    for (color, sim), indices in by_color.items():
+        clusters = []
+        for i in indices:
+            rect = tuple(jobs[i][:4])
+            members = [i]
+            # 与已有的组重叠时合并，合并后的区域可能又与其它组重叠
+            merged = True
+            while merged:
+                merged = False
+                for cluster in clusters:
+                    if _overlap(cluster[0], rect):
+                        clusters.remove(cluster)
+                        rect = _union(cluster[0], rect)
+                        members = cluster[1] + members
+                        merged = True
+                        break
+            clusters.append((rect, members))
+        for rect, members in clusters:
+            groups.append((rect, color, sim, sorted(members)))
+    return groups
+
+
+def _pick(found, strings, rect):
+    """从 [(字符串, x, y), ...] 中按任务的字符串顺序取区域内第一个结果"""
+    x1, y1, x2, y2 = rect
+    for index, target in enumerate(strings):
+        hits = [(y, x) for s, x, y in found if s == target and x1 <= x < x2 and y1 <= y < y2]
+        if hits:
+            y, x = min(hits)
+            return index, x, y
+    return -1, -1, -1
+
+
+def run_group(kp, jobs, group, local=False):
+    """执行一组任务，返回 {任务下标: (序号, x, y)}"""
+    rect, color, sim, members = group
+    if len(members) == 1 and not local:
+        i = members[0]
+        return {i: tuple(kp.FindStr(*jobs[i][:4], jobs[i][4], color, sim))}
+    strings = []
+    for i in members:
+        for s in jobs[i][4].split('|'):
+            if s and s not in strings:
+                strings.append(s)
+    if local:
+        from dm_dict import find_str_ex
+        text = find_str_ex(kp._match_glyphs(*rect, color, sim), '|'.join(strings))
+    else:
+        text = kp.FindStrEx(*rect, '|'.join(strings), color, sim)
+    found = [(strings[id], x, y) for id, x, y in ExResult.parse(text)]
+    return {i: _pick(found, jobs[i][4].split('|'), jobs[i][:4]) for i in members}
@@ -0,0 +1,193 @@
+"""
+连续截图
+后台线程按目标帧率截取区域，复制到预先分配的环形缓冲区中，检测代码读取最新的帧，
+不必各自截图。消费者跟不上时按策略丢弃最旧的帧或让采集线程等待。
+dm对象不能跨线程使用，采集线程通过传入的函数创建自己的对象；只有后端thread_safe(如ImageBackend)时
+才可以直接传入调用方的PyKeyPresser对象。
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from dm_frame import Frame
+
+
+class FrameStream:
+    """环形缓冲区截图流
+
+    用法:
+        with FrameStream(lambda: PyKeyPresser(), 0, 0, 800, 600, fps=30) as stream:
+            for timestamp, frame in stream.frames():
+                frame.find_color(0, 0, 800, 600, "ff0000", 1.0)
+    """
+
+    def __init__(self, kp, x1, y1, x2, y2, fps=30, slots=4, block=False):
+        """
+        Args:
+            kp: 在采集线程中创建PyKeyPresser对象的函数(dm对象需在使用它的线程中创建，
+                绑定窗口时在函数中BindWindow)；后端thread_safe时也可以直接传入PyKeyPresser对象
+            x1, y1, x2, y2: 截图区域
+            fps: 目标帧率
+            slots: 环形缓冲区的帧数，至少3
+            block: 缓冲区中都是未读的帧时，True让采集线程等待，False丢弃最旧的帧
+        """
+        if slots < 3:
+            raise ValueError("slots至少为3")
+        if hasattr(kp, 'GetScreenData') and not getattr(kp.dm, 'thread_safe', False):
+            raise Exception("dm对象不能跨线程使用，请传入在采集线程中创建对象的函数，如 lambda: PyKeyPresser()")
+        self.kp = kp
+        self.rect = (x1, y1, x2, y2)
+        self.period = 1.0 / fps
+        self.block = block
+        self.buffers = np.empty((slots, y2 - y1, x2 - x1, 4), dtype=np.uint8)
+        self.stamps = [0.0] * slots
+        self.captured = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.late = 0
+        self.error = None
+        self._ready = deque()
+        self._leased = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._started = 0.0
+
+    def start(self):
+        """启动采集线程"""
+        if self._thread is None:
+            self._running = True
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="FrameStream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采集线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _frame(self, slot):
+        x1, y1 = self.rect[:2]
+        return Frame(self.buffers[slot], x1, y1, self.stamps[slot])
+
+    def _lease(self, slot):
+        """交给消费者的帧在下次读取前不会被覆盖"""
+        self._leased = slot
+        self.delivered += 1
+        self._cond.notify_all()
+        return self.stamps[slot], self._frame(slot)
+
+    def read(self, timeout=None):
+        """按顺序读取下一帧
+        Returns:
+            (时间戳, Frame)，超时或已停止时返回None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._ready or not self._running, timeout):
+                return None
+            if not self._ready:
+                return None
+            return self._lease(self._ready.popleft())
+
+    def latest(self, timeout=None):
+        """读取最新的一帧，跳过的旧帧计入dropped"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._ready or not self._running, timeout):
+                return None
+            if not self._ready:
+                return None
+            while len(self._ready) > 1:
+                self._ready.popleft()
+                self.dropped += 1
+            return self._lease(self._ready.popleft())
+
+    def frames(self, latest=True):
+        """生成 (时间戳, Frame)，直到停止
+        Args:
+            latest: True时每次取最新的帧，False时按顺序取每一帧
+        """
+        read = self.latest if latest else self.read
+        while True:
+            item = read()
+            if item is None:
+                return
+            yield item
+
+    def stats(self):
+        """采集统计"""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            'captured': self.captured,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'late': self.late,
+            'fps': self.captured / elapsed if elapsed else 0.0,
+        }
+
+    def _free_slot(self):
+        """取得可以写入的槽位，没有时按策略丢帧或等待"""
+        while True:
+            busy = set(self._ready)
+            busy.add(self._leased)
+            for slot in range(len(self.buffers)):
+                if slot not in busy:
+                    return slot
+            if not self.block:
+                self.dropped += 1
+                return self._ready.popleft()
+            # 等待消费者读取
+            self._cond.wait()
+            if not self._running:
+                return None
+
+    def _run(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        kp = self.kp if hasattr(self.kp, 'GetScreenData') else self.kp()
+        deadline = time.perf_counter()
+        try:
+            while True:
+                with self._cond:
+                    if not self._running:
+                        break
+                    slot = self._free_slot()
+                    if slot is None:
+                        break
+                with kp.GetScreenData(*self.rect) as data:
+                    np.copyto(self.buffers[slot], data.array)
+                with self._cond:
+                    self.stamps[slot] = time.perf_counter()
+                    self._ready.append(slot)
+                    self.captured += 1
+                    self._cond.notify_all()
+                deadline += self.period
+                now = time.perf_counter()
+                if now > deadline:
+                    # 截图耗时超过周期，跳过错过的时刻
+                    missed = int((now - deadline) / self.period) + 1
+                    self.late += missed
+                    deadline += missed * self.period
+                with self._cond:
+                    self._cond.wait_for(lambda: not self._running, deadline - time.perf_counter())
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
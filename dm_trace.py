@@ -0,0 +1,360 @@
+"""
+调用记录与回放
+RecordingBackend包装后端，把每次调用的方法名、参数、结果、开始时间和耗时(可选包括GetScreenData截取的像素)
+依次写入二进制记录文件；ReplayBackend按顺序返回记录的结果，不调用dm也不等待，可在没有dm的环境下
+以最快速度重复运行脚本逻辑，用于性能测试和回归测试。
+
+文件格式: 文件头 b'DMTRACE1'，之后每条记录为 struct '<BI' (类型, 长度) 加内容:
+    调用: marshal((方法名, 参数, 关键字参数, 结果, 错误, 开始时间, 耗时))
+    帧: 紧跟在GetScreenData调用之后，zlib压缩或原始的BGRA像素
+    索引: marshal((间隔, [第0、间隔、2*间隔...次调用的文件偏移]))，位于文件末尾，
+          之后是 struct '<Q' 索引偏移和 b'DMTRIDX1'
+写入时边调用边写入文件，内存中只保存稀疏的索引；没有索引(如进程中途退出)时读取前扫描一遍记录重建。
+"""
+import ctypes
+import marshal
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b'DMTRACE1'
+INDEX_MAGIC = b'DMTRIDX1'
+RECORD = struct.Struct('<BI')
+FOOTER = struct.Struct('<Q8s')
+
+KIND_CALL = 1
+KIND_FRAME = 2
+KIND_FRAME_RAW = 3
+KIND_INDEX = 4
+
+
+def _plain(value):
+    """转换为marshal支持的类型，int等的子类(如ScreenData)转换为基类，其它对象(如COM对象)转换为repr字符串"""
+    if value is None or type(value) in (bool, int, float, str, bytes):
+        return value
+    for base in (bool, int, float, str, bytes):
+        if isinstance(value, base):
+            return base(value)
+    if isinstance(value, (tuple, list)):
+        return tuple(_plain(v) for v in value)
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    return repr(value)
+
+
+def _dumps(value):
+    """marshal序列化"""
+    try:
+        return marshal.dumps(value)
+    except ValueError:
+        return marshal.dumps(_plain(value))
+
+
+class TraceWriter:
+    """记录文件写入"""
+
+    def __init__(self, path, compress=True, every=64):
+        """
+        Args:
+            path: 记录文件路径
+            compress: 是否压缩帧
+            every: 每隔多少次调用记录一个索引
+        """
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.compress = compress
+        self.every = every
+        self.offsets = []
+        self.calls = 0
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    def _write(self, kind, payload):
+        self.file.write(RECORD.pack(kind, len(payload)))
+        self.file.write(payload)
+
+    def call(self, method, args, kwargs, result, error, start, elapsed, frame=None):
+        """写入一次调用，frame为GetScreenData截取的像素"""
+        payload = _dumps((method, args, kwargs, result, error, start, elapsed))
+        with self._lock:
+            if self.calls % self.every == 0:
+                self.offsets.append(self.file.tell())
+            self._write(KIND_CALL, payload)
+            if frame is not None:
+                if self.compress:
+                    self._write(KIND_FRAME, zlib.compress(frame, 1))
+                else:
+                    self._write(KIND_FRAME_RAW, frame)
+                self.frames += 1
+            self.calls += 1
+
+    def close(self):
+        """写入索引并关闭文件"""
+        with self._lock:
+            if self.file.closed:
+                return
+            offset = self.file.tell()
+            self._write(KIND_INDEX, marshal.dumps((self.every, self.offsets)))
+            self.file.write(FOOTER.pack(offset, INDEX_MAGIC))
+            self.file.close()
+
+
+class TraceCall:
+    """记录中的一次调用"""
+
+    __slots__ = ('index', 'method', 'args', 'kwargs', 'result', 'error', 'start', 'elapsed', 'frame')
+
+    def __init__(self, index, method, args, kwargs, result, error, start, elapsed, frame=None):
+        self.index = index
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.result = result
+        self.error = error
+        self.start = start
+        self.elapsed = elapsed
+        self.frame = frame
+
+    def __repr__(self):
+        return f"TraceCall({self.index}, {self.method}{self.args!r} -> {self.result!r})"
+
+
+class TraceReader:
+    """记录文件读取，按调用顺序迭代，可用seek跳到第n次调用"""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise ValueError(f"不是调用记录文件: {path}")
+        self.every, self.offsets, self.count = self._read_index()
+        self.position = 0
+        self.file.seek(self.offsets[0] if self.offsets else len(MAGIC))
+
+    def _read_index(self):
+        """读取文件末尾的索引，没有时扫描所有记录重建"""
+        self.file.seek(0, 2)
+        size = self.file.tell()
+        if size >= len(MAGIC) + FOOTER.size:
+            self.file.seek(size - FOOTER.size)
+            offset, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+            if magic == INDEX_MAGIC:
+                self.file.seek(offset)
+                kind, length = RECORD.unpack(self.file.read(RECORD.size))
+                every, offsets = marshal.loads(self.file.read(length))
+                # 调用次数: 最后一个索引之后的调用逐个数出
+                self.file.seek(offsets[-1] if offsets else len(MAGIC))
+                count = (len(offsets) - 1) * every if offsets else 0
+                count += self._count_calls(offset)
+                return every, offsets, count
+        # 没有索引，扫描重建
+        every, offsets, count = 64, [], 0
+        self.file.seek(len(MAGIC))
+        while True:
+            offset = self.file.tell()
+            header = self.file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            kind, length = RECORD.unpack(header)
+            if self.file.seek(length, 1) > size:
+                break
+            if kind == KIND_CALL:
+                if count % every == 0:
+                    offsets.append(offset)
+                count += 1
+        return every, offsets, count
+
+    def _count_calls(self, end):
+        count = 0
+        while self.file.tell() < end:
+            kind, length = RECORD.unpack(self.file.read(RECORD.size))
+            self.file.seek(length, 1)
+            count += kind == KIND_CALL
+        return count
+
+    def __len__(self):
+        return self.count
+
+    def seek(self, index):
+        """跳到第index次调用"""
+        if not 0 <= index <= self.count:
+            raise ValueError(f"调用序号超出范围: {index}，共{self.count}次")
+        if index == self.count:
+            self.position = index
+            return
+        block = index // self.every
+        self.file.seek(self.offsets[block])
+        self.position = block * self.every
+        while self.position < index:
+            self.read(frames=False)
+
+    def read(self, frames=True):
+        """读取下一次调用，没有时返回None
+        Args:
+            frames: 是否解压调用之后的帧
+        """
+        if self.position >= self.count:
+            return None
+        kind, length = RECORD.unpack(self.file.read(RECORD.size))
+        if kind != KIND_CALL:
+            raise ValueError(f"记录文件损坏: 偏移{self.file.tell() - RECORD.size}处不是调用记录")
+        call = TraceCall(self.position, *marshal.loads(self.file.read(length)))
+        self.position += 1
+        header = self.file.read(RECORD.size)
+        if len(header) == RECORD.size:
+            kind, length = RECORD.unpack(header)
+            if kind in (KIND_FRAME, KIND_FRAME_RAW):
+                data = self.file.read(length)
+                # 中途退出时最后一帧可能不完整
+                if frames and len(data) == length:
+                    call.frame = zlib.decompress(data) if kind == KIND_FRAME else data
+            else:
+                self.file.seek(-RECORD.size, 1)
+        return call
+
+    def __iter__(self):
+        while True:
+            call = self.read()
+            if call is None:
+                return
+            yield call
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RecordingBackend:
+    """记录调用的后端代理，其它属性直接访问被包装的后端"""
+
+    def __init__(self, backend, path, frames=False, compress=True):
+        """
+        Args:
+            backend: 被包装的后端
+            path: 记录文件路径
+            frames: 是否记录GetScreenData截取的像素，回放时才能在快照上识别
+            compress: 是否压缩帧
+        """
+        self._backend = backend
+        self._frames = frames
+        self._start = time.perf_counter()
+        self.writer = TraceWriter(path, compress)
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        wrapper = self._wrap(name, attr)
+        self.__dict__[name] = wrapper
+        return wrapper
+
+    def _wrap(self, name, method):
+        writer = self.writer
+        capture = self._frames and name == 'GetScreenData'
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = error = frame = None
+            try:
+                result = method(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                if capture and result:
+                    x1, y1, x2, y2 = args[:4]
+                    frame = ctypes.string_at(result, (x2 - x1) * (y2 - y1) * 4)
+                writer.call(name, args, kwargs, result, error, start - self._start, elapsed, frame)
+
+        wrapper.__name__ = name
+        return wrapper
+
+    def close(self):
+        """写入索引并关闭记录文件"""
+        self.writer.close()
+
+
+class ReplayMismatch(Exception):
+    """回放时的调用与记录不一致"""
+
+
+class ReplayBackend:
+    """按记录回放的后端
+    每次调用取出下一条记录，检查方法名(strict时还检查参数)后返回记录的结果，记录的错误重新抛出。
+    记录了帧的GetScreenData返回回放内存中的像素地址；没有记录帧时返回0(截图失败)。
+    """
+
+    # 按顺序回放，不能在多个线程中使用
+    thread_safe = False
+
+    def __init__(self, path, strict=True, start=0):
+        """
+        Args:
+            path: 记录文件路径
+            strict: 是否检查参数与记录一致
+            start: 从第几次调用开始回放
+        """
+        self.reader = TraceReader(path)
+        self.strict = strict
+        self.reader.seek(start)
+        self._screen_data = {}
+
+    def __len__(self):
+        return len(self.reader)
+
+    @property
+    def position(self):
+        """下一次回放的调用序号"""
+        return self.reader.position
+
+    def seek(self, index):
+        """跳到第index次调用"""
+        self.reader.seek(index)
+
+    def _next(self, name, args, kwargs, check=True):
+        call = self.reader.read()
+        if call is None:
+            raise ReplayMismatch(f"记录已回放完，多出的调用: {name}{args}")
+        if call.method != name:
+            raise ReplayMismatch(f"第{call.index}次调用不一致: 记录为{call.method}，实际为{name}")
+        if check and self.strict and (tuple(call.args) != tuple(args) or call.kwargs != kwargs):
+            raise ReplayMismatch(f"第{call.index}次调用{name}的参数不一致: 记录为{call.args}，实际为{args}")
+        if call.error is not None:
+            raise Exception(call.error)
+        return call
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def replay(*args, **kwargs):
+            return self._next(name, args, kwargs).result
+
+        replay.__name__ = name
+        self.__dict__[name] = replay
+        return replay
+
+    def GetScreenData(self, *args):
+        call = self._next('GetScreenData', args, {})
+        if not call.result or call.frame is None:
+            return 0
+        buffer = ctypes.create_string_buffer(call.frame, len(call.frame))
+        addr = ctypes.addressof(buffer)
+        self._screen_data[addr] = buffer
+        return addr
+
+    def FreeScreenData(self, handle):
+        self._screen_data.pop(int(handle), None)
+        # 回放时的地址与记录时不同，不比较参数
+        return self._next('FreeScreenData', (handle,), {}, check=False).result
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,101 @@
+"""
+等待
+反复检查直到条件满足、超时或被取消。检查间隔从interval开始，未命中时按backoff倍增到max_interval。
+指定区域时每次先截取该区域并按块比较，画面没有变化就不调用检查函数，
+截图间隔同样在画面不变时按backoff倍增到max_interval，画面一变化就重新检查并恢复为interval。
+"""
+import threading
+import time
+
+
+class Waiter:
+    """等待器，记录所有等待的统计"""
+
+    def __init__(self, kp, interval=0.016, max_interval=0.5, backoff=1.5):
+        """
+        Args:
+            kp: PyKeyPresser对象
+            interval: 最小检查间隔(秒)
+            max_interval: 最大检查间隔(秒)
+            backoff: 未命中时间隔的倍数
+        """
+        self.kp = kp
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.waits = 0
+        self.hits = 0
+        self.timeouts = 0
+        self.cancels = 0
+        self.polls = 0
+        self.skipped = 0
+        self.hit_time = 0.0
+
+    def until(self, check, hit, rect=None, timeout=10.0, cancel=None):
+        """等待直到 hit(check()) 为真
+        Args:
+            check: 检查函数，返回查找结果
+            hit: 判断结果是否命中的函数
+            rect: (x1, y1, x2, y2)，指定时只在区域画面变化后检查，期间的颜色查询使用快照
+            timeout: 超时(秒)，None表示一直等待
+            cancel: threading.Event，置位时停止等待
+        Returns:
+            命中时的结果，超时或取消时为最后一次检查的结果
+        """
+        self.waits += 1
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        cancel = cancel or threading.Event()
+        gate = None
+        if rect is not None:
+            from dm_watch import ChangeGate
+            gate = ChangeGate()
+        interval = self.interval
+        result = None
+        checked = False
+        while True:
+            if gate is None:
+                result = check()
+                self.polls += 1
+                checked = True
+            else:
+                with self.kp.snapshot(*rect) as snap:
+                    gate.update(snap.frame)
+                    changed = not checked or gate.region_changed(*rect)
+                    if changed:
+                        result = check()
+                        self.polls += 1
+                        checked = True
+                    else:
+                        self.skipped += 1
+            if hit(result):
+                self.hits += 1
+                self.hit_time += time.perf_counter() - start
+                return result
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                self.timeouts += 1
+                return result
+            if gate is not None and changed:
+                # 画面在变化，之后很可能还会变化，恢复最小间隔
+                interval = self.interval
+            wait = interval
+            interval = min(self.max_interval, interval * self.backoff)
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            if cancel.wait(wait):
+                self.cancels += 1
+                return result
+
+    def stats(self):
+        """等待统计"""
+        return {
+            'waits': self.waits,
+            'hits': self.hits,
+            'timeouts': self.timeouts,
+            'cancels': self.cancels,
+            'polls': self.polls,
+            'skipped': self.skipped,
+            'polls_per_hit': self.polls / self.hits if self.hits else 0.0,
+            'mean_wait': self.hit_time / self.hits if self.hits else 0.0,
+        }
@@ -0,0 +1,176 @@
+"""
+变化检测
+把帧分成固定大小的块并计算每块的校验值，与上一帧比较得到发生变化的块。
+监视项只在其区域内有块变化时重新计算，否则直接返回上一次的结果。
+"""
+import numpy as np
+
+
+def _weights(count, seed):
+    """每个位置一个固定的随机奇数权重，使像素交换位置时校验值也会改变"""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, 2 ** 32, count, dtype=np.uint64) | 1).astype(np.uint32)
+
+
+class TileHasher:
+    """按块计算校验值，块大小相同的实例结果相同，可以共用Frame.cache"""
+
+    def __init__(self, tile=32):
+        self.tile = tile
+        self.col_weights = _weights(tile, 1)
+        self.row_weights = _weights(tile, 2)
+
+    def hashes(self, pixels):
+        """计算块校验值
+        Args:
+            pixels: (h, w, 4) 的BGRA数组
+        Returns:
+            (块行数, 块列数) 的uint64数组，边缘不足一块的部分补0后计算
+        """
+        t = self.tile
+        values = np.ascontiguousarray(pixels).view(np.uint32)[..., 0]
+        h, w = values.shape
+        th, tw = -(-h // t), -(-w // t)
+        if (th * t, tw * t) != (h, w):
+            padded = np.zeros((th * t, tw * t), dtype=np.uint32)
+            padded[:h, :w] = values
+            values = padded
+        blocks = values.reshape(th, t, tw, t)
+        # 每行按列加权求和，再按行加权求和并异或，uint32溢出回绕
+        rows = (blocks * self.col_weights).sum(axis=3, dtype=np.uint32)
+        weighted = (rows * self.row_weights[None, :, None]).sum(axis=1, dtype=np.uint32)
+        mixed = np.bitwise_xor.reduce(rows, axis=1)
+        return weighted.astype(np.uint64) << np.uint64(32) | mixed
+
+
+class ChangeGate:
+    """比较相邻两帧的块校验值"""
+
+    def __init__(self, tile=32):
+        self.hasher = TileHasher(tile)
+        self.tile = tile
+        self.origin = None
+        self.previous = None
+        self.changed = None
+
+    def update(self, frame):
+        """输入新的一帧(dm_frame.Frame)，返回变化块的bool数组，第一帧或尺寸改变时全部为True"""
+        current = frame.cache.get(('tiles', self.tile))
+        if current is None:
+            current = self.hasher.hashes(frame.pixels)
+            frame.cache[('tiles', self.tile)] = current
+        origin = (frame.x, frame.y)
+        if self.previous is None or self.previous.shape != current.shape or self.origin != origin:
+            self.changed = np.ones(current.shape, dtype=bool)
+        else:
+            self.changed = current != self.previous
+        self.previous = current
+        self.origin = origin
+        return self.changed
+
+    def region_changed(self, x1, y1, x2, y2):
+        """最近一次update中，区域(屏幕坐标)内是否有块发生变化；区域超出帧时视为变化"""
+        if self.changed is None:
+            return True
+        ox, oy = self.origin
+        th, tw = self.changed.shape
+        t = self.tile
+        if x1 < ox or y1 < oy or x2 > ox + tw * t or y2 > oy + th * t:
+            return True
+        return bool(self.changed[(y1 - oy) // t:-(-(y2 - oy) // t),
+                                 (x1 - ox) // t:-(-(x2 - ox) // t)].any())
+
+
+class Watch:
+    """一个监视项"""
+
+    def __init__(self, name, rect, func):
+        self.name = name
+        self.rect = rect
+        self.func = func
+        self.result = None
+        self.valid = False
+        self.runs = 0
+        self.reuses = 0
+
+
+class Watcher:
+    """监视多个区域，每次tick只重新计算区域内画面有变化的监视项
+
+    用法:
+        watcher = Watcher(kp, 0, 0, 1920, 1080)
+        watcher.watch_pic("ok", 100, 100, 400, 300, "ok.bmp", "000000", 0.9)
+        while True:
+            results = watcher.tick()
+            if results["ok"][0] >= 0:
+                ...
+    """
+
+    def __init__(self, kp, x1, y1, x2, y2, tile=32):
+        """
+        Args:
+            kp: PyKeyPresser对象
+            x1, y1, x2, y2: 每次tick截取的区域，应包含所有监视区域
+            tile: 块大小(像素)
+        """
+        self.kp = kp
+        self.rect = (x1, y1, x2, y2)
+        self.gate = ChangeGate(tile)
+        self.watches = {}
+        self.frame = None
+
+    def watch(self, name, x1, y1, x2, y2, func):
+        """添加监视项，区域变化时调用 func(frame) 重新计算"""
+        self.watches[name] = Watch(name, (x1, y1, x2, y2), func)
+
+    def watch_pic(self, name, x1, y1, x2, y2, pic_name, delta_color, sim, dir=0):
+        """监视区域中的图片，结果同FindPic的 (序号, x, y)"""
+        matcher = self.kp.matcher
+        self.watch(name, x1, y1, x2, y2,
+                   lambda frame: matcher.find_pic(frame, x1, y1, x2, y2, pic_name, delta_color, sim, dir))
+
+    def watch_color(self, name, x1, y1, x2, y2, color, sim, dir=0):
+        """监视区域中的颜色，结果同FindColor的 (result, x, y)"""
+        self.watch(name, x1, y1, x2, y2,
+                   lambda frame: frame.find_color(x1, y1, x2, y2, color, sim, dir))
+
+    def watch_str(self, name, x1, y1, x2, y2, str_text, color, sim):
+        """监视区域中的文字，结果同FindStrFast的 (result, x, y)；识别仍由dm完成，只在画面变化时调用"""
+        kp = self.kp
+        self.watch(name, x1, y1, x2, y2,
+                   lambda frame: kp.FindStrFast(x1, y1, x2, y2, str_text, color, sim))
+
+    def unwatch(self, name):
+        """移除监视项"""
+        self.watches.pop(name, None)
+
+    def invalidate(self, name=None):
+        """下一次tick时强制重新计算"""
+        for watch in ([self.watches[name]] if name is not None else self.watches.values()):
+            watch.valid = False
+
+    def tick(self, frame=None):
+        """处理新的一帧
+        Args:
+            frame: 已截取的Frame，为None时截取self.rect
+        Returns:
+            {名称: 结果}
+        """
+        if frame is None:
+            frame = self.kp.CaptureFrame(*self.rect)
+        self.frame = frame
+        self.gate.update(frame)
+        results = {}
+        for watch in self.watches.values():
+            if watch.valid and not self.gate.region_changed(*watch.rect):
+                watch.reuses += 1
+            else:
+                watch.result = watch.func(frame)
+                watch.valid = True
+                watch.runs += 1
+            results[watch.name] = watch.result
+        return results
+
+    def stats(self):
+        """每个监视项的计算次数与复用次数"""
+        return {w.name: {'runs': w.runs, 'reuses': w.reuses} for w in self.watches.values()}
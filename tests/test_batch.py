@@ -0,0 +1,52 @@
+"""
+PyKeyPresser批量查找方法测试，使用ImageBackend
+"""
+from array import array
+
+import numpy as np
+import pytest
+
+from dm_backend import ImageBackend
+from PyKeyPresser import PyKeyPresser
+
+REGIONS = [(0, 0, 20, 20), (20, 0, 40, 20), (0, 20, 40, 40)]
+
+
+def make_kp():
+    frame = np.zeros((40, 40, 3), dtype=np.uint8)
+    frame[5, 7] = frame[30, 12] = (0xff, 0x00, 0x00)
+    return PyKeyPresser(backend=ImageBackend(frame), verbose=False)
+
+
+def test_batch_matches_single_calls():
+    kp = make_kp()
+    out = kp.FindColorBatch(REGIONS, "ff0000", 1.0)
+    assert list(out) == [v for r in REGIONS for v in kp.FindColor(*r, "ff0000", 1.0)]
+    assert list(out) == [1, 7, 5, 0, -1, -1, 1, 12, 30]
+
+
+def test_batch_uses_snapshot():
+    kp = make_kp()
+    calls = []
+    find_color = kp.dm.FindColor
+    kp.dm.FindColor = lambda *args: calls.append(args) or find_color(*args)
+    with kp.snapshot(0, 0, 40, 40):
+        out = np.zeros((3, 3), dtype=np.int32)
+        kp.FindColorBatch(REGIONS, "ff0000", 1.0, out=out)
+    # 快照范围内的区域在内存中的帧上查找，不调用后端
+    assert calls == []
+    assert out.tolist() == [[1, 7, 5], [0, -1, -1], [1, 12, 30]]
+
+
+@pytest.mark.parametrize("out", [np.zeros((3, 3), dtype=np.float64), np.zeros((3, 3), dtype=np.int64),
+                                 array('d', bytes(72))])
+def test_batch_rejects_wrong_dtype(out):
+    with pytest.raises(TypeError):
+        make_kp().FindColorBatch(REGIONS, "ff0000", 1.0, out=out)
+
+
+@pytest.mark.parametrize("out", [np.zeros((3, 4), dtype=np.int32), np.zeros((9, 3), dtype=np.int32)[::3],
+                                 np.zeros(8, dtype=np.int32)])
+def test_batch_rejects_wrong_shape(out):
+    with pytest.raises(ValueError):
+        make_kp().FindColorBatch(REGIONS, "ff0000", 1.0, out=out)
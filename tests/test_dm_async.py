@@ -0,0 +1,27 @@
+"""
+dm_async测试，使用ImageBackend
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from dm_async import AsyncKeyPresser
+from dm_backend import ImageBackend
+
+
+def test_close_releases_object_and_executor():
+    frame = np.zeros((20, 20, 3), dtype=np.uint8)
+    frame[3, 4] = (0xff, 0x00, 0x00)
+
+    async def main():
+        async with AsyncKeyPresser(backend=ImageBackend(frame), verbose=False) as akp:
+            assert tuple(await akp.FindColor(0, 0, 20, 20, "ff0000", 1.0)) == (1, 4, 3)
+            kp = akp._kp.result()
+        await akp.close()
+        return akp, kp
+
+    akp, kp = asyncio.run(main())
+    assert kp._dm is None
+    with pytest.raises(RuntimeError):
+        akp.executor.submit(lambda: None)
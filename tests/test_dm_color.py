@@ -0,0 +1,175 @@
+"""
+dm_color与逐像素朴素实现的一致性测试，使用合成图像，覆盖delta颜色、sim和全部9种dir顺序
+"""
+import numpy as np
+import pytest
+
+import dm_color
+from dm_frame import Frame
+
+# dir -> 按扫描顺序排序的键
+ORDER = {
+    0: lambda x, y: (y, x),
+    1: lambda x, y: (-y, x),
+    2: lambda x, y: (y, -x),
+    3: lambda x, y: (-y, -x),
+    5: lambda x, y: (x, y),
+    6: lambda x, y: (-x, y),
+    7: lambda x, y: (x, -y),
+    8: lambda x, y: (-x, -y),
+}
+
+PALETTE = [(0x20, 0x40, 0x60), (0xf0, 0x10, 0x80), (0x55, 0x55, 0x55), (0x00, 0xff, 0x00)]
+
+
+def synthetic(h=9, w=13, seed=0):
+    """由几种颜色加少量噪声组成的BGRA图像，匹配点较多"""
+    rng = np.random.default_rng(seed)
+    rgb = np.array(PALETTE)[rng.integers(0, len(PALETTE), (h, w))]
+    rgb = np.clip(rgb + rng.integers(-4, 5, (h, w, 3)), 0, 255)
+    pixels = np.zeros((h, w, 4), dtype=np.uint8)
+    pixels[..., 0] = rgb[..., 2]
+    pixels[..., 1] = rgb[..., 1]
+    pixels[..., 2] = rgb[..., 0]
+    return pixels
+
+
+def naive_match(pixel, color, sim):
+    """单个像素是否匹配颜色字符串"""
+    tol = int(round((1.0 - sim) * 255))
+    b, g, r = int(pixel[0]), int(pixel[1]), int(pixel[2])
+    for part in color.split('|'):
+        value, _, delta = part.partition('-')
+        delta = delta or '000000'
+        c = [int(value[i:i + 2], 16) for i in (0, 2, 4)]
+        d = [int(delta[i:i + 2], 16) for i in (0, 2, 4)]
+        if all(abs(v - cv) <= dv + tol for v, cv, dv in zip((r, g, b), c, d)):
+            return True
+    return False
+
+
+def naive_order(points, shape, dir):
+    """按dir顺序排列 [(x, y), ...]"""
+    if dir == 4:
+        h, w = shape
+        return sorted(points, key=lambda p: ((p[1] - (h - 1) / 2.0) ** 2 + (p[0] - (w - 1) / 2.0) ** 2,
+                                             p[1], p[0]))
+    return sorted(points, key=lambda p: ORDER[dir](*p))
+
+
+def naive_points(pixels, color, sim):
+    h, w = pixels.shape[:2]
+    return [(x, y) for y in range(h) for x in range(w) if naive_match(pixels[y, x], color, sim)]
+
+
+def naive_multi_points(pixels, first_color, offset_color, sim):
+    h, w = pixels.shape[:2]
+    offsets = []
+    for part in offset_color.split(','):
+        dx, dy, color = part.split('|', 2)
+        negate = color.startswith('-')
+        color = '|'.join(c.lstrip('-') for c in color.split('|'))
+        offsets.append((int(dx), int(dy), color, negate))
+    result = []
+    for x, y in naive_points(pixels, first_color, sim):
+        ok = True
+        for dx, dy, color, negate in offsets:
+            px, py = x + dx, y + dy
+            if not (0 <= px < w and 0 <= py < h) or naive_match(pixels[py, px], color, sim) == negate:
+                ok = False
+                break
+        if ok:
+            result.append((x, y))
+    return result
+
+
+COLORS = ["204060", "204060-050505", "f01080-040404|555555-030303", "00ff00-101010"]
+SIMS = [1.0, 0.98]
+
+
+@pytest.mark.parametrize("dir", range(9))
+@pytest.mark.parametrize("color", COLORS)
+@pytest.mark.parametrize("sim", SIMS)
+def test_find_color(dir, color, sim):
+    pixels = synthetic()
+    expected = naive_order(naive_points(pixels, color, sim), pixels.shape[:2], dir)
+    result = dm_color.find_color(pixels, color, sim, dir)
+    if expected:
+        assert result == (1,) + expected[0]
+    else:
+        assert result == (0, -1, -1)
+
+
+@pytest.mark.parametrize("dir", range(9))
+@pytest.mark.parametrize("color", COLORS)
+@pytest.mark.parametrize("sim", SIMS)
+def test_find_color_ex(dir, color, sim):
+    pixels = synthetic(seed=1)
+    expected = naive_order(naive_points(pixels, color, sim), pixels.shape[:2], dir)
+    ys, xs = dm_color.find_color_ex(pixels, color, sim, dir)
+    assert list(zip(xs.tolist(), ys.tolist())) == expected
+
+
+MULTI = [
+    ("204060-050505", "1|0|f01080-040404"),
+    ("555555-030303", "1|0|204060-050505,0|1|-555555-030303"),
+    ("f01080-040404", "-1|-1|-00ff00-101010,2|1|555555-030303|204060-050505"),
+    ("00ff00-101010", "0|2|-f01080-040404"),
+    ("204060-050505", "1|1|-123456-000000|-654321-000000"),
+    ("204060-050505", "1|1|-f01080-040404|-555555-030303"),
+]
+
+
+@pytest.mark.parametrize("dir", range(9))
+@pytest.mark.parametrize("first_color, offset_color", MULTI)
+@pytest.mark.parametrize("sim", SIMS)
+def test_find_multi_color(dir, first_color, offset_color, sim):
+    for seed in range(3):
+        pixels = synthetic(seed=seed)
+        expected = naive_order(naive_multi_points(pixels, first_color, offset_color, sim),
+                               pixels.shape[:2], dir)
+        result = dm_color.find_multi_color(pixels, first_color, offset_color, sim, dir)
+        assert result == ((1,) + expected[0] if expected else (0, -1, -1))
+        ys, xs = dm_color.find_multi_color_ex(pixels, first_color, offset_color, sim, dir)
+        assert list(zip(xs.tolist(), ys.tolist())) == expected
+
+
+@pytest.mark.parametrize("sim", SIMS)
+def test_find_mul_color(sim):
+    pixels = synthetic(seed=2)
+    for color in ["204060-050505|f01080-040404", "204060|123456", "555555-030303|00ff00-101010", "abcdef"]:
+        expected = int(all(naive_points(pixels, part, sim) for part in color.split('|')))
+        assert dm_color.find_mul_color(pixels, color, sim) == expected
+
+
+@pytest.mark.parametrize("sim", SIMS)
+def test_cmp_colors(sim):
+    pixels = synthetic(seed=3)
+    h, w = pixels.shape[:2]
+    points = [(x, y, COLORS[(x + y) % len(COLORS)]) for y in range(h) for x in range(w)]
+    expected = [naive_match(pixels[y, x], color, sim) for x, y, color in points]
+    assert dm_color.cmp_colors(pixels, points, sim).tolist() == expected
+
+
+def test_sim_widens_tolerance():
+    pixels = synthetic()
+    exact = naive_points(pixels, "204060", 1.0)
+    loose = naive_points(pixels, "204060", 0.98)
+    assert set(exact) <= set(loose) and len(loose) > len(exact)
+
+
+def test_frame_uses_screen_coordinates():
+    pixels = synthetic(seed=4)
+    frame = Frame(pixels, 100, 50)
+    color = "204060-050505"
+    for dir in range(9):
+        expected = naive_order(naive_points(pixels[2:7, 3:11], color, 1.0), (5, 8), dir)
+        result = frame.find_color(103, 52, 111, 57, color, 1.0, dir)
+        if expected:
+            assert result == (1, expected[0][0] + 103, expected[0][1] + 52)
+        else:
+            assert result == (0, -1, -1)
+    for y in range(50, 59):
+        for x in range(100, 113):
+            expected = 0 if naive_match(pixels[y - 50, x - 100], color, 1.0) else 1
+            assert frame.cmp_color(x, y, color, 1.0) == expected
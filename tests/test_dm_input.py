@@ -0,0 +1,30 @@
+"""
+dm_input输入调度测试，使用ImageBackend
+"""
+import time
+
+from dm_backend import ImageBackend
+from PyKeyPresser import PyKeyPresser
+
+
+def test_replacing_scheduler_releases_started_combo():
+    backend = ImageBackend(width=10, height=10)
+    kp = PyKeyPresser(backend=backend, verbose=False)
+    job = kp.CtrlC(block=False)
+    time.sleep(0.05)
+    kp.EnableInputScheduler()
+    # 已按下的Ctrl被释放，等待任务的调用方随即返回
+    assert job.wait(0.5)
+    assert job.cancelled
+    assert backend.GetKeyState(17) == 0
+    assert [event[1:] for event in backend.events] == [('KeyDown', (17,)), ('KeyUp', (17,))]
+
+
+def test_stop_finishes_pending_jobs():
+    backend = ImageBackend(width=10, height=10)
+    kp = PyKeyPresser(backend=backend, verbose=False)
+    scheduler = kp.EnableInputScheduler()
+    job = scheduler.schedule([(10.0, 'KeyPress', (65,))])
+    scheduler.stop()
+    assert job.wait(0.5)
+    assert backend.events == []
@@ -0,0 +1,46 @@
+"""
+dm_match本地找图与逐位置朴素实现的一致性测试
+"""
+import numpy as np
+import pytest
+
+import dm_match
+from dm_frame import Frame
+
+
+def bgra(h, w, bgr):
+    pixels = np.zeros((h, w, 4), dtype=np.uint8)
+    pixels[..., :3] = bgr
+    return pixels
+
+
+def naive_find(pixels, template, sim):
+    """逐个位置统计不匹配的像素数(模板不透明)，返回按行排列的 [(x, y), ...]"""
+    th, tw = template.shape[:2]
+    h, w = pixels.shape[:2]
+    allowed = int((1.0 - sim) * th * tw + 1e-9)
+    points = []
+    for y in range(h - th + 1):
+        for x in range(w - tw + 1):
+            misses = np.count_nonzero((pixels[y:y + th, x:x + tw, :3] != template[..., :3]).any(axis=2))
+            if misses <= allowed:
+                points.append((x, y))
+    return points
+
+
+@pytest.mark.parametrize('size', [265])
+def test_large_template_counter_does_not_wrap(size):
+    # 模板超过256x256时不匹配的像素数超过65535，计数不能回绕成小数而误判为匹配
+    template = bgra(size, size, (0x40, 0x80, 0xc0))
+    template[0, 0, :3] = (0x10, 0x10, 0x10)
+    frame_pixels = bgra(size + 3, 2 * size, (0x40, 0x80, 0xc0))
+    frame_pixels[:, size:, :3] = (0xff, 0x00, 0x00)
+    matcher = dm_match.TemplateMatcher()
+    matcher.add('big', template[..., [2, 1, 0]])
+    frame = Frame(frame_pixels, 10, 20)
+    h, w = frame_pixels.shape[:2]
+    result = matcher.find_pic_ex(frame, 10, 20, 10 + w, 20 + h, 'big', '000000', 0.9)
+    expected = naive_find(frame_pixels, template, 0.9)
+    expected.sort(key=lambda p: (p[1], p[0]))
+    assert result == '|'.join(f'0,{x + 10},{y + 20}' for x, y in expected)
+    assert max(x for x, _ in expected) < size
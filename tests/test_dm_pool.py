@@ -0,0 +1,93 @@
+"""
+dm_pool多窗口工作池测试，使用ImageBackend
+"""
+import threading
+
+import numpy as np
+
+from dm_backend import ImageBackend
+from dm_pool import WindowPool
+from PyKeyPresser import PyKeyPresser
+
+
+class WindowBackend(ImageBackend):
+    """带窗口枚举的后端，closed中的窗口视为已关闭"""
+
+    closed = set()
+
+    def __init__(self):
+        super().__init__(np.zeros((20, 20, 3), dtype=np.uint8))
+        self.thread = threading.current_thread()
+        self.binds = 0
+
+    def EnumWindowByProcess(self, process_name, title, class_name, filter):
+        return "101,102,103" if process_name == "game.exe" else ""
+
+    def GetWindowState(self, hwnd, flag):
+        return 0 if hwnd in self.closed else 1
+
+    def BindWindow(self, hwnd, display, mouse, keypad, mode):
+        self.binds += 1
+        return super().BindWindow(hwnd, display, mouse, keypad, mode)
+
+
+class Factory:
+    """记录创建的对象"""
+
+    def __init__(self):
+        self.created = []
+
+    def __call__(self):
+        kp = PyKeyPresser(backend=WindowBackend(), verbose=False)
+        self.created.append(kp)
+        return kp
+
+
+def test_from_process_releases_finder():
+    factory = Factory()
+    with WindowPool.from_process("game.exe", factory=factory) as pool:
+        assert sorted(pool.workers) == [101, 102, 103]
+        finder = factory.created[0]
+        assert finder._dm is None
+        assert all(future.result(1) == 1 for future in pool.map(lambda kp: kp.GetWindowState(0, 0)).values())
+    assert len(factory.created) == 4
+
+
+def test_tasks_run_on_each_window_thread():
+    factory = Factory()
+    with WindowPool([1, 2], factory=factory) as pool:
+        futures = pool.map(lambda kp: (kp.dm.hwnd, kp.dm.thread is threading.current_thread()))
+        assert {hwnd: f.result(1) for hwnd, f in futures.items()} == {1: (1, True), 2: (2, True)}
+        # 同一窗口的任务按提交顺序执行
+        order = []
+        futures = [pool.submit(1, lambda kp, i: order.append(i), i) for i in range(20)]
+        for future in futures:
+            future.result(1)
+        assert order == list(range(20))
+        stats = pool.stats()
+        assert stats[1]['tasks'] == 21 and stats[1]['bound']
+    # 关闭时解除绑定
+    assert all(kp.dm.hwnd == 0 for kp in factory.created)
+
+
+def test_check_rebinds_closed_window():
+    WindowBackend.closed = {2}
+    try:
+        with WindowPool([1, 2], factory=Factory()) as pool:
+            assert pool.check(1) == {1: True, 2: True}
+            assert pool.stats()[2]['rebinds'] == 1
+            assert pool.stats()[1]['rebinds'] == 0
+    finally:
+        WindowBackend.closed = set()
+
+
+def test_task_errors_are_reported():
+    with WindowPool([1], factory=Factory()) as pool:
+        future = pool.submit(1, lambda kp: 1 / 0)
+        try:
+            future.result(1)
+        except ZeroDivisionError:
+            pass
+        else:
+            raise AssertionError("任务的异常应传给Future")
+        assert pool.stats()[1]['errors'] == 1
@@ -0,0 +1,83 @@
+"""
+dm_profile调用耗时统计测试，使用ImageBackend
+"""
+import json
+import time
+
+import numpy as np
+import pytest
+
+from dm_backend import ImageBackend
+from PyKeyPresser import PyKeyPresser
+
+
+class SlowBackend(ImageBackend):
+    """耗时已知的后端"""
+
+    def FindPic(self, *args):
+        time.sleep(0.002)
+        return -1, -1, -1
+
+    def FindColor(self, *args):
+        raise RuntimeError("失败")
+
+
+def make_kp():
+    return PyKeyPresser(backend=SlowBackend(np.zeros((20, 20, 3), dtype=np.uint8)), verbose=False)
+
+
+def test_stats_count_calls_errors_and_time():
+    kp = make_kp()
+    profiler = kp.EnableProfiling()
+    for _ in range(5):
+        kp.FindPic(0, 0, 20, 20, "a.bmp", "000000", 0.9)
+    for _ in range(3):
+        kp.MoveTo(1, 2)
+    with pytest.raises(RuntimeError):
+        kp.FindColor(0, 0, 20, 20, "ff0000", 1.0)
+    stats = profiler.stats()
+    assert list(stats)[0] == 'FindPic'
+    assert stats['FindPic']['calls'] == 5 and stats['FindPic']['errors'] == 0
+    assert 0.002 <= stats['FindPic']['p50'] <= stats['FindPic']['max']
+    assert stats['MoveTo']['calls'] == 3
+    assert stats['FindColor']['errors'] == 1
+    # 调用位置跳过PyKeyPresser内部，指向本文件
+    sites = stats['FindPic']['sites']
+    assert len(sites) == 1 and next(iter(sites)).startswith('test_dm_profile.py:')
+    assert sum(count for count, _ in sites.values()) == 5
+
+
+def test_exports_and_reset(tmp_path):
+    kp = make_kp()
+    profiler = kp.EnableProfiling(sites=False)
+    kp.MoveTo(1, 2)
+    data = json.loads(profiler.to_json(str(tmp_path / "stats.json")))
+    assert data['MoveTo']['calls'] == 1 and data['MoveTo']['sites'] == {}
+    text = profiler.to_prometheus(str(tmp_path / "dm.prom"))
+    assert 'dm_call_seconds_count{method="MoveTo"} 1' in text
+    assert 'dm_call_errors_total{method="MoveTo"} 0' in text
+    assert (tmp_path / "dm.prom").read_text(encoding="utf-8") == text
+    profiler.reset()
+    assert profiler.stats() == {}
+
+
+def test_disable_restores_backend_and_keeps_recorder(tmp_path):
+    kp = make_kp()
+    backend = kp.dm
+    recorder = kp.StartRecording(str(tmp_path / "trace.bin"))
+    profiler = kp.EnableProfiling()
+    with pytest.raises(Exception):
+        kp.StopRecording()
+    assert kp.DisableProfiling() is profiler
+    assert kp.recorder is recorder and kp.dm is recorder
+    kp.StopRecording()
+    assert kp.dm is backend
+
+    profiler = kp.EnableProfiling()
+    kp.StartRecording(str(tmp_path / "trace2.bin"))
+    # 统计之后又启用了记录，需先停止记录
+    with pytest.raises(Exception):
+        kp.DisableProfiling()
+    kp.StopRecording()
+    assert kp.DisableProfiling() is profiler
+    assert kp.dm is backend
@@ -0,0 +1,35 @@
+"""
+dm_states状态机测试，使用ImageBackend
+"""
+import time
+
+import numpy as np
+
+from dm_backend import ImageBackend
+from dm_states import Color, State, StateMachine
+from PyKeyPresser import PyKeyPresser
+
+
+class SlowCapture(ImageBackend):
+    """截图较慢的后端"""
+
+    def GetScreenData(self, *args):
+        time.sleep(0.005)
+        return super().GetScreenData(*args)
+
+
+def test_capture_is_not_charged_to_first_predicate():
+    frame = np.zeros((40, 40, 3), dtype=np.uint8)
+    frame[5, 5] = frame[6, 6] = (0xff, 0x00, 0x00)
+    kp = PyKeyPresser(backend=SlowCapture(frame), verbose=False)
+    costs = kp.EnableCostModel()
+    first, second = Color(5, 5, "ff0000"), Color(6, 6, "ff0000")
+    machine = StateMachine(kp, [State("red", [first, second])], region=(0, 0, 40, 40))
+    for _ in range(10):
+        assert machine.tick().state.name == "red"
+    # 截图耗时单独统计，两个相同的条件耗时相近，判断顺序不会来回交换
+    stats = costs.stats()
+    assert stats[first.name]['mean_ms'] < 2.0
+    assert stats[second.name]['mean_ms'] < 2.0
+    assert machine.stats()['<capture>']['eval_ms'] >= 5.0
+    assert machine.stats()['red']['eval_ms'] < 2.0
@@ -0,0 +1,51 @@
+"""
+dm_strbatch批量查找字符串测试，使用ImageBackend和合成的字库
+"""
+import numpy as np
+
+from dm_backend import ImageBackend
+from dm_dict import encode_glyph
+from PyKeyPresser import PyKeyPresser
+
+
+def make_kp(tmp_path):
+    rng = np.random.default_rng(4)
+    glyphs = []
+    for i in range(6):
+        bits = rng.random((10, 8)) < 0.4
+        bits[0, :] = bits[-1, :] = bits[:, 0] = bits[:, -1] = True
+        glyphs.append((chr(0x4e00 + i), bits))
+    screen = np.zeros((60, 120, 3), dtype=np.uint8)
+    jobs = []
+    for i, (char, bits) in enumerate(glyphs):
+        x, y = 5 + i % 3 * 40, 5 + i // 3 * 30
+        screen[y:y + 10, x:x + 8][bits] = 255
+        # 同一行的任务区域重叠，合并为一次FindStrEx
+        jobs.append((0, y - 3, 120, y + 15, char, "ffffff", 1.0))
+    (tmp_path / "dict.txt").write_text("\n".join(encode_glyph(bits, char) for char, bits in glyphs),
+                                       encoding="utf-8")
+    kp = PyKeyPresser(backend=ImageBackend(screen), verbose=False)
+    kp.SetPath(str(tmp_path))
+    kp.SetDict(0, "dict.txt")
+    return kp, jobs
+
+
+def test_batch_matches_single_calls(tmp_path):
+    kp, jobs = make_kp(tmp_path)
+    expected = [v for job in jobs for v in kp.FindStr(*job)]
+    assert list(kp.FindStrBatch(jobs)) == expected
+    assert list(kp.FindStrBatch(jobs, local=True)) == expected
+
+
+def test_batch_uses_ocr_cache(tmp_path):
+    kp, jobs = make_kp(tmp_path)
+    cache = kp.EnableOcrCache()
+    calls = []
+    find_str_ex = kp.dm.FindStrEx
+    kp.dm.FindStrEx = lambda *args: calls.append(args) or find_str_ex(*args)
+    first = list(kp.FindStrBatch(jobs))
+    assert len(calls) == 2
+    # 画面和字库都没有变化，合并的FindStrEx直接返回缓存的结果
+    assert list(kp.FindStrBatch(jobs)) == first
+    assert len(calls) == 2
+    assert cache.stats()['hits'] >= 2
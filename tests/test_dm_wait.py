@@ -0,0 +1,51 @@
+"""
+dm_wait等待测试，使用ImageBackend
+"""
+import threading
+
+import numpy as np
+
+from dm_backend import ImageBackend
+from dm_wait import Waiter
+from PyKeyPresser import PyKeyPresser
+
+
+class CountingBackend(ImageBackend):
+    """统计截图次数的后端"""
+
+    captures = 0
+
+    def GetScreenData(self, *args):
+        self.captures += 1
+        return super().GetScreenData(*args)
+
+
+def make_kp():
+    backend = CountingBackend(np.zeros((40, 40, 3), dtype=np.uint8))
+    kp = PyKeyPresser(backend=backend, verbose=False)
+    kp._waiter = Waiter(kp, interval=0.01, max_interval=0.2, backoff=2.0)
+    return kp, backend
+
+
+def test_unchanged_screen_backs_off_captures():
+    kp, backend = make_kp()
+    result = kp.WaitForColor(0, 0, 40, 40, "ff0000", 1.0, timeout=1.0)
+    assert result[0] == 0
+    # 间隔 0.01, 0.02, 0.04, 0.08, 0.16, 0.2...，不按最小间隔每秒截图上百次
+    assert backend.captures <= 12
+    assert kp.waiter.stats()['polls'] == 1
+
+
+def test_change_is_detected_after_backoff():
+    kp, backend = make_kp()
+    screen = np.zeros((40, 40, 3), dtype=np.uint8)
+    screen[20, 30] = (0xff, 0x00, 0x00)
+    timer = threading.Timer(0.5, backend.set_frame, (screen,))
+    timer.start()
+    try:
+        result = kp.WaitForColor(0, 0, 40, 40, "ff0000", 1.0, timeout=2.0)
+    finally:
+        timer.cancel()
+    assert tuple(result) == (1, 30, 20)
+    assert kp.waiter.stats()['hits'] == 1
+    assert kp.waiter.stats()['mean_wait'] < 0.5 + 0.2 + 0.1